@@ -0,0 +1,92 @@
+# bench_extraction.py
+# -------------------
+# Micro-benchmark: single-parse lxml extraction (extraction_engine.py) versus
+# the BeautifulSoup helpers main.py used before (detect_page_type +
+# scrape_environmental_table + extract_datasheet_link, each parsing the page
+# on its own). Runs against the saved pages in fixtures/ – no network needed.
+#
+# Usage:
+#   python bench_extraction.py [--iterations 200]
+
+import argparse
+import glob
+import os
+import time
+
+from bs4 import BeautifulSoup
+
+from detect_page import NavigationModule
+from scrape_environmental_info import scrape_environmental_table
+from datasheet_scraper import extract_datasheet_link
+from extraction_engine import extract_page
+from mock_site import FIXTURES_DIR
+
+
+def load_fixture_pages():
+    """
+    Returns {relative_path: html} for every .html page under fixtures/.
+    """
+    pages = {}
+    for path in sorted(glob.glob(os.path.join(FIXTURES_DIR, "**", "*.html"), recursive=True)):
+        with open(path, encoding="utf-8") as f:
+            pages[os.path.relpath(path, FIXTURES_DIR)] = f.read()
+    return pages
+
+
+def extract_with_beautifulsoup(html):
+    """
+    The pre-engine code path: one parse for page-type detection, one for the
+    row snippet, one for the full page and one for the datasheet link.
+    """
+    page_type = NavigationModule(None, None).detect_page_type(html)
+    row = BeautifulSoup(html, "html.parser").select_one("table.envirnonmental-table tbody tr")
+    data = scrape_environmental_table(str(row), html) if row is not None else None
+    extract_datasheet_link(html)
+    return page_type, data
+
+
+def extract_with_engine(html):
+    extraction = extract_page(html)
+    return extraction.page_type, extraction.to_dict()
+
+
+def _normalize(data):
+    # The engine reports missing fields as None, the BeautifulSoup code leaves them out
+    return {k: v for k, v in data.items() if v is not None} if data else None
+
+
+def time_per_page(fn, pages, iterations):
+    started = time.perf_counter()
+    for _ in range(iterations):
+        for html in pages.values():
+            fn(html)
+    elapsed = time.perf_counter() - started
+    return elapsed / (iterations * len(pages))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark lxml single-parse extraction vs BeautifulSoup.")
+    parser.add_argument("--iterations", type=int, default=200, help="Passes over the fixture corpus")
+    args = parser.parse_args()
+
+    pages = load_fixture_pages()
+    print(f"[INFO] Loaded {len(pages)} fixture pages from {FIXTURES_DIR}")
+
+    # Both code paths must agree before their speed means anything
+    for name, html in pages.items():
+        old_type, old_data = extract_with_beautifulsoup(html)
+        new_type, new_data = extract_with_engine(html)
+        if old_type != new_type or _normalize(old_data) != _normalize(new_data):
+            raise SystemExit(f"[ERROR] Extraction mismatch on {name}:\n  bs4:  {old_type} {old_data}\n  lxml: {new_type} {new_data}")
+    print("[INFO] Outputs match on every page.")
+
+    bs4_seconds = time_per_page(extract_with_beautifulsoup, pages, args.iterations)
+    lxml_seconds = time_per_page(extract_with_engine, pages, args.iterations)
+
+    print(f"[RESULT] BeautifulSoup (multi-parse): {bs4_seconds * 1e6:9.1f} µs/page")
+    print(f"[RESULT] lxml engine (single parse):  {lxml_seconds * 1e6:9.1f} µs/page")
+    print(f"[RESULT] Speedup: {bs4_seconds / lxml_seconds:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,219 @@
+# bench_suite.py
+# --------------
+# Offline benchmark suite. Everything runs against the recorded pages in
+# fixtures/ and the local mock site (mock_site.py) – no network access needed.
+#
+#   1. Helper benchmarks: NavigationModule.detect_page_type,
+#      scrape_environmental_table, extract_datasheet_link and the lxml
+#      extract_page, timed per call over every fixture page.
+#   2. End-to-end: main.main() over a generated input CSV, pointed at the mock
+#      site, with its own run metrics (parts/min, per-part latency).
+#
+# Results can be saved as a baseline and later runs compared against it, so a
+# change that makes any benchmark slower than the tolerance fails the run.
+#
+# Usage:
+#   python bench_suite.py --save-baseline bench_baseline.json
+#   python bench_suite.py --baseline bench_baseline.json [--tolerance 0.25]
+#   python bench_suite.py --browser     # end-to-end through Chrome (needs a local Chrome)
+
+import argparse
+import contextlib
+import csv
+import io
+import json
+import os
+import sys
+import tempfile
+import time
+
+from bs4 import BeautifulSoup
+
+from bench_extraction import load_fixture_pages
+from detect_page import NavigationModule
+from scrape_environmental_info import scrape_environmental_table
+from datasheet_scraper import extract_datasheet_link
+from extraction_engine import extract_page
+from mock_site import start_mock_site, FIXTURES_DIR
+from run_metrics import StageSamples
+import main as scraper
+
+# Parts that exercise every page kind on the mock site
+E2E_EXTRA_PARTS = ["0451", "NOT-A-PART-123"]  # list page, no results
+
+
+# ------------------------------
+# Helper benchmarks
+# ------------------------------
+def _row_snippet(html):
+    row = BeautifulSoup(html, "html.parser").select_one("table.envirnonmental-table tbody tr")
+    return str(row) if row is not None else None
+
+
+def helper_benchmarks(pages, iterations):
+    """
+    Times each extraction helper per call over the fixture pages.
+
+    Returns:
+        dict: benchmark name → StageSamples snapshot plus calls_per_second.
+    """
+    detector = NavigationModule(None, None)
+    product_pages = {name: (html, _row_snippet(html)) for name, html in pages.items()}
+    product_pages = {name: v for name, v in product_pages.items() if v[1] is not None}
+
+    cases = {
+        "detect_page_type": [lambda html=html: detector.detect_page_type(html) for html in pages.values()],
+        "scrape_environmental_table": [lambda row=row, html=html: scrape_environmental_table(row, html)
+                                       for html, row in product_pages.values()],
+        "extract_datasheet_link": [lambda html=html: extract_datasheet_link(html) for html in pages.values()],
+        "extract_page": [lambda html=html: extract_page(html) for html in pages.values()],
+    }
+
+    results = {}
+    for name, calls in cases.items():
+        samples = StageSamples()
+        for _ in range(iterations):
+            for call in calls:
+                started = time.perf_counter()
+                call()
+                samples.add(time.perf_counter() - started)
+        stats = samples.snapshot(digits=7)  # Helper calls take microseconds
+        stats["calls_per_second"] = round(samples.count / samples.total, 1) if samples.total else None
+        results[name] = stats
+    return results
+
+
+# ------------------------------
+# End-to-end benchmark
+# ------------------------------
+def build_e2e_input(path, parts):
+    pool = sorted(os.path.splitext(name)[0] for name in os.listdir(os.path.join(FIXTURES_DIR, "products")))
+    pool += E2E_EXTRA_PARTS
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(["part_number"])
+        for i in range(parts):
+            writer.writerow([pool[i % len(pool)]])
+
+
+def e2e_benchmark(parts, workers, latency, browser, quiet=True):
+    """
+    Runs main.main() end to end against the mock site.
+
+    Returns:
+        dict: parts, wall_seconds, parts_per_minute and the part_total latency percentiles.
+    """
+    server, base_url = start_mock_site(latency=latency)
+    try:
+        with tempfile.TemporaryDirectory(prefix="bench-") as tmp:
+            input_path = os.path.join(tmp, "input.csv")
+            output_path = os.path.join(tmp, "output.csv")
+            metrics_path = os.path.join(tmp, "metrics.json")
+            build_e2e_input(input_path, parts)
+
+            argv = ["--input", input_path, "--output", output_path, "--metrics-json", metrics_path,
+                    "--base-url", base_url, "--workers", str(workers), "--min-interval", "0",
+                    "--no-dedup", "--no-journal", "--no-cache"]
+            if not browser:
+                argv.append("--http-first")
+
+            started = time.perf_counter()
+            sink = io.StringIO() if quiet else sys.stdout
+            with contextlib.redirect_stdout(sink):
+                scraper.main(argv)
+            wall = time.perf_counter() - started
+
+            with open(metrics_path, encoding="utf-8") as f:
+                run = json.load(f)
+            with open(output_path, newline="", encoding="utf-8") as f:
+                rows = sum(1 for _ in csv.DictReader(f))
+    finally:
+        server.shutdown()
+
+    if rows != parts:
+        raise SystemExit(f"[ERROR] End-to-end run wrote {rows} rows for {parts} input parts")
+    result = {
+        "parts": parts,
+        "wall_seconds": round(wall, 3),
+        "parts_per_minute": round(parts / wall * 60, 1),
+        "outcomes": run["counters"].get("outcome", {}),
+        "requests": server.stats["requests"],
+    }
+    result.update({k: v for k, v in run["stages"].get("part_total", {}).items() if k.startswith("p")})
+    return result
+
+
+# ------------------------------
+# Baseline comparison
+# ------------------------------
+def compare(results, baseline, tolerance):
+    """
+    Returns a list of regression messages (p50 latency up / throughput down by more than tolerance).
+    """
+    regressions = []
+    for name, stats in results["helpers"].items():
+        old = baseline.get("helpers", {}).get(name)
+        if old and old.get("p50") and stats["p50"] > old["p50"] * (1 + tolerance):
+            regressions.append(f"{name}: p50 {old['p50'] * 1e6:.0f}µs → {stats['p50'] * 1e6:.0f}µs")
+    old_e2e = baseline.get("e2e")
+    new_e2e = results.get("e2e")
+    if old_e2e and new_e2e and new_e2e["parts_per_minute"] < old_e2e["parts_per_minute"] * (1 - tolerance):
+        regressions.append(f"end-to-end: {old_e2e['parts_per_minute']} → {new_e2e['parts_per_minute']} parts/min")
+    return regressions
+
+
+def print_report(results):
+    print(f"{'benchmark':<28} {'p50 µs':>9} {'p95 µs':>9} {'p99 µs':>9} {'calls/s':>10}")
+    for name, stats in results["helpers"].items():
+        print(f"{name:<28} {stats['p50'] * 1e6:9.1f} {stats['p95'] * 1e6:9.1f} {stats['p99'] * 1e6:9.1f} "
+              f"{stats['calls_per_second']:10.1f}")
+    e2e = results.get("e2e")
+    if e2e:
+        print(f"\n[RESULT] End-to-end: {e2e['parts']} parts in {e2e['wall_seconds']}s "
+              f"({e2e['parts_per_minute']} parts/min, {e2e['requests']} mock-site requests)")
+        print(f"[RESULT] Per part: p50 {e2e['p50']}s, p95 {e2e['p95']}s, p99 {e2e['p99']}s")
+        print(f"[RESULT] Outcomes: {e2e['outcomes']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline benchmark suite (fixtures + mock site).")
+    parser.add_argument("--iterations", type=int, default=50, help="Passes over the fixture pages per helper")
+    parser.add_argument("--e2e-parts", type=int, default=200, help="Input rows for the end-to-end run (0 skips it)")
+    parser.add_argument("--workers", type=int, default=4, help="Workers for the end-to-end run")
+    parser.add_argument("--latency", type=float, default=0.0, help="Artificial mock-site latency per response")
+    parser.add_argument("--browser", action="store_true", help="End-to-end through Chrome instead of --http-first")
+    parser.add_argument("--verbose", action="store_true", help="Show the scraper's own output")
+    parser.add_argument("--json", help="Write the results to this JSON file")
+    parser.add_argument("--save-baseline", help="Write the results as a baseline JSON file")
+    parser.add_argument("--baseline", help="Compare against a baseline JSON file; exit 1 on regression")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed slowdown vs the baseline. Default: 0.25")
+    args = parser.parse_args()
+
+    pages = load_fixture_pages()
+    print(f"[INFO] Loaded {len(pages)} fixture pages from {FIXTURES_DIR}")
+
+    results = {"helpers": helper_benchmarks(pages, args.iterations)}
+    if args.e2e_parts:
+        results["e2e"] = e2e_benchmark(args.e2e_parts, args.workers, args.latency, args.browser,
+                                       quiet=not args.verbose)
+    print_report(results)
+
+    for path in (args.json, args.save_baseline):
+        if path:
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(results, f, indent=2)
+            print(f"[INFO] Results written to {path}")
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.tolerance)
+        if regressions:
+            for line in regressions:
+                print(f"[REGRESSION] {line}")
+            raise SystemExit(1)
+        print(f"[INFO] No regressions against {args.baseline} (tolerance {args.tolerance:.0%}).")
+
+
+if __name__ == "__main__":
+    main()
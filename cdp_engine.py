@@ -0,0 +1,592 @@
+# cdp_engine.py
+# -------------
+# asyncio scraping engine that drives Chrome directly over the DevTools
+# protocol (CDP) instead of through blocking Selenium calls.
+#
+# One Chrome process is launched with remote debugging enabled and a single
+# websocket connection multiplexes many tabs (flattened target sessions).
+# Every step — navigate, wait for page signals, read the HTML, click — is a
+# coroutine, so one event loop keeps dozens of lookups in flight without a
+# Python thread per browser tab.
+#
+# The async steps mirror the Selenium flow in main.py:
+#   async_search  → load the cached product URL / search URL (typed search as fallback)
+#   async_detect  → parse the page once with extraction_engine
+#   async_extract → pick the environmental row for the part
+
+import asyncio
+import itertools
+import json
+import os
+import shutil
+import subprocess
+import tempfile
+import time
+from urllib.parse import urljoin
+
+import websockets
+
+from extraction_engine import extract_page, LIST_OF_ITEMS, NO_RESULTS_AVAILABLE, UNKNOWN
+from http_fetcher import build_search_url, DEFAULT_SEARCH_PATH
+from outcomes import OK, NAVIGATION_FAILED, MISMATCH, NO_TABLE
+from page_readiness import StageTimeouts
+from run_metrics import timed, page_kind
+from resource_blocking import PAGE_WEIGHT_SCRIPT, record_page_weight
+from dom_extraction import CDP_EXPRESSION, extraction_from_dom
+from search_module import CONSENT_ACCEPT_SELECTORS
+
+CHROME_CANDIDATES = ["google-chrome", "google-chrome-stable", "chromium", "chromium-browser", "chrome"]
+
+# Page signals (same selectors as page_readiness.py / NavigationModule)
+SEARCH_INPUT = '[data-testid="mega-menu-search-input"]'
+CONSENT_CLICK_EXPRESSION = (f"(() => {{ const b = {json.dumps(CONSENT_ACCEPT_SELECTORS)}"
+                            f".map(s => document.querySelector(s)).find(Boolean);"
+                            f" if (!b) return false; b.click(); return true; }})()")
+STAGE_SELECTORS = {
+    "homepage": [SEARCH_INPUT],
+    "search_results": ["div.no-results-message", "#MainSearchTable_info", 'td[data-value="Part Number"]'],
+    "product_page": ['td[data-value="Part Number"]', "table.envirnonmental-table tbody tr"],
+}
+
+
+class CdpError(Exception):
+    """Raised when a DevTools command fails or the browser connection drops."""
+
+
+def find_chrome():
+    """
+    Returns the path of a Chrome/Chromium binary on PATH, or raises CdpError.
+    """
+    for name in CHROME_CANDIDATES:
+        path = shutil.which(name)
+        if path:
+            return path
+    raise CdpError(f"No Chrome binary found (tried {', '.join(CHROME_CANDIDATES)}); pass --chrome-binary")
+
+
+# ------------------------------
+# DevTools connection
+# ------------------------------
+class CdpConnection:
+    def __init__(self, ws):
+        """
+        Wraps one browser-level DevTools websocket. Use CdpConnection.connect().
+        """
+        self.ws = ws
+        self._ids = itertools.count(1)
+        self._pending = {}         # message id → future of the command result
+        self._event_waiters = {}   # (session id, event name) → list of futures
+        self._reader = None
+
+    @classmethod
+    async def connect(cls, ws_url):
+        ws = await websockets.connect(ws_url, max_size=None)
+        connection = cls(ws)
+        connection._reader = asyncio.create_task(connection._read_loop())
+        return connection
+
+    async def _read_loop(self):
+        try:
+            async for raw in self.ws:
+                message = json.loads(raw)
+                if "id" in message:
+                    future = self._pending.pop(message["id"], None)
+                    if future is None or future.done():
+                        continue
+                    if "error" in message:
+                        future.set_exception(CdpError(message["error"].get("message", "CDP error")))
+                    else:
+                        future.set_result(message.get("result", {}))
+                else:
+                    key = (message.get("sessionId"), message.get("method"))
+                    for future in self._event_waiters.pop(key, []):
+                        if not future.done():
+                            future.set_result(message.get("params", {}))
+        except websockets.ConnectionClosed:
+            pass
+        finally:
+            # Nobody will answer anymore → fail everything still waiting
+            for future in self._pending.values():
+                if not future.done():
+                    future.set_exception(CdpError("DevTools connection closed"))
+            self._pending.clear()
+
+    async def send(self, method, params=None, session_id=None, timeout=30):
+        """
+        Sends one DevTools command and waits for its result.
+        """
+        message_id = next(self._ids)
+        future = asyncio.get_running_loop().create_future()
+        self._pending[message_id] = future
+        payload = {"id": message_id, "method": method, "params": params or {}}
+        if session_id:
+            payload["sessionId"] = session_id
+        await self.ws.send(json.dumps(payload))
+        try:
+            return await asyncio.wait_for(future, timeout)
+        finally:
+            self._pending.pop(message_id, None)
+
+    def wait_event(self, method, session_id=None):
+        """
+        Returns a future resolved with the params of the next matching event.
+        Register it *before* triggering the event.
+        """
+        future = asyncio.get_running_loop().create_future()
+        self._event_waiters.setdefault((session_id, method), []).append(future)
+        return future
+
+    async def close(self):
+        await self.ws.close()
+        if self._reader:
+            await self._reader
+
+
+# ------------------------------
+# Tabs
+# ------------------------------
+class CdpTab:
+    def __init__(self, connection, target_id, session_id, metrics=None, load_event="Page.loadEventFired",
+                 in_page=False, rate_limiter=None):
+        self.connection = connection
+        self.target_id = target_id
+        self.session_id = session_id
+        self.metrics = metrics
+        self.load_event = load_event  # Page.domContentEventFired for eager loading
+        self.in_page = in_page        # Extract with the in-page script instead of reading the HTML
+        self.rate_limiter = rate_limiter  # Awaited before every page load, told every stage wait (adaptive rate)
+
+    async def send(self, method, params=None, timeout=30):
+        return await self.connection.send(method, params, session_id=self.session_id, timeout=timeout)
+
+    async def wait_turn(self):
+        """
+        Waits for the shared politeness limit before anything that loads a page.
+        """
+        if self.rate_limiter:
+            await self.rate_limiter.wait_async()
+
+    async def navigate(self, url, timeout=30):
+        """
+        Loads a URL and waits for the load event (or the timeout, after which the page is used as-is).
+        """
+        await self.wait_turn()
+        with timed(self.metrics, "driver_get"):
+            loaded = self.connection.wait_event(self.load_event, self.session_id)
+            result = await self.send("Page.navigate", {"url": url}, timeout=timeout)
+            if result.get("errorText"):
+                loaded.cancel()
+                raise CdpError(f"Navigation to {url} failed: {result['errorText']}")
+            try:
+                await asyncio.wait_for(loaded, timeout)
+            except asyncio.TimeoutError:
+                print(f"[WARN] Load event for {url} did not fire within {timeout}s")
+
+    async def evaluate(self, expression, timeout=30):
+        result = await self.send("Runtime.evaluate",
+                                 {"expression": expression, "returnByValue": True, "awaitPromise": True},
+                                 timeout=timeout)
+        if "exceptionDetails" in result:
+            raise CdpError(f"JavaScript error: {result['exceptionDetails'].get('text')}")
+        return result.get("result", {}).get("value")
+
+    async def html(self):
+        with timed(self.metrics, "page_source"):
+            return await self.evaluate("document.documentElement.outerHTML")
+
+    async def current_url(self):
+        return await self.evaluate("location.href")
+
+    async def wait_for_any(self, selectors, timeout, poll=0.1):
+        """
+        Polls until one of the CSS selectors matches. Returns False on timeout.
+        """
+        check = f"{json.dumps(selectors)}.some(s => document.querySelector(s) !== null)"
+        deadline = asyncio.get_running_loop().time() + timeout
+        while True:
+            try:
+                if await self.evaluate(check):
+                    return True
+            except CdpError:
+                pass  # Context destroyed mid-navigation; try again
+            if asyncio.get_running_loop().time() >= deadline:
+                return False
+            await asyncio.sleep(poll)
+
+    async def wait_for_stage(self, stage, timeouts, required=False):
+        """
+        Same as ReadinessWaiter.wait_for(): a required stage raises asyncio.TimeoutError instead of
+        returning False, so a slow page is retried rather than scraped as NAVIGATION_FAILED.
+        """
+        started = time.monotonic()
+        with timed(self.metrics, f"wait_{stage}"):
+            ready = await self.wait_for_any(STAGE_SELECTORS[stage], getattr(timeouts, stage))
+        if self.rate_limiter:
+            self.rate_limiter.observe(time.monotonic() - started, error=not ready)
+        if not ready:
+            print(f"[WARN] Page not ready for stage '{stage}' after {getattr(timeouts, stage)}s")
+            if self.metrics:
+                self.metrics.count("wait_timeout", stage)
+            if required:
+                raise asyncio.TimeoutError(f"Page not ready for stage '{stage}'")
+        return ready
+
+    async def type_search(self, text):
+        """
+        Focuses the mega-menu search box, inserts the text and presses Enter.
+        """
+        await self.wait_turn()  # Enter loads the results page
+        await self.evaluate(f"document.querySelector({json.dumps(SEARCH_INPUT)}).focus()")
+        await self.send("Input.insertText", {"text": text})
+        for event_type in ("keyDown", "keyUp"):
+            await self.send("Input.dispatchKeyEvent", {
+                "type": event_type, "key": "Enter", "code": "Enter",
+                "windowsVirtualKeyCode": 13, "nativeVirtualKeyCode": 13, "text": "\r" if event_type == "keyDown" else "",
+            })
+
+    async def close(self):
+        try:
+            await self.connection.send("Target.closeTarget", {"targetId": self.target_id}, timeout=5)
+        except (CdpError, asyncio.TimeoutError):
+            pass
+
+
+# ------------------------------
+# Browser process
+# ------------------------------
+class CdpBrowser:
+    def __init__(self, process, user_data_dir, connection):
+        self.process = process
+        self.user_data_dir = user_data_dir
+        self.connection = connection
+
+    @classmethod
+    async def launch(cls, binary=None, headless=True, extra_args=(), startup_timeout=20):
+        """
+        Starts Chrome with remote debugging on a free port and connects to it.
+        """
+        binary = binary or find_chrome()
+        user_data_dir = tempfile.mkdtemp(prefix="cdp-profile-")
+        args = [binary, "--remote-debugging-port=0", f"--user-data-dir={user_data_dir}",
+                "--no-first-run", "--no-default-browser-check", "--disable-gpu", "--no-sandbox",
+                "--disable-dev-shm-usage", "--window-size=1920,1080"]
+        if headless:
+            args.append("--headless=new")
+        args.extend(extra_args)
+        args.append("about:blank")
+        process = subprocess.Popen(args, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+        # Chrome writes the chosen port and browser websocket path to DevToolsActivePort
+        port_file = os.path.join(user_data_dir, "DevToolsActivePort")
+        deadline = asyncio.get_running_loop().time() + startup_timeout
+        while True:
+            if os.path.exists(port_file):
+                with open(port_file) as f:
+                    lines = f.read().split()
+                if len(lines) >= 2:
+                    break
+            if process.poll() is not None or asyncio.get_running_loop().time() >= deadline:
+                process.kill()
+                shutil.rmtree(user_data_dir, ignore_errors=True)
+                raise CdpError("Chrome did not start with remote debugging enabled")
+            await asyncio.sleep(0.1)
+
+        connection = await CdpConnection.connect(f"ws://127.0.0.1:{lines[0]}{lines[1]}")
+        print(f"[INFO] Chrome started for CDP engine (pid {process.pid})")
+        return cls(process, user_data_dir, connection)
+
+    async def new_tab(self, metrics=None, resource_filter=None, in_page=False, rate_limiter=None):
+        target = await self.connection.send("Target.createTarget", {"url": "about:blank"})
+        attached = await self.connection.send("Target.attachToTarget",
+                                              {"targetId": target["targetId"], "flatten": True})
+        eager = resource_filter is not None and resource_filter.eager
+        tab = CdpTab(self.connection, target["targetId"], attached["sessionId"], metrics,
+                     load_event="Page.domContentEventFired" if eager else "Page.loadEventFired", in_page=in_page,
+                     rate_limiter=rate_limiter)
+        await tab.send("Page.enable")
+        if resource_filter:
+            await tab.send("Network.enable")
+            await tab.send("Network.setBlockedURLs", {"urls": resource_filter.effective_patterns()})
+        return tab
+
+    async def close(self):
+        try:
+            await self.connection.send("Browser.close", timeout=5)
+        except (CdpError, asyncio.TimeoutError):
+            pass
+        await self.connection.close()
+        try:
+            self.process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            self.process.kill()
+        shutil.rmtree(self.user_data_dir, ignore_errors=True)
+
+
+# ------------------------------
+# Async search / detect / extract
+# ------------------------------
+async def async_search(tab, base_url, part, timeouts, product_url=None, search_path=DEFAULT_SEARCH_PATH,
+                       matcher=None):
+    """
+    Loads the cached product URL (if any), then the search-results URL, and only
+    falls back to typing into the homepage search box if neither resolves.
+
+    Returns:
+        PageExtraction: The parsed page we landed on.
+    """
+    if product_url:
+        await tab.navigate(product_url, timeout=timeouts.product_page)
+        await tab.wait_for_stage("product_page", timeouts)
+        extraction = await async_detect(tab)
+        if extraction.page_type.lower() == part.lower() or extraction.row_index_for(part, matcher) is not None:
+            return extraction
+
+    await tab.navigate(build_search_url(base_url, part, search_path), timeout=timeouts.search_results)
+    await tab.wait_for_stage("search_results", timeouts)
+    extraction = await async_detect(tab)
+    if extraction.page_type != UNKNOWN:
+        return extraction
+
+    # Typed search fallback, from the page the tab is on if it has the search box (every site page does)
+    if not await tab.evaluate(f"document.querySelector({json.dumps(SEARCH_INPUT)}) !== null"):
+        await tab.navigate(base_url, timeout=timeouts.homepage)
+        await tab.wait_for_stage("homepage", timeouts)
+    with timed(tab.metrics, "type_into_search"):
+        await tab.type_search(part)
+    await tab.wait_for_stage("search_results", timeouts, required=True)
+    return await async_detect(tab)
+
+
+async def async_detect(tab):
+    """
+    Reads the page HTML once and parses it with the single-parse extraction engine,
+    or runs the in-page extraction script when the tab is set up for it.
+    """
+    if tab.in_page:
+        with timed(tab.metrics, "dom_script"):
+            summary = await tab.evaluate(CDP_EXPRESSION)
+        return extraction_from_dom(summary)
+    html = await tab.html()
+    with timed(tab.metrics, "parse"):
+        return extract_page(html)
+
+
+async def async_extract(tab, part, extraction, timeouts, matcher=None):
+    """
+    Turns a detected page into (outcome, data), following the first (or best-matching) result of a list page.
+    """
+    if tab.metrics:
+        tab.metrics.count("page", page_kind(extraction.page_type))
+    if extraction.page_type == LIST_OF_ITEMS:
+        result_href = extraction.result_href_for(part, matcher)
+        if matcher:
+            matcher.note_results(extraction, await tab.current_url())
+        if result_href and result_href != extraction.first_result_href:
+            # The matcher found a better result than the first one: load it directly
+            await tab.navigate(urljoin(await tab.current_url(), result_href), timeout=timeouts.product_page)
+            await tab.wait_for_stage("product_page", timeouts, required=True)
+            extraction = await async_detect(tab)
+            data = extraction.to_dict(extraction.row_index_for(part, matcher) or 0)
+            return (OK, data) if data else (NO_TABLE, None)
+
+        # Same as click_first_result(): take the first search result as-is (the click loads a page)
+        await tab.wait_turn()
+        with timed(tab.metrics, "click_first_result"):
+            loaded = tab.connection.wait_event(tab.load_event, tab.session_id)
+            clicked = await tab.evaluate("(() => { const a = document.getElementById('coveo_index0');"
+                                         " if (!a) return false; a.click(); return true; })()")
+        if not clicked:
+            loaded.cancel()
+            print("[ERROR] First search result did not load in time.")
+            return NO_TABLE, None
+        try:
+            await asyncio.wait_for(loaded, timeouts.product_page)
+        except asyncio.TimeoutError:
+            pass
+        await tab.wait_for_stage("product_page", timeouts, required=True)
+        extraction = await async_detect(tab)
+        data = extraction.to_dict(extraction.row_index_for(part, matcher) or 0)
+        return (OK, data) if data else (NO_TABLE, None)
+
+    if extraction.page_type in (NO_RESULTS_AVAILABLE, UNKNOWN):
+        return NAVIGATION_FAILED, None
+
+    row_index = extraction.row_index_for(part, matcher)
+    if extraction.page_type.lower() != part.lower() and row_index is None:
+        print(f"[SKIP] Detected part '{extraction.page_type}' does not match expected '{part}'. Skipping...")
+        return MISMATCH, None
+    data = extraction.to_dict(row_index or 0)
+    return (OK, data) if data else (NO_TABLE, None)
+
+
+# ------------------------------
+# Engine
+# ------------------------------
+class CdpEngine:
+    def __init__(self, base_url, tabs=8, headless=True, binary=None, timeouts=None, rate_limiter=None,
+                 search_path=DEFAULT_SEARCH_PATH, metrics=None, resource_filter=None, in_page=False, matcher=None,
+                 governor=None, max_pages_per_browser=0, weight_sampler=None):
+        """
+        Initialize the engine (call start() before scraping).
+
+        Args:
+            base_url (str): Site homepage.
+            tabs (int): Number of tabs, i.e. lookups in flight at once.
+            headless (bool): Run Chrome headless.
+            binary (str, optional): Chrome binary; found on PATH if omitted.
+            timeouts (StageTimeouts, optional): Per-stage timeouts.
+            rate_limiter (RateLimiter, optional): Shared politeness limit (awaited before each page load).
+            search_path (str): Search URL relative to base_url with a {query} placeholder.
+            metrics (RunMetrics, optional): Per-stage timings of every tab.
+            resource_filter (ResourceFilter, optional): Images off and URL block list on every tab.
+            in_page (bool): Extract with the in-page script (dom_extraction.py) instead of reading the HTML.
+            matcher (PartMatcher, optional): Fuzzy part-number matching for table rows and search results.
+            governor (ResourceGovernor, optional): Relaunch the browser when its memory is over the limit.
+            max_pages_per_browser (int): Relaunch the browser after this many page loads (0 disables it).
+            weight_sampler (PageWeightSampler, optional): Measures the weight of the scraped page when due.
+        """
+        self.base_url = base_url
+        self.tab_count = tabs
+        self.headless = headless
+        self.binary = binary
+        self.timeouts = timeouts or StageTimeouts()
+        self.rate_limiter = rate_limiter
+        self.search_path = search_path
+        self.metrics = metrics
+        self.resource_filter = resource_filter
+        self.in_page = in_page
+        self.matcher = matcher
+        self.governor = governor
+        self.max_pages_per_browser = max_pages_per_browser
+        self.weight_sampler = weight_sampler
+        self.browser = None
+        self._tabs = None
+
+        # Recycling the shared browser: once it is due, its tabs are drained (no new checkouts)
+        # and the browser is relaunched when the last tab in flight comes back
+        self._pages = 0          # Checkouts served by the current browser
+        self._in_use = 0         # Tabs checked out right now
+        self._recycle = None     # Reason the current browser is being drained, or None
+        self.relaunched = 0
+
+    async def start(self):
+        self._tabs = asyncio.Queue()
+        await self._launch()
+
+    async def _launch(self):
+        with timed(self.metrics, "driver_create"):
+            extra_args = self.resource_filter.chrome_args() if self.resource_filter else ()
+            self.browser = await CdpBrowser.launch(self.binary, self.headless, extra_args)
+        tabs = [await self._new_tab() for _ in range(self.tab_count)]
+        await self._warm_up(tabs[0])
+        self._pages = 0
+        self._recycle = None
+        # Refilled in place: parts waiting in _checkout() during a relaunch wake up on the new tabs
+        for tab in tabs:
+            self._tabs.put_nowait(tab)
+
+    async def _warm_up(self, tab):
+        # Homepage and cookie consent once: all tabs share the browser context and its cookies
+        with timed(self.metrics, "session_warmup"):
+            await tab.navigate(self.base_url, timeout=self.timeouts.homepage)
+            await tab.wait_for_stage("homepage", self.timeouts)
+            if await tab.evaluate(CONSENT_CLICK_EXPRESSION):
+                print("[INFO] Accepted the cookie consent banner")
+
+    async def _relaunch(self):
+        print(f"[INFO] Relaunching Chrome ({self._recycle}).")
+        old, self.browser = self.browser, None
+        await old.close()
+        self.relaunched += 1
+        await self._launch()
+
+    async def _new_tab(self):
+        return await self.browser.new_tab(self.metrics, self.resource_filter, self.in_page, self.rate_limiter)
+
+    async def _checkout(self):
+        # No rate-limit wait here: the tab waits before each page load it makes (CdpTab.wait_turn)
+        if self._recycle and self._in_use == 0:
+            # The relaunch after the drain failed; try again before waiting for a tab
+            await self._relaunch()
+        tab = await self._tabs.get()
+        self._in_use += 1
+        return tab
+
+    @property
+    def browser_pid(self):
+        return self.browser.process.pid if self.browser else None
+
+    async def _recycle_reason(self, healthy):
+        if self.max_pages_per_browser and self._pages >= self.max_pages_per_browser:
+            return f"served {self._pages} pages"
+        if self.governor and healthy:
+            # Walking the process tree blocks (psutil or /proc), so it runs off the event loop
+            rss_mb = await asyncio.get_running_loop().run_in_executor(None, self.governor.browser_mb,
+                                                                      self.browser_pid)
+            return self.governor.browser_over_limit(rss_mb)
+        return None
+
+    async def _checkin(self, tab, healthy):
+        self._in_use -= 1
+        self._pages += 1
+        if not self._recycle:
+            reason = await self._recycle_reason(healthy)
+            if reason and not self._recycle:
+                # Stop handing out tabs of this browser; idle ones die with it
+                print(f"[INFO] Draining Chrome for a relaunch ({reason}).")
+                self._recycle = reason
+                while not self._tabs.empty():
+                    self._tabs.get_nowait()
+        if self._recycle:
+            if self._in_use == 0:
+                await self._relaunch()
+            return
+        if not healthy:
+            # Replace a wedged tab instead of restarting the whole browser
+            await tab.close()
+            tab = await self._new_tab()
+        self._tabs.put_nowait(tab)
+
+    async def scrape(self, part, product_url=None):
+        """
+        Scrapes one part on a free tab.
+
+        Returns:
+            tuple: (outcome, data, page_url, extraction)
+        """
+        tab = await self._checkout()
+        healthy = True
+        try:
+            extraction = await async_search(tab, self.base_url, part, self.timeouts, product_url, self.search_path,
+                                            self.matcher)
+            outcome, data = await async_extract(tab, part, extraction, self.timeouts, self.matcher)
+            page_url = await tab.current_url()
+            if self.metrics and self.weight_sampler and self.weight_sampler.due():
+                record_page_weight(self.metrics, await tab.evaluate(f"(() => {{{PAGE_WEIGHT_SCRIPT}}})()"))
+            return outcome, data, page_url, extraction
+        except (CdpError, asyncio.TimeoutError):
+            healthy = False
+            raise
+        finally:
+            await self._checkin(tab, healthy)
+
+    async def load(self, url, stage="product_page"):
+        """
+        Loads any URL on a free tab and returns its PageExtraction (e.g. a series page).
+        """
+        tab = await self._checkout()
+        healthy = True
+        try:
+            await tab.navigate(url, timeout=getattr(self.timeouts, stage))
+            await tab.wait_for_stage(stage, self.timeouts)
+            return await async_detect(tab)
+        except (CdpError, asyncio.TimeoutError):
+            healthy = False
+            raise
+        finally:
+            await self._checkin(tab, healthy)
+
+    async def close(self):
+        if self.browser:
+            await self.browser.close()
+            print(f"[INFO] CDP engine closed ({self.relaunched} browser relaunches).")
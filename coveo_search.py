@@ -0,0 +1,317 @@
+# coveo_search.py
+# ---------------
+# Part resolution straight from the site's search API. The search-results list
+# (#coveo_index0, ...) is rendered client-side from a Coveo Search API
+# response, so instead of waiting for the list to render and clicking the
+# first link we read the JSON payload itself:
+#
+#   - capture:  with the Chrome performance log enabled, every search API
+#               request the page makes (URL, headers incl. the access token,
+#               JSON body) and its response are picked out of the log; the
+#               request is saved as a replayable template.
+#   - replay:   CoveoClient sends the same request with a pooled HTTP session,
+#               asking for many part numbers at once with an advanced query
+#               (@partnumber==("A","B",...)), and maps every result back to
+#               its part number and product URL.
+#
+# mock_site.py serves recorded results (fixtures/coveo/index.json) on
+# POST /rest/search/v2, so all of this runs offline.
+
+import json
+import os
+import threading
+from dataclasses import dataclass, field
+from urllib.parse import urljoin
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from resolution_cache import normalize_part
+
+SEARCH_API_MARKER = "/rest/search"   # Substring of every Coveo search API URL
+DEFAULT_PART_FIELD = "partnumber"
+
+
+@dataclass
+class CoveoResult:
+    part_number: str
+    product_url: str
+    title: str = ""
+    raw: dict = field(default_factory=dict)
+
+
+@dataclass
+class CoveoRequestTemplate:
+    """
+    A search API request as the site sends it; replayed with a different query.
+
+    Attributes:
+        url (str): Search endpoint (with organizationId etc. in the query string).
+        headers (dict): Request headers worth replaying (Authorization, Content-Type).
+        body (dict): JSON body; q / aq / numberOfResults are overwritten per request.
+    """
+    url: str
+    headers: dict = field(default_factory=dict)
+    body: dict = field(default_factory=dict)
+
+    def save(self, path):
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"url": self.url, "headers": self.headers, "body": self.body}, f, indent=1)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        return cls(data["url"], data.get("headers", {}), data.get("body", {}))
+
+
+# ------------------------------
+# Payload parsing
+# ------------------------------
+def parse_search_response(payload, base_url, part_field=DEFAULT_PART_FIELD):
+    """
+    Turns a search API response into CoveoResults (in ranking order).
+
+    Args:
+        payload (dict): Decoded JSON response ({"totalCount", "results": [...]}).
+        base_url (str): Relative clickUri values are resolved against this.
+        part_field (str): Raw field holding the part number; the title is used if it is missing.
+    """
+    results = []
+    for item in payload.get("results") or []:
+        raw = item.get("raw") or {}
+        part_number = raw.get(part_field) or item.get("title") or ""
+        url = item.get("clickUri") or item.get("uri")
+        if not part_number or not url:
+            continue
+        results.append(CoveoResult(part_number.strip(), urljoin(base_url, url), item.get("title", ""), raw))
+    return results
+
+
+# ------------------------------
+# Capture from the Chrome performance log
+# ------------------------------
+REPLAYED_HEADERS = {"authorization", "content-type", "accept"}
+
+
+def capture_from_performance_log(driver, base_url, part_field=DEFAULT_PART_FIELD):
+    """
+    Reads (and thereby drains) the driver's performance log and picks out search API traffic.
+    The driver must have been created with the performance log enabled.
+
+    Returns:
+        tuple: (CoveoRequestTemplate or None, list[CoveoResult] from every captured response)
+    """
+    template = None
+    response_ids = []
+    for entry in driver.get_log("performance"):
+        try:
+            message = json.loads(entry["message"])["message"]
+        except (KeyError, ValueError):
+            continue
+        method, params = message.get("method"), message.get("params", {})
+        if method == "Network.requestWillBeSent":
+            request = params.get("request", {})
+            if SEARCH_API_MARKER in request.get("url", "") and request.get("method") == "POST":
+                try:
+                    body = json.loads(request.get("postData") or "{}")
+                except ValueError:
+                    body = {}
+                headers = {k: v for k, v in request.get("headers", {}).items() if k.lower() in REPLAYED_HEADERS}
+                template = CoveoRequestTemplate(request["url"], headers, body)
+        elif method == "Network.responseReceived":
+            if SEARCH_API_MARKER in params.get("response", {}).get("url", ""):
+                response_ids.append(params["requestId"])
+
+    results = []
+    for request_id in response_ids:
+        try:
+            body = driver.execute_cdp_cmd("Network.getResponseBody", {"requestId": request_id})
+            results.extend(parse_search_response(json.loads(body["body"]), base_url, part_field))
+        except Exception as e:
+            # The body is gone once the page navigated away; the request template is still useful
+            print(f"[WARN] Could not read search API response {request_id}: {e}")
+    return template, results
+
+
+# ------------------------------
+# Replay client
+# ------------------------------
+class CoveoClient:
+    def __init__(self, template, base_url, part_field=DEFAULT_PART_FIELD, batch_size=25, timeout=15, pool_size=10):
+        """
+        Initialize the search API client.
+
+        Args:
+            template (CoveoRequestTemplate): Captured (or hand-written) search request.
+            base_url (str): Site root; relative product URLs are resolved against it.
+            part_field (str): Result field that holds the part number.
+            batch_size (int): Part numbers asked for per request.
+            timeout (float): Per-request timeout in seconds.
+            pool_size (int): Keep-alive connections kept open per host.
+        """
+        self.template = template
+        self.base_url = base_url
+        self.part_field = part_field
+        self.batch_size = batch_size
+        self.timeout = timeout
+        self.pool_size = pool_size
+        self.disabled = False  # Set when the token is rejected; callers fall back to page navigation
+
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._resolved = {}  # normalized part → CoveoResult (looked-ahead, not yet used)
+
+        # Counters for the run summary
+        self.requests = 0
+        self.parts_asked = 0
+        self.parts_resolved = 0
+        self.lookups_served = 0
+
+    @property
+    def session(self):
+        session = getattr(self._local, "session", None)
+        if session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=self.pool_size, pool_maxsize=self.pool_size)
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            self._local.session = session
+        return session
+
+    def search(self, q="", aq=None, number_of_results=10):
+        """
+        Sends one search request built from the template.
+
+        Returns:
+            list[CoveoResult]: Results in ranking order (empty on any error).
+        """
+        if self.disabled:
+            return []
+        body = dict(self.template.body)
+        body.update({"q": q, "numberOfResults": number_of_results, "firstResult": 0})
+        if aq:
+            body["aq"] = aq
+        else:
+            body.pop("aq", None)
+        headers = {"Content-Type": "application/json", **self.template.headers}
+        try:
+            response = self.session.post(self.template.url, data=json.dumps(body), headers=headers,
+                                         timeout=self.timeout)
+        except requests.RequestException as e:
+            print(f"[WARN] Search API request failed: {e}")
+            return []
+        self.requests += 1
+        if response.status_code in (401, 403, 419):
+            print(f"[WARN] Search API rejected the request ({response.status_code}); token expired? Disabling it.")
+            self.disabled = True
+            return []
+        if response.status_code != 200:
+            print(f"[WARN] Search API returned status {response.status_code}")
+            return []
+        try:
+            payload = response.json()
+        except ValueError:
+            # e.g. an HTML error or bot-check page served with status 200
+            print(f"[WARN] Search API returned a non-JSON response ({response.headers.get('Content-Type')})")
+            return []
+        return parse_search_response(payload, self.base_url, self.part_field)
+
+    def resolve_batch(self, parts):
+        """
+        Looks up many part numbers with one request.
+
+        Returns:
+            dict: normalized part → CoveoResult for every part the API knows exactly.
+        """
+        wanted = {normalize_part(p) for p in parts}
+        quoted = ",".join(json.dumps(p.strip()) for p in parts)
+        results = self.search(aq=f"@{self.part_field}==({quoted})", number_of_results=max(10, len(parts) * 2))
+        found = {}
+        for result in results:
+            key = normalize_part(result.part_number)
+            if key in wanted and key not in found:
+                found[key] = result
+        self.parts_asked += len(wanted)
+        self.parts_resolved += len(found)
+        return found
+
+    def prefetch(self, part_numbers):
+        """
+        Wraps a part-number stream: reads batch_size parts ahead, resolves them in one
+        request, then yields them one by one. lookup() serves the looked-ahead results.
+        """
+        batch = []
+        for part in part_numbers:
+            batch.append(part)
+            if len(batch) >= self.batch_size:
+                yield from self._resolve_and_release(batch)
+                batch = []
+        if batch:
+            yield from self._resolve_and_release(batch)
+
+    def _resolve_and_release(self, batch):
+        if not self.disabled:
+            found = self.resolve_batch(batch)
+            with self._lock:
+                self._resolved.update(found)
+        yield from batch
+
+    def lookup(self, part):
+        """
+        Returns the looked-ahead CoveoResult for a part (and forgets it), or None.
+        """
+        with self._lock:
+            result = self._resolved.pop(normalize_part(part), None)
+        if result:
+            self.lookups_served += 1
+        return result
+
+    def summary(self):
+        return (f"{self.requests} requests, {self.parts_resolved}/{self.parts_asked} parts resolved, "
+                f"{self.lookups_served} lookups served")
+
+
+class CoveoCapture:
+    def __init__(self, base_url, template_path=None, part_field=DEFAULT_PART_FIELD):
+        """
+        Collects search API traffic from browsers started with the performance log enabled.
+
+        Args:
+            base_url (str): Site root; relative product URLs are resolved against it.
+            template_path (str, optional): Where to save the first captured request for replay runs.
+            part_field (str): Result field that holds the part number.
+        """
+        self.base_url = base_url
+        self.template_path = template_path
+        self.part_field = part_field
+        self.template = None
+        self.responses_seen = 0
+
+    def drain(self, driver):
+        """
+        Empties the driver's performance log (it grows otherwise) and returns the
+        search results captured since the last call.
+        """
+        template, results = capture_from_performance_log(driver, self.base_url, self.part_field)
+        if template and self.template is None:
+            self.template = template
+            if self.template_path:
+                template.save(self.template_path)
+                print(f"[INFO] Search API request captured → {self.template_path} (replay with --coveo-template)")
+        if results:
+            self.responses_seen += 1
+        return results
+
+    @staticmethod
+    def best_match(results, part):
+        """
+        The result for exactly this part number, or None.
+        """
+        key = normalize_part(part)
+        for result in results:
+            if normalize_part(result.part_number) == key:
+                return result
+        return None
@@ -24,9 +24,9 @@ def extract_datasheet_link(html: str) -> str:
     datasheet_a = soup.find("a", class_="datasheet-link")
 
     # If such an element exists and it has an "href" attribute,
-    # return the value of that attribute (the link URL)
-    if datasheet_a and datasheet_a.has_attr("href"):
-        return datasheet_a["href"]
+    # take the value of that attribute (the link URL), else None
+    link = datasheet_a["href"] if datasheet_a and datasheet_a.has_attr("href") else None
 
-    # If no matching link is found, return None
-    return None
+    # Free the parse tree right away (BeautifulSoup trees are reference cycles the GC only finds later)
+    soup.decompose()
+    return link
@@ -0,0 +1,283 @@
+# delta_store.py
+# --------------
+# Incremental re-scrape support. RoHS/REACH data rarely changes, so instead
+# of scraping every part from scratch on every run, delta mode keeps the last
+# result per part (SQLite, stdlib only) together with:
+#   - a hash of the output fields,
+#   - a content hash of the part's environmental row HTML (when known),
+#   - the product page URL and when the part was last checked / last changed.
+#
+# On the next run:
+#   - parts checked within the max age are written from the store as-is,
+#   - older parts are re-checked with one GET of their stored product page;
+#     if the row HTML hash is unchanged the stored row is reused,
+#   - everything else goes through the normal scrape, and every new or changed
+#     part ends up in a diff report (one line per changed field).
+
+import csv
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+
+from outcomes import OK, FINAL_OUTCOMES
+from resolution_cache import normalize_part
+
+# Change kinds in the diff report
+NEW = "new"
+CHANGED = "changed"
+UNCHANGED = "unchanged"
+
+DIFF_FIELDNAMES = ["part_number", "change", "field", "old_value", "new_value", "checked_at"]
+
+
+def row_fingerprint(outcome, row):
+    """
+    Hash of an output row's values (key order and the part-number spelling do not matter).
+    """
+    values = {k: v for k, v in (row or {}).items() if k != "part_number"}
+    canonical = json.dumps([outcome, values], sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class DeltaStore:
+    def __init__(self, path="delta_store.sqlite", max_age_seconds=7 * 24 * 3600):
+        """
+        Open (or create) the delta store.
+
+        Args:
+            path (str): SQLite database file.
+            max_age_seconds (float): Parts checked more recently than this are not re-checked.
+        """
+        self.path = path
+        self.max_age_seconds = max_age_seconds
+        self._lock = threading.Lock()
+
+        # One shared connection, serialized by our own lock (workers are threads)
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute("""
+            CREATE TABLE IF NOT EXISTS parts (
+                part TEXT PRIMARY KEY,
+                outcome TEXT NOT NULL,
+                row_json TEXT NOT NULL,
+                row_hash TEXT NOT NULL,
+                page_hash TEXT,
+                page_url TEXT,
+                checked_at REAL NOT NULL,
+                changed_at REAL NOT NULL
+            )""")
+        self._db.commit()
+
+        self._reused = set()  # Parts written from the store this run (nothing to record)
+        self._pages = {}      # part → (page_url, page_hash) noted for the upcoming record()
+
+        # Counters for this run
+        self.counts = {"fresh": 0, NEW: 0, CHANGED: 0, UNCHANGED: 0, "page_unchanged": 0}
+
+    # ------------------------------
+    # Lookups
+    # ------------------------------
+    def get(self, part):
+        """
+        Returns the stored entry for a part, or None.
+
+        Returns:
+            dict or None: {"outcome", "row", "row_hash", "page_hash", "page_url", "checked_at", "changed_at"}
+        """
+        with self._lock:
+            row = self._db.execute(
+                "SELECT outcome, row_json, row_hash, page_hash, page_url, checked_at, changed_at "
+                "FROM parts WHERE part = ?", (normalize_part(part),)).fetchone()
+        if row is None:
+            return None
+        outcome, row_json, row_hash, page_hash, page_url, checked_at, changed_at = row
+        return {"outcome": outcome, "row": json.loads(row_json), "row_hash": row_hash, "page_hash": page_hash,
+                "page_url": page_url, "checked_at": checked_at, "changed_at": changed_at}
+
+    def is_fresh(self, entry):
+        return (entry["outcome"] in FINAL_OUTCOMES
+                and time.time() - entry["checked_at"] <= self.max_age_seconds)
+
+    def take_fresh(self, part):
+        """
+        Returns the stored entry if it is recent enough to skip the part, else None.
+        The part is then excluded from record() for this run.
+        """
+        entry = self.get(part)
+        if entry is None or not self.is_fresh(entry):
+            return None
+        with self._lock:
+            self._reused.add(normalize_part(part))
+            self.counts["fresh"] += 1
+        return entry
+
+    def stale_entry(self, part):
+        """
+        Returns the stored entry of a part that is due for a re-check and has a product page to re-check, else None.
+        """
+        entry = self.get(part)
+        if entry is None or entry["outcome"] != OK or not entry["page_url"]:
+            return None
+        return entry
+
+    # ------------------------------
+    # Updates
+    # ------------------------------
+    def note_page(self, part, page_url, page_hash=None):
+        """
+        Remembers where the part's data came from; stored by the next record() of the part.
+        """
+        with self._lock:
+            self._pages[normalize_part(part)] = (page_url, page_hash)
+
+    def record(self, part, outcome, row):
+        """
+        Stores a part's latest result and compares it with the previous one.
+
+        Returns:
+            tuple or None: (change, [(field, old, new), ...]) with change NEW, CHANGED or UNCHANGED;
+                           None for parts written from the store this run and for failed attempts.
+        """
+        key = normalize_part(part)
+        now = time.time()
+        row_hash = row_fingerprint(outcome, row)
+        with self._lock:
+            if key in self._reused:
+                self._reused.discard(key)
+                return None
+            if outcome not in FINAL_OUTCOMES:
+                # A failed attempt says nothing about the data; keep the last good result
+                self._pages.pop(key, None)
+                return None
+            page_url, page_hash = self._pages.pop(key, (None, None))
+            previous = self._db.execute(
+                "SELECT outcome, row_json, row_hash, page_hash, page_url, changed_at FROM parts WHERE part = ?",
+                (key,)).fetchone()
+
+            if previous is None:
+                change, diffs, changed_at = NEW, [], now
+            else:
+                old_outcome, old_json, old_hash, old_page_hash, old_page_url, changed_at = previous
+                page_hash = page_hash or (old_page_hash if old_hash == row_hash else None)
+                page_url = page_url or old_page_url
+                if old_hash == row_hash:
+                    change, diffs = UNCHANGED, []
+                else:
+                    diffs = self._diff(old_outcome, json.loads(old_json), outcome, row)
+                    change, changed_at = CHANGED, now
+
+            self._db.execute(
+                "INSERT OR REPLACE INTO parts "
+                "(part, outcome, row_json, row_hash, page_hash, page_url, checked_at, changed_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (key, outcome, json.dumps(row, ensure_ascii=False), row_hash, page_hash, page_url, now, changed_at))
+            self._db.commit()
+            self.counts[change] += 1
+        return change, diffs
+
+    def touch(self, part):
+        """
+        Marks a part as checked now without changing its data (row HTML hash unchanged).
+        The part is then excluded from record() for this run.
+        """
+        key = normalize_part(part)
+        with self._lock:
+            self._db.execute("UPDATE parts SET checked_at = ? WHERE part = ?", (time.time(), key))
+            self._db.commit()
+            self._reused.add(key)
+            self.counts["page_unchanged"] += 1
+
+    # ------------------------------
+    # Re-check over HTTP
+    # ------------------------------
+    def recheck(self, part, entry, http_fetcher):
+        """
+        Re-checks a stale part with one GET of its stored product page.
+
+        Args:
+            part (str): Part number.
+            entry (dict): The part's stale_entry().
+            http_fetcher (HttpFetcher): Pooled HTTP session used for the GET (rate-limited by the
+                                        fetcher) and the parse.
+
+        Returns:
+            tuple or None: (OK, data) – the stored row if the row HTML hash is unchanged, the freshly
+                           scraped row otherwise; None if the page needs the normal scrape.
+        """
+        fetched = http_fetcher.get(entry["page_url"])
+        if fetched is None:
+            return None
+        final_url, html = fetched
+        extraction = http_fetcher.parse(html)
+        row_index = extraction.row_index_for(part)
+        if row_index is None:
+            return None
+        page_hash = extraction.row_hash(row_index)
+        if page_hash and page_hash == entry["page_hash"]:
+            self.touch(part)
+            return OK, entry["row"]
+
+        status, data = http_fetcher.scrape_extraction(part, extraction)
+        if status != OK:
+            return None
+        self.note_page(part, final_url, page_hash)
+        return OK, data
+
+    @staticmethod
+    def _diff(old_outcome, old_row, outcome, row):
+        diffs = []
+        if old_outcome != outcome:
+            diffs.append(("outcome", old_outcome, outcome))
+        for field in sorted(set(old_row) | set(row or {})):
+            if field == "part_number":
+                continue
+            old, new = old_row.get(field), (row or {}).get(field)
+            if old != new:
+                diffs.append((field, old, new))
+        return diffs
+
+    def summary(self):
+        return (f"{self.counts['fresh']} fresh (not re-checked), {self.counts['page_unchanged']} re-checked "
+                f"with unchanged row HTML, {self.counts[UNCHANGED]} unchanged, {self.counts[CHANGED]} changed, "
+                f"{self.counts[NEW]} new")
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+
+class DiffReport:
+    def __init__(self, path):
+        """
+        CSV report of every new or changed part: one line per changed field.
+
+        Args:
+            path (str): Report CSV path (overwritten).
+        """
+        self.path = path
+        self.lines = 0
+        self._lock = threading.Lock()
+        self._file = open(path, mode="w", newline="", encoding="utf-8")
+        self._csv = csv.DictWriter(self._file, fieldnames=DIFF_FIELDNAMES)
+        self._csv.writeheader()
+
+    def add(self, part, change, diffs):
+        if change == UNCHANGED:
+            return
+        checked_at = time.strftime("%Y-%m-%d %H:%M:%S")
+        with self._lock:
+            if change == NEW:
+                self._csv.writerow({"part_number": part, "change": NEW, "checked_at": checked_at})
+                self.lines += 1
+            for field, old, new in diffs:
+                self._csv.writerow({"part_number": part, "change": change, "field": field,
+                                    "old_value": old, "new_value": new, "checked_at": checked_at})
+                self.lines += 1
+            self._file.flush()
+
+    def close(self):
+        with self._lock:
+            self._file.close()
@@ -1,21 +1,26 @@
 from bs4 import BeautifulSoup  # HTML parser for inspecting page structure
 
-# Constants representing different detected page states
-NO_RESULTS_AVAILABLE = "NO_RESULTS_AVAILABLE"
-LIST_OF_ITEMS = "LIST_OF_ITEMS"
-UNKNOWN = "UNKNOWN"
+# Constants representing different detected page states, plus the single-parse extractor
+from extraction_engine import NO_RESULTS_AVAILABLE, LIST_OF_ITEMS, UNKNOWN
+from dom_extraction import extract_current_page  # page_source + lxml, or one in-page script
+from run_metrics import timed  # Per-stage timing (no-op without metrics)
 
 class NavigationModule:
-    def __init__(self, driver, wait):
+    def __init__(self, driver, wait, metrics=None, in_page=False):
         """
         Initialize the navigation module.
 
         Args:
             driver: Selenium WebDriver instance for interacting with the browser.
             wait: Selenium WebDriverWait instance for waiting on page elements.
+            metrics (RunMetrics, optional): Times navigate(), the page_source transfer and parsing.
+            in_page (bool): Extract with one execute_script call instead of transferring page_source.
         """
         self.driver = driver
         self.wait = wait
+        self.extraction = None  # PageExtraction of the last page seen by navigate()
+        self.metrics = metrics
+        self.in_page = in_page
 
     def navigate(self):
         """
@@ -24,6 +29,9 @@ class NavigationModule:
         This is the main entry point used by main.py to decide what to do next.
         It retrieves the current page HTML from the driver, determines what
         type of page it is, and maps that to the expected status codes.
+        The page is parsed once with extraction_engine (or read with a single
+        in-page script, see dom_extraction.py); the full result is kept in
+        self.extraction so the caller can scrape it without re-parsing.
 
         Returns:
             str: One of:
@@ -31,18 +39,18 @@ class NavigationModule:
                  - "LIST_OF_ITEMS" if multiple results found
                  - Detected part number string if on a direct product page
         """
-        # Get the entire HTML content of the current page
-        html_content = self.driver.page_source
-
-        # Determine what type of page we are on
-        page_type = self.detect_page_type(html_content)
+        # Get the entire HTML content of the current page and parse it once
+        with timed(self.metrics, "navigate"):
+            self.extraction = extract_current_page(self.driver, self.metrics, self.in_page)
 
         # Convert detected page type to the status format expected by main.py
-        return self._map_page_type_to_status(page_type)
+        return self._map_page_type_to_status(self.extraction.page_type)
 
     def detect_page_type(self, html_content: str) -> str:
         """
         Inspects the HTML to detect the type of page.
+        BeautifulSoup reference implementation; navigate() uses the equivalent
+        precompiled selectors in extraction_engine.
 
         Args:
             html_content (str): Full HTML of the page.
@@ -53,25 +61,28 @@ class NavigationModule:
         """
         # Parse the HTML into a BeautifulSoup object
         soup = BeautifulSoup(html_content, "html.parser")
-        
-        # Case 1: "No results" message present
-        if soup.find("div", class_="no-results-message"):
-            return NO_RESULTS_AVAILABLE
-        
-        # Case 2: Page contains a table info section → list of items view
-        if soup.find("div", id="MainSearchTable_info", class_="dataTables_info"):
-            return LIST_OF_ITEMS
-        
-        # Case 3: Direct product page → check for "Part Number" field
-        part_td = soup.find("td", attrs={"data-value": "Part Number"}, class_="sticky-col")
-        if part_td:
-            # Inside that cell, find the <span class="part-number"> and get text
-            part_span = part_td.find("span", class_="part-number")
-            if part_span and part_span.text.strip():
-                return part_span.text.strip()  # Return the actual part number string
-
-        # Case 4: Could not determine → unknown
-        return UNKNOWN
+        try:
+            # Case 1: "No results" message present
+            if soup.find("div", class_="no-results-message"):
+                return NO_RESULTS_AVAILABLE
+
+            # Case 2: Page contains a table info section → list of items view
+            if soup.find("div", id="MainSearchTable_info", class_="dataTables_info"):
+                return LIST_OF_ITEMS
+
+            # Case 3: Direct product page → check for "Part Number" field
+            part_td = soup.find("td", attrs={"data-value": "Part Number"}, class_="sticky-col")
+            if part_td:
+                # Inside that cell, find the <span class="part-number"> and get text
+                part_span = part_td.find("span", class_="part-number")
+                if part_span and part_span.text.strip():
+                    return part_span.text.strip()  # Return the actual part number string
+
+            # Case 4: Could not determine → unknown
+            return UNKNOWN
+        finally:
+            # Free the parse tree right away (BeautifulSoup trees are reference cycles the GC only finds later)
+            soup.decompose()
 
     def _map_page_type_to_status(self, page_type: str) -> str:
         """
@@ -0,0 +1,217 @@
+# direct_navigation.py
+# --------------------
+# Direct URL navigation. Instead of loading the homepage and typing the part
+# number into the mega-menu search box, we load the page we want straight away:
+#   1. the product URL cached for this part in an earlier run (resolution_cache.py),
+#   2. a product URL built from a learned URL pattern (e.g. /products/{part}),
+#   3. the search-results URL for the part,
+# and only fall back to the typed search when none of those resolves.
+#
+# URL patterns are kept in a small JSON file and exact part → URL resolutions
+# in the resolution cache, so repeat lookups across runs take a single page load.
+
+import json
+import os
+import threading
+
+from detect_page import NavigationModule
+from extraction_engine import UNKNOWN
+from outcomes import OK
+from http_fetcher import build_search_url, DEFAULT_SEARCH_PATH
+from search_module import search_from_homepage
+from run_metrics import timed
+
+# Ways a part number shows up in a product URL: name → transform
+SLUG_TRANSFORMS = {
+    "exact": lambda part: part,
+    "lower": lambda part: part.lower(),
+    "lower_dash": lambda part: part.lower().replace(".", "-"),
+    "lower_nodot": lambda part: part.lower().replace(".", ""),
+}
+
+# A pattern is only tried once it has worked this many times more than it failed
+MIN_PATTERN_MARGIN = 2
+
+
+class LearnedUrls:
+    def __init__(self, path="learned_urls.json"):
+        """
+        Load the learned product URL patterns.
+
+        Args:
+            path (str): JSON file the store is loaded from and saved to.
+        """
+        self.path = path
+        self._lock = threading.Lock()
+        self.patterns = {}   # "template|transform" → {"template", "transform", "ok", "bad"}
+        self._dirty = False
+
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                data = json.load(f)
+            self.patterns = data.get("patterns", {})
+            print(f"[INFO] Loaded {len(self.patterns)} URL patterns from {path}")
+
+    # ------------------------------
+    # Lookups
+    # ------------------------------
+    def pattern_url(self, part):
+        """
+        Builds a product URL from the most reliable learned pattern, or returns None.
+        """
+        with self._lock:
+            best = max(self.patterns.values(), key=lambda p: p["ok"] - p["bad"], default=None)
+        if best is None or best["ok"] - best["bad"] < MIN_PATTERN_MARGIN:
+            return None
+        return best["template"].format(part=SLUG_TRANSFORMS[best["transform"]](part))
+
+    # ------------------------------
+    # Learning
+    # ------------------------------
+    def learn(self, part, product_url):
+        """
+        Derives a URL pattern from a part's product URL when the part number
+        appears in the URL's last path segment.
+        """
+        with self._lock:
+            head, _, last_segment = product_url.rstrip("/").rpartition("/")
+            for name, transform in SLUG_TRANSFORMS.items():
+                slug = transform(part)
+                if slug and slug in last_segment:
+                    # Escape literal braces before adding the {part} placeholder
+                    template = (head + "/" + last_segment.replace(slug, "\0", 1)).replace("{", "{{").replace("}", "}}")
+                    template = template.replace("\0", "{part}")
+                    key = f"{template}|{name}"
+                    entry = self.patterns.setdefault(key, {"template": template, "transform": name, "ok": 0, "bad": 0})
+                    entry["ok"] += 1
+                    self._dirty = True
+                    break
+
+    def pattern_failed(self, part):
+        """
+        Counts a miss against the pattern that pattern_url() would use for this part.
+        """
+        with self._lock:
+            best = max(self.patterns.values(), key=lambda p: p["ok"] - p["bad"], default=None)
+            if best is not None:
+                best["bad"] += 1
+                self._dirty = True
+
+    def save(self):
+        """
+        Writes the store atomically (temp file + rename) if anything changed.
+        """
+        with self._lock:
+            if not self._dirty:
+                return
+            tmp_path = self.path + ".tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({"patterns": self.patterns}, f, indent=1)
+            os.replace(tmp_path, self.path)
+            self._dirty = False
+
+
+class DirectNavigator:
+    def __init__(self, base_url, learned=None, cache=None, search_path=DEFAULT_SEARCH_PATH, try_search_url=True,
+                 in_page=False, matcher=None):
+        """
+        Initialize the direct navigator.
+
+        Args:
+            base_url (str): Site homepage (used for search URLs and the typed-search fallback).
+            learned (LearnedUrls, optional): Learned URL patterns; None skips step 2.
+            cache (ResolutionCache, optional): Part → product URL resolutions; None skips step 1.
+            search_path (str): Search URL relative to base_url with a {query} placeholder.
+            try_search_url (bool): Load the search-results URL before falling back to typing.
+            in_page (bool): Detect pages with the in-page extraction script (dom_extraction.py).
+            matcher (PartMatcher, optional): Accept pages whose rows match the part fuzzily.
+        """
+        self.base_url = base_url
+        self.learned = learned
+        self.cache = cache
+        self.search_path = search_path
+        self.try_search_url = try_search_url
+        self.in_page = in_page
+        self.matcher = matcher
+
+    def cached(self, part):
+        """
+        Returns the cache entry for a part (see ResolutionCache.get), or None.
+        """
+        return self.cache.get(part) if self.cache else None
+
+    def remember(self, part, outcome, product_url=None, page_type=None):
+        """
+        Records how a lookup ended so the next one can skip straight to the answer.
+        """
+        if self.cache:
+            self.cache.put(part, outcome, product_url=product_url, page_type=page_type)
+        if self.learned and product_url and outcome == OK:
+            self.learned.learn(part, product_url)
+
+    def _try(self, driver, wait, url, stage, waiter, rate_limiter=None):
+        waiter.wait_turn(rate_limiter)
+        with timed(waiter.metrics, "driver_get"):
+            driver.get(url)
+        waiter.wait_for(stage)
+        nav_module = NavigationModule(driver, wait, waiter.metrics, self.in_page)
+        result_type = nav_module.navigate()
+        resolved = nav_module.extraction.page_type != UNKNOWN
+        return resolved, nav_module, result_type
+
+    def _is_for_part(self, nav_module, result_type, part):
+        # Product page of the part itself, or a multi-row page (e.g. series page) listing it
+        return (result_type.lower() == part.lower()
+                or nav_module.extraction.row_index_for(part, self.matcher) is not None)
+
+    def navigate(self, driver, wait, part, waiter, cached=None, rate_limiter=None):
+        """
+        Loads the best page for a part and detects where we landed.
+
+        Args:
+            driver: Selenium WebDriver instance.
+            wait: WebDriverWait bound to the driver.
+            part (str): Part number.
+            waiter (ReadinessWaiter): Page-readiness waiter bound to the driver.
+            cached (dict, optional): Cache entry already looked up by the caller.
+            rate_limiter (RateLimiter, optional): Shared politeness limit, awaited before every page load.
+
+        Returns:
+            tuple: (nav_module, result_type) – same result_type values as NavigationModule.navigate().
+        """
+        # 1. Product URL resolved in an earlier run (or by the search API)
+        entry = cached if cached is not None else self.cached(part)
+        if entry and entry.get("product_url"):
+            resolved, nav_module, result_type = self._try(driver, wait, entry["product_url"], "product_page", waiter,
+                                                          rate_limiter)
+            if resolved and self._is_for_part(nav_module, result_type, part):
+                print(f"[INFO] Direct hit on cached product URL for '{part}'")
+                return nav_module, result_type
+            print(f"[INFO] Cached URL for '{part}' no longer resolves, dropping it.")
+            if self.cache:
+                self.cache.invalidate(part)
+
+        # 2. Product URL built from a learned pattern
+        guessed_url = self.learned.pattern_url(part) if self.learned else None
+        if guessed_url:
+            resolved, nav_module, result_type = self._try(driver, wait, guessed_url, "product_page", waiter,
+                                                          rate_limiter)
+            if resolved and self._is_for_part(nav_module, result_type, part):
+                print(f"[INFO] Direct hit on pattern URL for '{part}'")
+                return nav_module, result_type
+            self.learned.pattern_failed(part)
+
+        # 3. Search-results URL
+        if self.try_search_url:
+            resolved, nav_module, result_type = self._try(
+                driver, wait, build_search_url(self.base_url, part, self.search_path), "search_results", waiter,
+                rate_limiter)
+            if resolved:
+                return nav_module, result_type
+            print(f"[INFO] Direct URLs did not resolve for '{part}', falling back to typed search.")
+
+        # 4. Typed search from the homepage
+        waiter.wait_turn(rate_limiter)
+        search_from_homepage(driver, self.base_url, part, waiter)
+        nav_module = NavigationModule(driver, wait, waiter.metrics, self.in_page)
+        return nav_module, nav_module.navigate()
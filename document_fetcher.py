@@ -0,0 +1,317 @@
+# document_fetcher.py
+# -------------------
+# Compliance document download stage. Every output row links up to four
+# documents (RoHS certificate, REACH declaration, IPC material declaration,
+# datasheet); this module downloads them on a bounded thread pool with pooled
+# keep-alive connections.
+#
+#   - identical URLs are fetched once per run, however many parts link them
+#     (many parts share one series datasheet),
+#   - files go to a content-addressed store (documents/ab/abcdef…), so equal
+#     files are stored once even under different URLs,
+#   - a SQLite index remembers ETag / Last-Modified per URL, and later runs
+#     revalidate with If-None-Match / If-Modified-Since (304 → nothing moved),
+#   - bodies are streamed to disk in chunks, never held in memory as a whole.
+#
+# Usage (after a scraping run, or with --fetch-documents during one):
+#   python document_fetcher.py output.csv [--store documents --workers 8]
+
+import argparse
+import csv
+import hashlib
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urljoin, urlsplit, urlunsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+# Output columns that hold document links
+DOCUMENT_FIELDS = ["rohs_certificate_link", "reach_declaration_link", "ipc_material_declaration_link",
+                   "datasheet_link"]
+
+DOWNLOADED = "downloaded"
+NOT_MODIFIED = "not_modified"
+FAILED = "failed"
+
+
+# ------------------------------
+# Content-addressed store + index
+# ------------------------------
+class DocumentStore:
+    def __init__(self, root="documents"):
+        """
+        Open (or create) a document store.
+
+        Args:
+            root (str): Directory for the blobs and the index database.
+        """
+        self.root = root
+        os.makedirs(root, exist_ok=True)
+        self._lock = threading.Lock()
+
+        # One shared connection, serialized by our own lock (downloads run on threads)
+        self._db = sqlite3.connect(os.path.join(root, "index.sqlite"), check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute("""
+            CREATE TABLE IF NOT EXISTS documents (
+                url TEXT PRIMARY KEY,
+                sha256 TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                content_type TEXT,
+                etag TEXT,
+                last_modified TEXT,
+                fetched_at REAL NOT NULL
+            )""")
+        self._db.execute("""
+            CREATE TABLE IF NOT EXISTS part_documents (
+                part TEXT NOT NULL,
+                field TEXT NOT NULL,
+                url TEXT NOT NULL,
+                PRIMARY KEY (part, field)
+            )""")
+        self._db.commit()
+
+    def blob_path(self, sha256):
+        return os.path.join(self.root, sha256[:2], sha256)
+
+    def lookup(self, url):
+        """
+        Returns the index entry for a URL as a dict, or None.
+        """
+        with self._lock:
+            row = self._db.execute(
+                "SELECT sha256, size, content_type, etag, last_modified, fetched_at FROM documents WHERE url = ?",
+                (url,)).fetchone()
+        if row is None:
+            return None
+        keys = ("sha256", "size", "content_type", "etag", "last_modified", "fetched_at")
+        return dict(zip(keys, row))
+
+    def add_blob(self, tmp_path, sha256):
+        """
+        Moves a finished download into place (or drops it if the same content is already stored).
+        """
+        final_path = self.blob_path(sha256)
+        if os.path.exists(final_path):
+            os.remove(tmp_path)
+            return final_path
+        os.makedirs(os.path.dirname(final_path), exist_ok=True)
+        os.replace(tmp_path, final_path)
+        return final_path
+
+    def record(self, url, sha256, size, content_type, etag, last_modified):
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO documents (url, sha256, size, content_type, etag, last_modified, fetched_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (url, sha256, size, content_type, etag, last_modified, time.time()))
+            self._db.commit()
+
+    def touch(self, url):
+        with self._lock:
+            self._db.execute("UPDATE documents SET fetched_at = ? WHERE url = ?", (time.time(), url))
+            self._db.commit()
+
+    def link(self, part, field, url):
+        with self._lock:
+            self._db.execute("INSERT OR REPLACE INTO part_documents (part, field, url) VALUES (?, ?, ?)",
+                             (part, field, url))
+            self._db.commit()
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+
+# ------------------------------
+# Downloader
+# ------------------------------
+class DocumentFetcher:
+    def __init__(self, store, workers=8, timeout=60, chunk_size=64 * 1024, base_url=None, rebase_url=None):
+        """
+        Initialize the downloader.
+
+        Args:
+            store (DocumentStore): Where files and their metadata go.
+            workers (int): Concurrent downloads (also the keep-alive pool size per host).
+            timeout (float): Connect/read timeout per request in seconds.
+            chunk_size (int): Bytes per streamed chunk.
+            base_url (str, optional): Relative links are resolved against this.
+            rebase_url (str, optional): Replace scheme and host of every link with this one
+                                        (a mirror, or mock_site.py for offline runs).
+        """
+        self.store = store
+        self.workers = workers
+        self.timeout = timeout
+        self.chunk_size = chunk_size
+        self.base_url = base_url
+        self.rebase_url = rebase_url
+
+        self._local = threading.local()
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="docs")
+        self._slots = threading.BoundedSemaphore(workers * 4)  # Bounds queued + running downloads
+        self._lock = threading.Lock()
+        self._seen = set()  # URLs already queued this run
+
+        # Counters for the run summary
+        self.counts = {DOWNLOADED: 0, NOT_MODIFIED: 0, FAILED: 0}
+        self.duplicates = 0
+        self.bytes_downloaded = 0
+
+    @property
+    def session(self):
+        session = getattr(self._local, "session", None)
+        if session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=self.workers, pool_maxsize=self.workers)
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            self._local.session = session
+        return session
+
+    def resolve(self, url):
+        if self.base_url:
+            url = urljoin(self.base_url, url)
+        if self.rebase_url:
+            target = urlsplit(self.rebase_url)
+            url = urlunsplit(urlsplit(url)._replace(scheme=target.scheme, netloc=target.netloc))
+        return url
+
+    # ------------------------------
+    # One download
+    # ------------------------------
+    def fetch(self, url):
+        """
+        Downloads (or revalidates) one URL into the store.
+
+        Returns:
+            str: DOWNLOADED, NOT_MODIFIED or FAILED.
+        """
+        known = self.store.lookup(url)
+        headers = {}
+        if known and os.path.exists(self.store.blob_path(known["sha256"])):
+            if known["etag"]:
+                headers["If-None-Match"] = known["etag"]
+            if known["last_modified"]:
+                headers["If-Modified-Since"] = known["last_modified"]
+
+        tmp_path = None
+        try:
+            with self.session.get(self.resolve(url), headers=headers, stream=True, timeout=self.timeout) as response:
+                if response.status_code == 304:
+                    self.store.touch(url)
+                    return NOT_MODIFIED
+                if response.status_code != 200:
+                    print(f"[WARN] Document {url} returned status {response.status_code}")
+                    return FAILED
+
+                # Stream to a temp file in the store while hashing; never hold the whole body
+                digest = hashlib.sha256()
+                size = 0
+                fd, tmp_path = tempfile.mkstemp(dir=self.store.root, suffix=".part")
+                with os.fdopen(fd, "wb") as f:
+                    for chunk in response.iter_content(chunk_size=self.chunk_size):
+                        f.write(chunk)
+                        digest.update(chunk)
+                        size += len(chunk)
+                sha256 = digest.hexdigest()
+                self.store.add_blob(tmp_path, sha256)
+                tmp_path = None
+                self.store.record(url, sha256, size, response.headers.get("Content-Type"),
+                                  response.headers.get("ETag"), response.headers.get("Last-Modified"))
+                with self._lock:
+                    self.bytes_downloaded += size
+                return DOWNLOADED
+        except (requests.RequestException, OSError) as e:
+            print(f"[WARN] Document download failed for {url}: {e}")
+            return FAILED
+        finally:
+            if tmp_path and os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def _run(self, url):
+        try:
+            status = self.fetch(url)
+        except Exception as e:
+            print(f"[ERROR] Document download crashed for {url}: {e}")
+            status = FAILED
+        finally:
+            self._slots.release()
+        with self._lock:
+            self.counts[status] += 1
+        return status
+
+    # ------------------------------
+    # Queueing
+    # ------------------------------
+    def submit(self, url):
+        """
+        Queues a URL unless it was already queued this run. Blocks while the queue is full.
+        """
+        with self._lock:
+            if url in self._seen:
+                self.duplicates += 1
+                return
+            self._seen.add(url)
+        self._slots.acquire()
+        self._executor.submit(self._run, url)
+
+    def submit_row(self, row):
+        """
+        Queues every document linked from one output row and indexes them under its part.
+        """
+        part = row.get("part_number")
+        for field in DOCUMENT_FIELDS:
+            url = row.get(field)
+            if not url:
+                continue
+            if part:
+                self.store.link(part, field, url)
+            self.submit(url)
+
+    def close(self):
+        """
+        Waits for every queued download to finish.
+        """
+        self._executor.shutdown(wait=True)
+
+    def summary(self):
+        return (f"{self.counts[DOWNLOADED]} downloaded ({self.bytes_downloaded / 1e6:.1f} MB), "
+                f"{self.counts[NOT_MODIFIED]} not modified, {self.counts[FAILED]} failed, "
+                f"{self.duplicates} duplicate links skipped")
+
+
+def iter_output_rows(path):
+    """
+    Yields rows from an output CSV.
+    """
+    with open(path, newline="", encoding="utf-8") as f:
+        yield from csv.DictReader(f)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Download the compliance documents linked from output CSVs.")
+    parser.add_argument("outputs", nargs="+", help="Output CSV file(s) written by main.py")
+    parser.add_argument("--store", default="documents", help="Document store directory. Default: documents")
+    parser.add_argument("--workers", type=int, default=8, help="Concurrent downloads. Default: 8")
+    parser.add_argument("--base-url", default="https://www.littelfuse.com/", help="Resolve relative links against this")
+    parser.add_argument("--rebase-url", help="Fetch every link from this scheme://host instead (mirror / mock site)")
+    args = parser.parse_args()
+
+    store = DocumentStore(args.store)
+    fetcher = DocumentFetcher(store, workers=args.workers, base_url=args.base_url, rebase_url=args.rebase_url)
+    started = time.monotonic()
+    try:
+        for output in args.outputs:
+            for row in iter_output_rows(output):
+                fetcher.submit_row(row)
+        fetcher.close()
+    finally:
+        store.close()
+    print(f"[INFO] Documents: {fetcher.summary()} in {time.monotonic() - started:.1f}s")
@@ -0,0 +1,130 @@
+# dom_extraction.py
+# -----------------
+# In-page extraction. Instead of pulling driver.page_source (hundreds of KB
+# over the WebDriver wire) and parsing it again in Python, one execute_script
+# call runs the same selectors inside the browser and sends back a compact
+# object with just the page-type signals and the FIELDNAMES values.
+#
+# The result is turned into the same PageExtraction that extraction_engine
+# builds from HTML, so everything downstream (row_index_for, to_dict, series
+# harvesting) works unchanged. The script mirrors extraction_engine.SELECTORS
+# and CELL_FIELDS; keep the two in sync.
+
+import json
+
+from extraction_engine import (PageExtraction, EnvironmentalRow, SearchResult, CELL_FIELDS, extract_page,
+                               NO_RESULTS_AVAILABLE, LIST_OF_ITEMS, UNKNOWN)
+from run_metrics import timed
+
+# function(cellFields) → compact page summary. cellFields is CELL_FIELDS as {data-value: [field, kind]}.
+EXTRACT_FUNCTION = """
+function (cellFields) {
+    // Same as BeautifulSoup get_text(strip=True): strip every text node and glue them together
+    const text = (el) => {
+        const walker = document.createTreeWalker(el, NodeFilter.SHOW_TEXT);
+        let out = "";
+        for (let node = walker.nextNode(); node; node = walker.nextNode()) out += node.nodeValue.trim();
+        return out;
+    };
+    const href = (selector) => {
+        const a = document.querySelector(selector);
+        return a ? a.getAttribute("href") : null;
+    };
+    const partSpan = document.querySelector('td.sticky-col[data-value="Part Number"] span.part-number');
+    const seriesSpan = document.querySelector("span.series-short-desc");
+
+    const rows = [];
+    for (const tr of document.querySelectorAll("table.envirnonmental-table tbody > tr")) {
+        const row = {};
+        for (const td of tr.querySelectorAll("td")) {
+            const mapping = cellFields[(td.getAttribute("data-value") || "").trim()];
+            if (!mapping) continue;
+            const [name, kind] = mapping;
+            if (kind === "text") {
+                row[name] = text(td);
+            } else if (kind === "desc") {
+                const span = td.querySelector("span.desc");
+                row[name] = span ? text(span) : null;
+            } else {
+                const link = td.querySelector("a.link");
+                row[name] = link ? link.getAttribute("href") : null;
+            }
+        }
+        rows.push(row);
+    }
+
+    return {
+        no_results: document.querySelector("div.no-results-message") !== null,
+        list_info: document.querySelector("div#MainSearchTable_info.dataTables_info") !== null,
+        part_number: partSpan ? partSpan.textContent.trim() : null,
+        rows: rows,
+        series_text: seriesSpan ? text(seriesSpan) : null,
+        datasheet_link: href("a.side-link.datasheet-link[href]"),
+        series_link: href("a.series-link[href]"),
+        first_result_href: href("a#coveo_index0[href]"),
+        results: Array.from(document.querySelectorAll('a[id^="coveo_index"]'),
+                            (a) => ({part_number: text(a), href: a.getAttribute("href")})),
+    };
+}
+"""
+
+_CELL_FIELDS_ARG = {data_value: list(mapping) for data_value, mapping in CELL_FIELDS.items()}
+
+# Selenium: execute_script body; arguments[0] is the cell-field table
+SELENIUM_SCRIPT = f"return ({EXTRACT_FUNCTION})(arguments[0]);"
+
+# CDP Runtime.evaluate expression (cdp_engine.py)
+CDP_EXPRESSION = f"({EXTRACT_FUNCTION})({json.dumps(_CELL_FIELDS_ARG)})"
+
+
+def extraction_from_dom(summary):
+    """
+    Builds a PageExtraction from the object returned by EXTRACT_FUNCTION.
+    """
+    if summary.get("no_results"):
+        page_type = NO_RESULTS_AVAILABLE
+    elif summary.get("list_info"):
+        page_type = LIST_OF_ITEMS
+    else:
+        page_type = summary.get("part_number") or UNKNOWN
+
+    result = PageExtraction(page_type=page_type)
+    result.rows = [EnvironmentalRow(**row) for row in summary.get("rows") or []]
+
+    series_text = summary.get("series_text")
+    # Same rule as scrape_environmental_table: only keep text after "Series:"
+    if series_text and "Series:" in series_text:
+        result.series = series_text.split("Series:")[-1].strip()
+
+    result.datasheet_link = summary.get("datasheet_link") or None
+    result.series_link = summary.get("series_link") or None
+    result.first_result_href = summary.get("first_result_href") or None
+    result.results = [SearchResult(**item) for item in summary.get("results") or []]
+    return result
+
+
+def extract_current_page(driver, metrics=None, in_page=False):
+    """
+    Extracts the page the driver is on.
+
+    Args:
+        driver: Selenium WebDriver instance.
+        metrics (RunMetrics, optional): Times the transfer ("page_source" / "dom_script") and "parse".
+        in_page (bool): Run the extraction script in the browser instead of shipping page_source.
+                        Falls back to page_source if the script fails.
+
+    Returns:
+        PageExtraction: Typed extraction result.
+    """
+    if in_page:
+        try:
+            with timed(metrics, "dom_script"):
+                summary = driver.execute_script(SELENIUM_SCRIPT, _CELL_FIELDS_ARG)
+            return extraction_from_dom(summary)
+        except Exception as e:
+            print(f"[WARN] In-page extraction failed, using page_source: {e}")
+
+    with timed(metrics, "page_source"):
+        html = driver.page_source
+    with timed(metrics, "parse"):
+        return extract_page(html)
@@ -0,0 +1,265 @@
+# driver_pool.py
+# --------------
+# This module keeps a small pool of long-lived Chrome WebDriver sessions so the
+# scraper does not launch a fresh browser for every part number.
+# Sessions are handed out one at a time, health-checked when they come back,
+# and recycled (quit + relaunched) after a configurable number of pages or
+# as soon as they crash. The chromedriver binary is resolved only once per run.
+
+import queue
+import threading
+from contextlib import contextmanager
+
+from selenium import webdriver
+from selenium.webdriver.chrome.service import Service
+from selenium.webdriver.chrome.options import Options
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.common.exceptions import (WebDriverException, InvalidSessionIdException, TimeoutException,
+                                        StaleElementReferenceException, NoSuchElementException)
+from webdriver_manager.chrome import ChromeDriverManager
+
+from run_metrics import timed
+
+# Errors about the page, not the browser: the session stays in the pool
+PAGE_ERRORS = (TimeoutException, StaleElementReferenceException, NoSuchElementException)
+
+# Cached chromedriver path (resolved on first use, shared by every session)
+_driver_path = None
+_driver_path_lock = threading.Lock()
+
+
+# ------------------------------
+# Resolve chromedriver once
+# ------------------------------
+def resolve_driver_path():
+    """
+    Returns the chromedriver binary path, downloading it on the first call only.
+    ChromeDriverManager().install() hits the network and the disk, so we cache
+    the result for the lifetime of the process.
+    """
+    global _driver_path
+    with _driver_path_lock:
+        if _driver_path is None:
+            _driver_path = ChromeDriverManager().install()
+            print(f"[INFO] Resolved chromedriver: {_driver_path}")
+        return _driver_path
+
+
+# ------------------------------
+# Create Chrome WebDriver
+# ------------------------------
+def create_driver(headless=True, driver_path=None, resource_filter=None, performance_log=False):
+    """
+    Creates and returns a configured Chrome WebDriver instance.
+    :param headless: If True, runs browser in headless mode (no GUI).
+    :param driver_path: Path to chromedriver. Resolved once via resolve_driver_path() if omitted.
+    :param resource_filter: ResourceFilter; blocks images, fonts, trackers etc. and loads pages eagerly.
+    :param performance_log: Enable Chrome's performance log (network events, read by coveo_search.py).
+    """
+    opts = Options()
+    if headless:
+        opts.add_argument("--headless=new")  # Use latest headless mode
+    opts.add_argument("--disable-gpu")
+    opts.add_argument("--no-sandbox")
+    opts.add_argument("--disable-dev-shm-usage")
+
+    # Set browser window size
+    opts.add_argument("window-size=1920,1080")
+
+    if resource_filter:
+        resource_filter.apply_to_options(opts)
+    if performance_log:
+        opts.set_capability("goog:loggingPrefs", {"performance": "ALL"})
+
+    driver = webdriver.Chrome(
+        service=Service(driver_path or resolve_driver_path()),
+        options=opts
+    )
+    if resource_filter:
+        resource_filter.apply_to_driver(driver)
+    return driver
+
+
+class PooledDriver:
+    """
+    A single browser session owned by the pool.
+
+    Attributes:
+        driver: Selenium WebDriver instance.
+        wait: WebDriverWait bound to the driver.
+        pages_served (int): Number of parts handled since this browser was launched.
+        slot (int): Pool slot number, handy for log lines.
+    """
+
+    shared = False  # The browser belongs to this session alone (see tab_session.SessionTab)
+
+    def __init__(self, driver, wait, slot):
+        self.driver = driver
+        self.wait = wait
+        self.slot = slot
+        self.pages_served = 0
+        self.rss_mb = 0.0  # Latest memory sample of the browser's process tree (ResourceGovernor)
+
+    @contextmanager
+    def active(self):
+        """
+        Nothing to lock or switch: same interface as SessionTab.active().
+        """
+        yield self
+
+
+class DriverPool:
+    def __init__(self, size=1, headless=True, max_pages_per_driver=200, wait_timeout=10, metrics=None,
+                 resource_filter=None, performance_log=False, governor=None):
+        """
+        Initialize the driver pool.
+
+        Args:
+            size (int): Number of browser sessions to keep alive.
+            headless (bool): Launch the browsers in headless mode.
+            max_pages_per_driver (int): Recycle a browser after it served this many parts.
+                                        0 disables page-count recycling.
+            wait_timeout (int): Timeout (seconds) for the WebDriverWait attached to each session.
+            metrics (RunMetrics, optional): Records browser launch times ("driver_create").
+            resource_filter (ResourceFilter, optional): Applied to every browser the pool launches.
+            performance_log (bool): Launch browsers with the performance (network) log enabled.
+            governor (ResourceGovernor, optional): Recycle a browser whose latest memory sample
+                                                   (session.rss_mb) is over its limit.
+        """
+        self.size = size
+        self.headless = headless
+        self.max_pages_per_driver = max_pages_per_driver
+        self.wait_timeout = wait_timeout
+        self.metrics = metrics
+        self.resource_filter = resource_filter
+        self.performance_log = performance_log
+        self.governor = governor
+
+        # Every slot starts empty (None) and gets a browser lazily on first acquire
+        self._idle = queue.Queue()
+        for slot in range(size):
+            self._idle.put((slot, None))
+
+        self._closed = False
+        self.launched = 0
+        self.recycled = 0
+
+    # ------------------------------
+    # Session lifecycle
+    # ------------------------------
+    def _launch(self, slot):
+        with timed(self.metrics, "driver_create"):
+            driver = create_driver(headless=self.headless, resource_filter=self.resource_filter,
+                                   performance_log=self.performance_log)
+        self.launched += 1
+        print(f"[INFO] Pool slot {slot}: browser launched.")
+        return PooledDriver(driver, WebDriverWait(driver, self.wait_timeout), slot)
+
+    def _quit(self, session):
+        try:
+            session.driver.quit()
+        except Exception as e:
+            print(f"[WARN] Pool slot {session.slot}: error while closing browser: {e}")
+
+    def _is_healthy(self, session):
+        """
+        Cheap liveness probe: asking for the current URL fails fast if the
+        browser or chromedriver process has died.
+        """
+        try:
+            session.driver.current_url
+            return True
+        except WebDriverException:
+            return False
+
+    def acquire(self, timeout=None):
+        """
+        Takes a session out of the pool, launching or relaunching a browser if needed.
+
+        Args:
+            timeout (float, optional): Seconds to wait for a free slot. None waits forever.
+
+        Returns:
+            PooledDriver: A live browser session.
+        """
+        if self._closed:
+            raise RuntimeError("DriverPool is closed")
+
+        slot, session = self._idle.get(timeout=timeout)
+        try:
+            if session is not None and not self._is_healthy(session):
+                print(f"[WARN] Pool slot {slot}: browser unresponsive, relaunching.")
+                self._quit(session)
+                self.recycled += 1
+                session = None
+            if session is None:
+                session = self._launch(slot)
+        except Exception:
+            # Give the empty slot back so the pool does not shrink on a failed launch
+            self._idle.put((slot, None))
+            raise
+        return session
+
+    def release(self, session, healthy=True):
+        """
+        Returns a session to the pool.
+
+        Args:
+            session (PooledDriver): The session previously returned by acquire().
+            healthy (bool): False if the caller hit a crash; the browser is then recycled.
+        """
+        session.pages_served += 1
+
+        worn_out = self.max_pages_per_driver and session.pages_served >= self.max_pages_per_driver
+        too_big = self.governor.browser_over_limit(session.rss_mb) if self.governor and healthy else None
+        if self._closed or not healthy or worn_out or too_big:
+            if self._closed:
+                reason = "pool closed"
+            elif not healthy:
+                reason = "crashed"
+            else:
+                reason = too_big or f"served {session.pages_served} pages"
+            print(f"[INFO] Pool slot {session.slot}: recycling browser ({reason}).")
+            self._quit(session)
+            if not self._closed:
+                self.recycled += 1
+            self._idle.put((session.slot, None))
+        else:
+            self._idle.put((session.slot, session))
+
+    @contextmanager
+    def session(self, timeout=None):
+        """
+        Context manager wrapper around acquire()/release().
+        The browser is recycled only if the session was lost: an InvalidSessionIdException, or
+        another WebDriverException after which the liveness probe fails. Page-level errors
+        (timeouts, stale or missing elements) just propagate.
+        """
+        session = self.acquire(timeout=timeout)
+        healthy = True
+        try:
+            yield session
+        except PAGE_ERRORS:
+            raise
+        except InvalidSessionIdException:
+            healthy = False
+            raise
+        except WebDriverException:
+            healthy = self._is_healthy(session)
+            raise
+        finally:
+            self.release(session, healthy=healthy)
+
+    def close(self):
+        """
+        Quits every idle browser. Call once at the end of the run.
+        """
+        self._closed = True
+        while True:
+            try:
+                slot, session = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            if session is not None:
+                self._quit(session)
+        print(f"[INFO] Driver pool closed ({self.launched} launched, {self.recycled} recycled).")
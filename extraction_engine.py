@@ -0,0 +1,259 @@
+# extraction_engine.py
+# --------------------
+# Single-parse HTML extraction. The BeautifulSoup helpers (detect_page.py,
+# scrape_environmental_info.py, datasheet_scraper.py) each parse the page on
+# their own, so a product page used to be parsed three or four times.
+# This module parses a page exactly once with lxml and evaluates a table of
+# precompiled XPath selectors for page-type detection, the environmental
+# table, the series name and the datasheet link in one go.
+#
+# The output matches what the BeautifulSoup helpers return, so callers can
+# switch over without changing the CSV contents.
+
+import hashlib
+from dataclasses import dataclass, field, fields
+from typing import List, Optional
+
+from lxml import etree, html as lxml_html
+
+# Constants representing different detected page states (re-exported by detect_page.py)
+NO_RESULTS_AVAILABLE = "NO_RESULTS_AVAILABLE"
+LIST_OF_ITEMS = "LIST_OF_ITEMS"
+UNKNOWN = "UNKNOWN"
+
+
+def _has_class(name):
+    # XPath 1.0 equivalent of the CSS ".name" class selector
+    return f"contains(concat(' ', normalize-space(@class), ' '), ' {name} ')"
+
+
+# ------------------------------
+# Precompiled selectors
+# ------------------------------
+SELECTORS = {
+    # Page-type signals (same rules as NavigationModule.detect_page_type)
+    "no_results": etree.XPath(f"//div[{_has_class('no-results-message')}]"),
+    "list_info": etree.XPath(f"//div[@id='MainSearchTable_info' and {_has_class('dataTables_info')}]"),
+    "part_number": etree.XPath(
+        f"//td[@data-value='Part Number' and {_has_class('sticky-col')}]//span[{_has_class('part-number')}]"),
+    "first_result": etree.XPath("//a[@id='coveo_index0']/@href", smart_strings=False),
+    "results": etree.XPath("//a[starts-with(@id, 'coveo_index')]"),
+
+    # Environmental table rows (every row, not just the first)
+    "env_rows": etree.XPath(f"//table[{_has_class('envirnonmental-table')}]//tbody/tr"),
+
+    # Page-level extras
+    "series": etree.XPath(f"//span[{_has_class('series-short-desc')}]"),
+    "datasheet": etree.XPath(f"//a[{_has_class('side-link')} and {_has_class('datasheet-link')}]/@href",
+                             smart_strings=False),
+    "series_link": etree.XPath(f"//a[{_has_class('series-link')}]/@href", smart_strings=False),
+}
+# Attribute selectors return plain strings: lxml's default "smart" strings keep a reference to
+# their element, which would keep the whole parsed page alive as long as the PageExtraction
+
+# Cell-level selectors, evaluated relative to a <td>
+_CELL_DESC = etree.XPath(f".//span[{_has_class('desc')}]")
+_CELL_LINK = etree.XPath(f".//a[{_has_class('link')}]")
+
+# data-value of a <td> → (result field, how to read it)
+CELL_FIELDS = {
+    "Part Number": ("part_number", "text"),
+    "Part Description": ("part_description", "text"),
+    "RoHS": ("rohs_date", "desc"),
+    "RoHS (2015/863/EU) Certificate": ("rohs_certificate_link", "link"),
+    "REACH (SVHC's) Declaration": ("reach_declaration_link", "link"),
+    "REACH (SVHC's)": ("reach_status", "text"),
+    "IPC-Material Declaration": ("ipc_material_declaration_link", "link"),
+    "Pb-Free": ("pb_free", "text"),
+    "Halogen Free": ("halogen_free", "text"),
+}
+
+
+def _text(element):
+    # Same as BeautifulSoup's get_text(strip=True): strip every text fragment and glue them together
+    return "".join(fragment.strip() for fragment in element.itertext())
+
+
+# ------------------------------
+# Typed results
+# ------------------------------
+@dataclass
+class EnvironmentalRow:
+    """
+    One row of the environmental table. Fields missing from the row stay None.
+    """
+    part_number: Optional[str] = None
+    part_description: Optional[str] = None
+    pb_free: Optional[str] = None
+    rohs_date: Optional[str] = None
+    rohs_certificate_link: Optional[str] = None
+    reach_status: Optional[str] = None
+    reach_declaration_link: Optional[str] = None
+    ipc_material_declaration_link: Optional[str] = None
+    halogen_free: Optional[str] = None
+
+
+@dataclass
+class SearchResult:
+    """
+    One row of a search-results list: the part number shown and where it links to.
+    """
+    part_number: Optional[str] = None
+    href: Optional[str] = None
+
+
+@dataclass
+class PageExtraction:
+    """
+    Everything the scraper needs from one page.
+
+    Attributes:
+        page_type (str): NO_RESULTS_AVAILABLE, LIST_OF_ITEMS, UNKNOWN or the detected part number
+                         (same values as NavigationModule.detect_page_type).
+        rows (list[EnvironmentalRow]): All environmental table rows, in page order.
+        series (str): Series name from span.series-short-desc, if present.
+        datasheet_link (str): Href of a.side-link.datasheet-link, if present.
+        first_result_href (str): Href of the first search result on a list page, if present.
+        series_link (str): Href of the product page's link to its series page, if present.
+        results (list[SearchResult]): Every row of a search-results list, in page order.
+        row_hashes (list[str]): Content hash of every environmental row's HTML, parallel to rows
+                                (empty when the page was extracted in the browser).
+    """
+    page_type: str = UNKNOWN
+    rows: List[EnvironmentalRow] = field(default_factory=list)
+    series: Optional[str] = None
+    datasheet_link: Optional[str] = None
+    first_result_href: Optional[str] = None
+    series_link: Optional[str] = None
+    results: List[SearchResult] = field(default_factory=list)
+    row_hashes: List[str] = field(default_factory=list)
+
+    def row_index_for(self, part_number, matcher=None):
+        """
+        Returns the index of the row for the given part number (case-insensitive), or None.
+        With a PartMatcher, the best fuzzy match (punctuation, packaging suffix) is taken
+        when no row matches exactly.
+        """
+        wanted = part_number.strip().lower()
+        for index, row in enumerate(self.rows):
+            if (row.part_number or "").lower() == wanted:
+                return index
+        if matcher is not None and self.rows:
+            return matcher.row_index(part_number, self)
+        return None
+
+    def result_href_for(self, part_number, matcher=None):
+        """
+        Returns the href of the search result to follow: the first one, or with a
+        PartMatcher the one whose part number matches best.
+        """
+        if matcher is not None and self.results:
+            index = matcher.result_index(part_number, self)
+            if index is not None and self.results[index].href:
+                return self.results[index].href
+        return self.first_result_href
+
+    def row_hash(self, row_index=0):
+        """
+        Returns the HTML content hash of the given row, or None if it is not known.
+        """
+        return self.row_hashes[row_index] if row_index < len(self.row_hashes) else None
+
+    def to_dict(self, row_index=0):
+        """
+        Returns the same dict shape as scrape_environmental_table(row_html, full_html)
+        for the given row, or None if the page has no such row.
+        """
+        if row_index >= len(self.rows):
+            return None
+        result = {f.name: getattr(self.rows[row_index], f.name) for f in fields(EnvironmentalRow)}
+        if self.series is not None:
+            result["series"] = self.series
+        if self.datasheet_link is not None:
+            result["datasheet_link"] = self.datasheet_link
+        return result
+
+
+# ------------------------------
+# Extraction
+# ------------------------------
+def _parse_row(tr):
+    row = EnvironmentalRow()
+    for td in tr.iter("td"):
+        mapping = CELL_FIELDS.get((td.get("data-value") or "").strip())
+        if mapping is None:
+            continue
+        name, kind = mapping
+        if kind == "text":
+            value = _text(td)
+        elif kind == "desc":
+            spans = _CELL_DESC(td)
+            value = _text(spans[0]) if spans else None
+        else:
+            links = _CELL_LINK(td)
+            value = links[0].get("href") if links else None
+        setattr(row, name, value)
+    return row
+
+
+def _row_html_hash(tr):
+    # Whitespace-insensitive, so re-indented markup does not count as a change
+    markup = " ".join(etree.tostring(tr, method="html", encoding="unicode").split())
+    return hashlib.sha256(markup.encode("utf-8")).hexdigest()
+
+
+def _detect_page_type(root):
+    if SELECTORS["no_results"](root):
+        return NO_RESULTS_AVAILABLE
+    if SELECTORS["list_info"](root):
+        return LIST_OF_ITEMS
+    for span in SELECTORS["part_number"](root):
+        text = "".join(span.itertext()).strip()
+        if text:
+            return text
+        break  # Only the first part-number cell counts, like the BeautifulSoup version
+    return UNKNOWN
+
+
+def extract_page(html: str) -> PageExtraction:
+    """
+    Parses the page once and pulls out every field the scraper uses.
+
+    Args:
+        html (str): Full page HTML (driver.page_source or an HTTP response body).
+
+    Returns:
+        PageExtraction: Typed extraction result.
+    """
+    if not html or not html.strip():
+        return PageExtraction()
+
+    root = lxml_html.document_fromstring(html)
+    result = PageExtraction(page_type=_detect_page_type(root))
+
+    env_rows = SELECTORS["env_rows"](root)
+    result.rows = [_parse_row(tr) for tr in env_rows]
+    result.row_hashes = [_row_html_hash(tr) for tr in env_rows]
+
+    series_spans = SELECTORS["series"](root)
+    if series_spans:
+        text = _text(series_spans[0])
+        # Same rule as scrape_environmental_table: only keep text after "Series:"
+        if "Series:" in text:
+            result.series = text.split("Series:")[-1].strip()
+
+    datasheet = SELECTORS["datasheet"](root)
+    if datasheet and datasheet[0]:
+        result.datasheet_link = datasheet[0]
+
+    series_link = SELECTORS["series_link"](root)
+    if series_link and series_link[0]:
+        result.series_link = series_link[0]
+
+    result.results = [SearchResult(_text(a), a.get("href")) for a in SELECTORS["results"](root)]
+
+    first_result = SELECTORS["first_result"](root)
+    if first_result and first_result[0]:
+        result.first_result_href = first_result[0]
+
+    return result
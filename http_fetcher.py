@@ -0,0 +1,215 @@
+# http_fetcher.py
+# ---------------
+# This module is the HTTP-only fast path. Every field we scrape lives in the
+# static markup of the product page, so for most parts a plain GET over a
+# keep-alive connection is enough and no browser has to render anything.
+# When the HTML we get back cannot be understood without JavaScript, the
+# caller is told to fall back to the Selenium flow in main.py.
+
+import threading
+import time
+from urllib.parse import urljoin, quote
+
+import requests
+from requests.adapters import HTTPAdapter
+from extraction_engine import extract_page, NO_RESULTS_AVAILABLE, LIST_OF_ITEMS, UNKNOWN
+from outcomes import OK, NAVIGATION_FAILED, MISMATCH
+from run_metrics import timed
+
+# Outcomes returned by HttpFetcher.scrape_part()
+HTTP_OK = OK                            # Environmental data scraped without a browser
+HTTP_NAVIGATION_FAILED = NAVIGATION_FAILED  # Site says there is no such part
+HTTP_MISMATCH = MISMATCH                # Landed on a different part's product page
+NEEDS_BROWSER = "NEEDS_BROWSER"         # Page needs JavaScript (or the GET failed) → use Selenium
+
+# Search URL relative to the site root ({query} is the URL-quoted part number)
+DEFAULT_SEARCH_PATH = "search?q={query}"
+
+DEFAULT_HEADERS = {
+    "User-Agent": ("Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
+                   "(KHTML, like Gecko) Chrome/124.0 Safari/537.36"),
+    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
+    "Accept-Language": "en-US,en;q=0.9",
+}
+
+
+def build_search_url(base_url, part_number, search_path=DEFAULT_SEARCH_PATH):
+    """
+    Returns the absolute search-results URL for a part number.
+    """
+    return urljoin(base_url, search_path.format(query=quote(part_number)))
+
+
+class HttpFetcher:
+    def __init__(self, base_url="https://www.littelfuse.com/", timeout=15, pool_size=10,
+                 search_path=DEFAULT_SEARCH_PATH, metrics=None, rate_limiter=None, matcher=None):
+        """
+        Initialize the HTTP fetcher.
+
+        Args:
+            base_url (str): Site root; point it at mock_site.py to run offline.
+            timeout (float): Per-request timeout in seconds.
+            pool_size (int): Keep-alive connections kept open per host.
+            search_path (str): Search URL relative to base_url, with a {query} placeholder.
+            metrics (RunMetrics, optional): Records GET ("http_get") and parse times.
+            rate_limiter (RateLimiter, optional): Shared politeness limit, awaited before every GET and told
+                                                  its latency and status, so an adaptive limiter can
+                                                  follow the site's health.
+            matcher (PartMatcher, optional): Fuzzy part-number matching for table rows and search results.
+        """
+        self.base_url = base_url if base_url.endswith("/") else base_url + "/"
+        self.timeout = timeout
+        self.pool_size = pool_size
+        self.search_path = search_path
+        self.metrics = metrics
+        self.rate_limiter = rate_limiter
+        self.matcher = matcher
+
+        # requests.Session is not guaranteed thread-safe, so every worker thread
+        # gets its own pooled session (connections are still reused per thread)
+        self._local = threading.local()
+
+    # ------------------------------
+    # Pooled HTTP session
+    # ------------------------------
+    @property
+    def session(self):
+        session = getattr(self._local, "session", None)
+        if session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=self.pool_size, pool_maxsize=self.pool_size)
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            session.headers.update(DEFAULT_HEADERS)
+            self._local.session = session
+        return session
+
+    def search_url(self, part_number):
+        return build_search_url(self.base_url, part_number, self.search_path)
+
+    def get(self, url):
+        """
+        GETs a page (following redirects), after waiting for the rate limiter.
+
+        Returns:
+            tuple or None: (final_url, html), or None on a network error or non-200 status.
+        """
+        if self.rate_limiter:
+            self.rate_limiter.wait()
+        started = time.monotonic()
+        try:
+            with timed(self.metrics, "http_get"):
+                response = self.session.get(url, timeout=self.timeout)
+        except requests.RequestException as e:
+            print(f"[WARN] HTTP GET failed for {url}: {e}")
+            if self.rate_limiter:
+                self.rate_limiter.observe(time.monotonic() - started, error=True)
+            return None
+        if self.rate_limiter:
+            self.rate_limiter.observe(time.monotonic() - started, error=response.status_code >= 500,
+                                      throttled=response.status_code in (429, 503))
+        if response.status_code != 200:
+            print(f"[WARN] HTTP GET {url} returned status {response.status_code}")
+            return None
+        return response.url, response.text
+
+    def parse(self, html):
+        with timed(self.metrics, "parse"):
+            return extract_page(html)
+
+    def close(self):
+        session = getattr(self._local, "session", None)
+        if session is not None:
+            session.close()
+            self._local.session = None
+
+    # ------------------------------
+    # Scrape one part over HTTP
+    # ------------------------------
+    def scrape_html(self, part_number, html, check_part=True):
+        """
+        Scrapes an already-fetched product page.
+
+        Args:
+            part_number (str): Part number we searched for.
+            html (str): Page HTML.
+            check_part (bool): Reject product pages for a different part (same rule as main.py).
+
+        Returns:
+            tuple: (status, data) – data is the scrape_environmental_table()-shaped dict when status is HTTP_OK.
+        """
+        return self.scrape_extraction(part_number, self.parse(html), check_part)
+
+    def scrape_extraction(self, part_number, extraction, check_part=True):
+        """
+        Same as scrape_html() for a page that has already been parsed.
+        """
+        page_type = extraction.page_type
+
+        if page_type == NO_RESULTS_AVAILABLE:
+            return HTTP_NAVIGATION_FAILED, None
+        if page_type in (LIST_OF_ITEMS, UNKNOWN):
+            return NEEDS_BROWSER, None
+
+        # Pages with several environmental rows (e.g. series pages) are fine as long as our part is on them
+        row_index = extraction.row_index_for(part_number, self.matcher)
+        if check_part and page_type.lower() != part_number.lower() and row_index is None:
+            print(f"[SKIP] Detected part '{page_type}' does not match expected '{part_number}'. Skipping...")
+            return HTTP_MISMATCH, None
+
+        data = extraction.to_dict(row_index or 0)
+        if data is None:
+            # The table is filled in client-side for this page
+            return NEEDS_BROWSER, None
+        return HTTP_OK, data
+
+    def scrape_part(self, part_number, url=None, harvest=None):
+        """
+        Tries to scrape a part with plain GETs only.
+
+        Args:
+            part_number (str): Part number to look up.
+            url (str, optional): Known product URL; defaults to the search URL.
+            harvest (SeriesHarvest, optional): Collects rows of other pending parts from the
+                                               page and its series page (batching mode).
+
+        Returns:
+            tuple: (status, data, final_url, extraction) where status is one of HTTP_OK, HTTP_NAVIGATION_FAILED,
+                   HTTP_MISMATCH or NEEDS_BROWSER, final_url is the page the data came from and
+                   extraction is that page parsed (None when the browser is needed).
+        """
+        fetched = self.get(url or self.search_url(part_number))
+        if fetched is None and url:
+            # A known product URL went stale → look the part up again
+            fetched = self.get(self.search_url(part_number))
+        if fetched is None:
+            return NEEDS_BROWSER, None, None, None
+        final_url, html = fetched
+
+        # A list page is only usable without a browser if the result is a real link.
+        # Like click_first_result() in the browser flow, the first result is taken as-is
+        # unless the matcher finds a better one.
+        check_part = True
+        extraction = self.parse(html)
+        if extraction.page_type == LIST_OF_ITEMS:
+            result_href = extraction.result_href_for(part_number, self.matcher)
+            if self.matcher:
+                self.matcher.note_results(extraction, final_url)
+            if not result_href:
+                return NEEDS_BROWSER, None, None, None
+            fetched = self.get(urljoin(final_url, result_href))
+            if fetched is None:
+                return NEEDS_BROWSER, None, None, None
+            final_url, html = fetched
+            extraction = self.parse(html)
+            check_part = False
+
+        if harvest:
+            harvest.collect(extraction, final_url)
+            series_url = harvest.series_page_to_load(extraction, final_url)
+            series_page = self.get(series_url) if series_url else None
+            if series_page:
+                harvest.collect(self.parse(series_page[1]), series_page[0])
+
+        status, data = self.scrape_extraction(part_number, extraction, check_part=check_part)
+        return status, data, final_url, extraction
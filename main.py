@@ -1,120 +1,384 @@
-from selenium import webdriver
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.support.ui import WebDriverWait
-from webdriver_manager.chrome import ChromeDriverManager
-from selenium.webdriver.common.by import By
+from selenium.common.exceptions import WebDriverException, TimeoutException
+import requests
 
 # Custom helper modules
 from list_page_handler import click_first_result           # Handles clicking the first result in a list page
-from scrape_environmental_info import scrape_environmental_table  # Parses environmental info table HTML
 from detect_page import NavigationModule                   # Detects what type of page we've landed on
-from search_module import type_into_search                 # Handles typing search terms into search bar
-from datasheet_scraper import extract_datasheet_link       # Extracts datasheet link from page
+from search_module import search_from_homepage             # Loads the homepage and types the search term
+from dom_extraction import extract_current_page           # One parse of the page (lxml or in-page script)
+from outcomes import (OK, NAVIGATION_FAILED, MISMATCH, NO_TABLE, TIMEOUT, ERROR,  # Per-part outcome codes
+                      PERMANENT_OUTCOMES, TRANSIENT_OUTCOMES)
+from driver_pool import DriverPool                         # Long-lived, recycled browser sessions
+from tab_session import TabPool                            # Warm browsers serving several tabs each
+from resource_governor import ResourceGovernor, driver_pid  # Memory sampling, recycling thresholds
+from scheduler import (RateLimiter, AdaptiveRateLimiter, RetryQueue,  # Shared politeness limit + retries
+                       run_workers, run_async_workers, TRANSIENT, PERMANENT)  # Worker threads / coroutines
+from http_fetcher import HttpFetcher, NEEDS_BROWSER         # Plain-HTTP fast path (no browser)
+from progress_journal import ProgressJournal               # Append-only resume journal
+from page_readiness import ReadinessWaiter, StageTimeouts, WaitRecorder  # Event-driven waits instead of sleeps
+from direct_navigation import DirectNavigator, LearnedUrls  # Direct product/search URL loads
+from resolution_cache import ResolutionCache               # Persistent part → product URL cache
+from series_batcher import SeriesHarvest                   # Fill many parts from one series page
+from part_stream import iter_part_numbers, parse_shard, parse_line_range  # Streaming, sharded input
+from work_queue import ShardQueue, ShardWorker, default_worker_id, print_status  # Distributed runs
+from output_writer import BatchedOutputWriter, FailureLog  # Batched, flushed CSV/JSONL/Parquet output
+from cdp_engine import CdpEngine, CdpError                 # asyncio engine over the DevTools protocol
+from run_metrics import RunMetrics, timed, page_kind       # Per-stage latency percentiles + outcome counters
+from coveo_search import CoveoClient, CoveoCapture, CoveoRequestTemplate, DEFAULT_PART_FIELD  # Search API
+from part_matching import PartIndex, PartMatcher            # Fuzzy part-number matching index
+from delta_store import DeltaStore, DiffReport              # Incremental re-scrape (delta mode)
+from document_fetcher import DocumentStore, DocumentFetcher  # Concurrent compliance-document downloads
+from resource_blocking import (ResourceFilter, DEFAULT_BLOCKED_PATTERNS, PageWeightSampler,  # Skip images/fonts/trackers
+                               measure_page, record_page_weight)
 
+import asyncio
 import time
 from pprint import pprint
-import csv
 import os
+import argparse
 from datetime import datetime
+from contextlib import closing
+from urllib.parse import urljoin
+
+# Output CSV fields
+FIELDNAMES = [
+    'part_number', 'part_description', 'pb_free', 'rohs_date',
+    'rohs_certificate_link', 'reach_status', 'reach_declaration_link',
+    'ipc_material_declaration_link', 'halogen_free',
+    'series', 'datasheet_link'  # NEW field
+]
+
+# Exceptions worth another attempt: timeouts, stale elements, browser/driver crashes, network errors
+TRANSIENT_ERRORS = (WebDriverException, requests.RequestException, CdpError, asyncio.TimeoutError,
+                    TimeoutError, ConnectionError)
+
+# Page-load timeouts: reported as the TIMEOUT outcome (retried, never cached or journaled as an answer)
+TIMEOUT_ERRORS = (TimeoutException, asyncio.TimeoutError, TimeoutError)
 
 # ------------------------------
-# Create Chrome WebDriver
+# Scrape a single part
 # ------------------------------
-def create_driver(headless=True):
+def scrape_part(driver, wait, part_or_keyword, url, rate_limiter=None, waiter=None, navigator=None, cached=None,
+                harvest=None, in_page=False, coveo_capture=None, matcher=None, weight_sampler=None):
     """
-    Creates and returns a configured Chrome WebDriver instance.
-    :param headless: If True, runs browser in headless mode (no GUI).
+    Runs the full search → detect → scrape sequence for one part number.
+
+    Args:
+        driver: Selenium WebDriver instance (borrowed from the pool).
+        wait: WebDriverWait bound to the driver.
+        part_or_keyword (str): Part number to search for.
+        url (str): Site homepage.
+        rate_limiter (RateLimiter, optional): Shared politeness limit, awaited before the page loads.
+        waiter (ReadinessWaiter, optional): Waits for page signals; a default one is created if omitted.
+        navigator (DirectNavigator, optional): Load product/search URLs directly instead of typing
+                                               into the homepage search box.
+        cached (dict, optional): Resolution cache entry for the part, if the caller already looked it up.
+        harvest (SeriesHarvest, optional): Collects rows of other pending parts from every loaded page
+                                           and from the part's series page (batching mode).
+        in_page (bool): Extract pages with one in-page script instead of transferring page_source.
+        coveo_capture (CoveoCapture, optional): Reads the search API responses from the browser's
+                                                performance log; on a list page the exact part's
+                                                product URL is loaded instead of clicking the first result.
+        matcher (PartMatcher, optional): Fuzzy part-number matching: picks the best-matching search
+                                         result and table row, and accepts pages whose part number
+                                         differs only in punctuation or packaging suffix.
+        weight_sampler (PageWeightSampler, optional): Measures the weight of the scraped page when due.
+
+    Returns:
+        tuple: (outcome, data, extraction) – outcome is OK, NAVIGATION_FAILED, MISMATCH or NO_TABLE;
+               data holds the scraped fields, or None if nothing usable was found;
+               extraction is the parsed page the data came from (or None).
     """
-    opts = Options()
-    if headless:
-        opts.add_argument("--headless=new")  # Use latest headless mode
-    opts.add_argument("--disable-gpu")
-    opts.add_argument("--no-sandbox")
-    opts.add_argument("--disable-dev-shm-usage")
-
-    # Set browser window size
-    opts.add_argument("window-size=1920,1080")
-
-    # Use ChromeDriverManager to automatically handle driver installation
-    return webdriver.Chrome(
-        service=Service(ChromeDriverManager().install()),
-        options=opts
-    )
+    waiter = waiter or ReadinessWaiter(driver)
+    metrics = waiter.metrics
+
+    if navigator:
+        # Direct URL navigation (falls back to the typed search by itself; waits its turn before every load)
+        nav_module, result_type = navigator.navigate(driver, wait, part_or_keyword, waiter, cached,
+                                                     rate_limiter=rate_limiter)
+    else:
+        # A tab of a shared browser lets the other tabs work while it waits its turn
+        waiter.wait_turn(rate_limiter)
+
+        # Load homepage and type the part number into the search box
+        search_from_homepage(driver, url, part_or_keyword, waiter)
+
+        # Detect where we landed after search
+        nav_module = NavigationModule(driver, wait, metrics, in_page)
+        result_type = nav_module.navigate()
+
+    if metrics:
+        metrics.count("page", page_kind(result_type))
+
+    data = None  # Will hold scraped data
+    outcome = NO_TABLE
+    extraction = nav_module.extraction  # Parsed page we end up scraping
+
+    # ------------------------------
+    # If we landed on a list page
+    # ------------------------------
+    if result_type == "LIST_OF_ITEMS":
+        api_hit = coveo_capture.best_match(coveo_capture.drain(driver), part_or_keyword) if coveo_capture else None
+        result_href = extraction.result_href_for(part_or_keyword, matcher) if extraction else None
+        if matcher and extraction:
+            matcher.note_results(extraction, driver.current_url)
+        if api_hit:
+            print(f"[INFO] Search API lists '{part_or_keyword}' at {api_hit.product_url}")
+            with timed(metrics, "driver_get"):
+                driver.get(api_hit.product_url)
+        elif result_href and result_href != extraction.first_result_href:
+            # The matcher found a better result than the first one
+            with timed(metrics, "driver_get"):
+                driver.get(urljoin(driver.current_url, result_href))
+        else:
+            with timed(metrics, "click_first_result"):
+                if not click_first_result(driver, wait):
+                    raise TimeoutException("First search result did not become clickable")
+        waiter.wait_for("product_page", required=True)
+        # Parse the product page once and take our part's environmental row (or the first one)
+        extraction = extract_current_page(driver, metrics, in_page)
+        data = extraction.to_dict(extraction.row_index_for(part_or_keyword, matcher) or 0)
+        if data:
+            pprint(data)
+            outcome = OK
+        else:
+            print("[ERROR] Couldn't locate environmental table row.")
+
+    # ------------------------------
+    # If navigation failed
+    # ------------------------------
+    elif result_type == "NAVIGATION_FAILED":
+        print("[RESULT] No part found or unknown redirect.")
+        outcome = NAVIGATION_FAILED
+
+    # ------------------------------
+    # If we landed directly on an item page
+    # ------------------------------
+    else:
+        print(f"[RESULT] Landed on direct item page. Detected part: {result_type}")
+        # Multi-row pages (e.g. series pages) may list our part further down
+        row_index = extraction.row_index_for(part_or_keyword, matcher)
+        if result_type.lower() != part_or_keyword.lower() and row_index is None:
+            # Skip if detected part number doesn't match expected
+            print(f"[SKIP] Detected part '{result_type}' does not match expected '{part_or_keyword}'. Skipping...")
+            data = None
+            outcome = MISMATCH
+        else:
+            # Scrape environmental table from the page navigate() already parsed
+            data = extraction.to_dict(row_index or 0)
+            if data:
+                pprint(data)
+                outcome = OK
+            else:
+                print("[ERROR] Couldn't locate environmental table row.")
+
+    remember_outcome(navigator, part_or_keyword, outcome, data, driver.current_url)
+    if coveo_capture:
+        coveo_capture.drain(driver)  # Keep the performance log from piling up
+    if metrics and weight_sampler and weight_sampler.due():
+        record_page_weight(metrics, measure_page(driver))  # Bytes/requests of the page we scraped
+
+    # ------------------------------
+    # Batching mode: keep rows of other pending parts from this page and its series page
+    # ------------------------------
+    if harvest and extraction:
+        page_url = driver.current_url
+        harvest.collect(extraction, page_url)
+        series_url = harvest.series_page_to_load(extraction, page_url)
+        if series_url:
+            waiter.wait_turn(rate_limiter)
+            with timed(metrics, "driver_get"):
+                driver.get(series_url)
+            waiter.wait_for("product_page")
+            added = harvest.collect(extract_current_page(driver, metrics, in_page), series_url)
+            print(f"[INFO] Series page {series_url}: harvested {added} more input parts")
+
+    return outcome, data, extraction
 
 # ------------------------------
-# Scrape one table row
+# Feed the resolution cache
 # ------------------------------
-def scrape(driver):
+def remember_outcome(navigator, part_or_keyword, outcome, data, page_url):
     """
-    Scrapes the first environmental table row on the current page.
+    Remembers where a part lives (or that it can't be found) so the next lookup
+    is a single page load, or no page load at all.
     """
-    row_element = driver.find_element(By.CSS_SELECTOR, 'table tbody tr')  # Adjust selector as needed
-    html = row_element.get_attribute('outerHTML')  # Get row HTML
-    data = scrape_environmental_table(html)        # Parse environmental table row
-    for key, value in data.items():
-        print(f"{key}: {value}")
+    if not navigator:
+        return
+    if outcome == OK:
+        detected = (data.get("part_number") or "")
+        # Only product pages of the exact part are worth going back to
+        if detected.lower() == part_or_keyword.lower():
+            navigator.remember(part_or_keyword, OK, product_url=page_url, page_type=detected)
+    elif outcome in (NAVIGATION_FAILED, MISMATCH):
+        navigator.remember(part_or_keyword, outcome)
 
 # ------------------------------
-# Read part numbers from CSV
+# Prepare row for output CSV
 # ------------------------------
-def read_part_numbers(csv_file):
+def build_output_row(part_or_keyword, data):
     """
-    Reads part numbers from a CSV file.
-    Returns:
-      - list of part numbers
-      - header row
-      - all rows from the file
+    Maps scraped data onto FIELDNAMES, defaulting every missing field to None.
     """
-    part_numbers = []
-    rows = []
-    with open(csv_file, newline='', encoding='utf-8') as f:
-        reader = csv.reader(f)
-        header = next(reader, None)  # Read header
-        for row in reader:
-            rows.append(row)
-            if row and row[0].strip():
-                part_numbers.append(row[0].strip())  # Use first column as part number
-    return part_numbers, header, rows
+    row_to_write = {key: None for key in FIELDNAMES}  # Default None for all fields
+    row_to_write['part_number'] = part_or_keyword
+
+    if data:
+        for key in FIELDNAMES:
+            row_to_write[key] = data.get(key, None)
+    return row_to_write
 
 # ------------------------------
-# Remove processed part from CSV
+# Command line options
 # ------------------------------
-def write_remaining_parts(csv_file, header, rows, processed_part):
-    """
-    Rewrites the CSV without the processed_part row.
-    Useful if we want to remove parts we've already processed.
-    """
-    with open(csv_file, 'w', newline='', encoding='utf-8') as f:
-        writer = csv.writer(f)
-        if header:
-            writer.writerow(header)
-        for row in rows:
-            if row and row[0].strip() != processed_part:
-                writer.writerow(row)
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Scrape Littelfuse environmental data for part numbers.")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="Number of parallel workers (one browser each). Default: 1")
+    parser.add_argument("--min-interval", type=float, default=5.0,
+                        help="Minimum seconds between page loads across all workers. Default: 5")
+    parser.add_argument("--adaptive-rate", action="store_true",
+                        help="Slow down while pages are slow or failing (never faster than --min-interval)")
+    parser.add_argument("--max-interval", type=float, default=60.0,
+                        help="Slowest pace --adaptive-rate backs off to, in seconds per page. Default: 60")
+    parser.add_argument("--target-latency", type=float, default=5.0,
+                        help="Page latency (seconds) above which --adaptive-rate slows down. Default: 5")
+    parser.add_argument("--burst", type=int, default=1,
+                        help="Page loads --adaptive-rate allows back to back after an idle period. Default: 1")
+    parser.add_argument("--retries", type=int, default=3,
+                        help="Attempts per part within a run for transient failures (timeouts, crashes). Default: 3")
+    parser.add_argument("--retry-delay", type=float, default=2.0,
+                        help="Backoff before the first retry; doubles per attempt, with jitter. Default: 2")
+    parser.add_argument("--retry-max-delay", type=float, default=60.0,
+                        help="Upper bound of the retry backoff. Default: 60")
+    parser.add_argument("--max-pages-per-browser", type=int, default=200,
+                        help="Recycle a browser after this many parts (shared browsers of --session-tabs and "
+                             "--engine cdp are drained first); 0 = never. Default: 200")
+    parser.add_argument("--max-browser-mb", type=float, default=2048,
+                        help="Recycle a browser whose process tree (driver, Chrome, renderers) uses more memory "
+                             "than this; 0 = never. Default: 2048")
+    parser.add_argument("--max-python-mb", type=float, default=0,
+                        help="Force a full garbage collection when this process uses more memory than this. "
+                             "Default: 0 (off)")
+    parser.add_argument("--memory-log", help="Per-part memory samples (CSV). Default: <output>_memory.csv")
+    parser.add_argument("--input", default="input.csv", help="Input CSV with part numbers in the first column")
+    parser.add_argument("--output", help="Output CSV path. Default: output_<timestamp>.csv")
+    parser.add_argument("--jsonl", action="store_true", help="Also write the output rows as JSON Lines (.jsonl)")
+    parser.add_argument("--parquet", action="store_true", help="Also write the output rows as Parquet (needs pyarrow)")
+    parser.add_argument("--flush-every", type=int, default=50, help="Write output to disk every N rows. Default: 50")
+    parser.add_argument("--fsync", action="store_true", help="fsync output files and journal after every write")
+    parser.add_argument("--shard", type=parse_shard, metavar="I/N",
+                        help="Only process hash shard I of N (0-based), e.g. 0/4")
+    parser.add_argument("--lines", type=parse_line_range, metavar="START:STOP",
+                        help="Only process input data rows START..STOP-1 (0-based, either side optional)")
+    parser.add_argument("--no-dedup", action="store_true", help="Keep duplicate part numbers from the input")
+    parser.add_argument("--queue", metavar="PATH",
+                        help="Worker mode: claim shards from this shared queue (see work_queue.py) instead of --input")
+    parser.add_argument("--worker-id", default=default_worker_id(),
+                        help="Unique name of this worker in the queue. Default: <hostname>-<pid>")
+    parser.add_argument("--queue-poll", type=float, default=5.0,
+                        help="Seconds between claims while other workers still hold shards. Default: 5")
+    parser.add_argument("--manual", action="store_true", help="Prompt for a single part number instead of reading the CSV")
+    parser.add_argument("--journal", default="progress.jsonl",
+                        help="Append-only progress journal; finished parts are skipped on restart")
+    parser.add_argument("--no-journal", action="store_true",
+                        help="Do not read or write the progress journal (e.g. for benchmark runs)")
+    parser.add_argument("--max-attempts", type=int, default=3,
+                        help="Stop retrying a part after this many failed attempts. Default: 3")
+    parser.add_argument("--show-browser", action="store_true", help="Run the browsers with a visible window")
+    parser.add_argument("--stage-timeout", action="append", metavar="STAGE=SECONDS",
+                        help="Override a page-readiness timeout (homepage, search_results, product_page). Repeatable")
+    parser.add_argument("--direct", action="store_true",
+                        help="Load learned product URLs / search URLs directly instead of typing into the search box")
+    parser.add_argument("--learned-urls", default="learned_urls.json",
+                        help="JSON store of learned product URL patterns used by --direct")
+    parser.add_argument("--resolution-cache", default="resolution_cache.sqlite",
+                        help="SQLite cache of part → product URL / not-found resolutions")
+    parser.add_argument("--cache-ttl-days", type=float, default=7,
+                        help="Re-resolve parts whose cache entry is older than this. Default: 7")
+    parser.add_argument("--no-cache", action="store_true", help="Disable the resolution cache")
+    parser.add_argument("--batch-series", action="store_true",
+                        help="Load each series page once and fill in every input part listed on it")
+    parser.add_argument("--http-first", action="store_true",
+                        help="Try a plain HTTP GET of the search/product page before using a browser")
+    parser.add_argument("--engine", choices=("selenium", "cdp"), default="selenium",
+                        help="Browser engine: Selenium worker threads, or asyncio over the DevTools protocol")
+    parser.add_argument("--session-tabs", type=int, default=0, metavar="N",
+                        help="Selenium: keep each browser warm (homepage and cookie consent once) and run N tabs "
+                             "per browser, one worker thread per tab. Default: 0 (one tab, homepage per part)")
+    parser.add_argument("--tabs", type=int, default=8,
+                        help="Tabs (parts in flight) for --engine cdp. Default: 8")
+    parser.add_argument("--chrome-binary", help="Chrome/Chromium binary for --engine cdp (default: found on PATH)")
+    parser.add_argument("--coveo-template", metavar="PATH",
+                        help="Replay this captured search API request to resolve parts in batches")
+    parser.add_argument("--coveo-endpoint", metavar="URL",
+                        help="Search API URL to query without a captured template (e.g. the mock site's /rest/search/v2)")
+    parser.add_argument("--coveo-capture", metavar="PATH",
+                        help="Read search API traffic from the browsers' network log; save the request here")
+    parser.add_argument("--coveo-batch", type=int, default=25, help="Part numbers per search API request. Default: 25")
+    parser.add_argument("--coveo-field", default=DEFAULT_PART_FIELD,
+                        help=f"Search API result field holding the part number. Default: {DEFAULT_PART_FIELD}")
+    parser.add_argument("--fuzzy-match", action="store_true",
+                        help="Match part numbers across punctuation / packaging suffixes and pick the best search result")
+    parser.add_argument("--match-threshold", type=float, default=0.95,
+                        help="Lowest match score accepted as the same part (0.95 punctuation only, 0.85 packaging "
+                             "suffix, 0.75 one edit). Default: 0.95")
+    parser.add_argument("--max-edit-distance", type=int, default=1,
+                        help="Edit distance covered by the --fuzzy-match index (0 disables it). Default: 1")
+    parser.add_argument("--delta", action="store_true",
+                        help="Incremental mode: reuse recent results, re-check older parts and report what changed")
+    parser.add_argument("--delta-store", default="delta_store.sqlite",
+                        help="SQLite store of the last result per part for --delta")
+    parser.add_argument("--max-age-days", type=float, default=7,
+                        help="With --delta, re-check parts last checked longer ago than this. Default: 7")
+    parser.add_argument("--delta-report", help="Diff report CSV for --delta. Default: <output>_changes.csv")
+    parser.add_argument("--fetch-documents", metavar="DIR",
+                        help="Download every linked certificate/declaration/datasheet into this content-addressed store")
+    parser.add_argument("--document-workers", type=int, default=8, help="Concurrent document downloads. Default: 8")
+    parser.add_argument("--document-rebase-url", metavar="URL",
+                        help="Fetch documents from this scheme://host instead of the linked one (mirror / mock site)")
+    parser.add_argument("--in-page-extraction", action="store_true",
+                        help="Extract fields with one in-browser script instead of transferring page_source")
+    parser.add_argument("--block-resources", action="store_true",
+                        help="Block images, fonts, media and trackers and load pages eagerly")
+    parser.add_argument("--block-pattern", action="append", default=[], metavar="PATTERN",
+                        help="Extra URL pattern to block with --block-resources (e.g. '*.css'). Repeatable")
+    parser.add_argument("--allow-pattern", action="append", default=[], metavar="PATTERN",
+                        help="Take matching patterns off the block list (e.g. '*.svg'). Repeatable")
+    parser.add_argument("--keep-images", action="store_true", help="With --block-resources, still load images")
+    parser.add_argument("--page-weight-every", type=int, metavar="N",
+                        help="Record the weight (bytes, requests, DOMContentLoaded) of every Nth browser page in "
+                             "the run metrics; 0 = never. Default: 20 with --block-resources, else 0")
+    parser.add_argument("--metrics-json", help="Run metrics summary (JSON). Default: <output>_metrics.json")
+    parser.add_argument("--prometheus", metavar="PATH",
+                        help="Keep a Prometheus text-format metrics file up to date while running")
+    parser.add_argument("--prometheus-every", type=float, default=5.0,
+                        help="Seconds between rewrites of the --prometheus file. Default: 5")
+    parser.add_argument("--base-url", default="https://www.littelfuse.com/",
+                        help="Site root (point at mock_site.py to run offline)")
+    return parser.parse_args(argv)
 
 # ------------------------------
 # Main scraper logic
 # ------------------------------
-def main():
-    url = "https://www.littelfuse.com/"
-    input_file = "input.csv"
+def main(argv=None):
+    args = parse_args(argv)
+    url = args.base_url
+    input_file = args.input
 
     # Create timestamped output filename (so each run is separate)
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    output_file = f"output_{timestamp}.csv"
-
-    # Output CSV fields
-    FIELDNAMES = [
-        'part_number', 'part_description', 'pb_free', 'rohs_date',
-        'rohs_certificate_link', 'reach_status', 'reach_declaration_link',
-        'ipc_material_declaration_link', 'halogen_free',
-        'series', 'datasheet_link'  # NEW field
-    ]
+    output_file = args.output or f"output_{timestamp}.csv"
+    output_stem = os.path.splitext(output_file)[0]
 
     # Modes
-    manual_mode = False   # If True → prompt for a single part number instead of reading from CSV
-    modify_input = False  # If True → remove processed parts from input.csv
+    manual_mode = args.manual          # If True → prompt for a single part number instead of reading from CSV
+    headless = not args.show_browser   # Visible browsers are handy while debugging
+
+    # Browser pool settings (one browser per worker)
+    workers = max(1, args.workers)
+    tabs = max(1, args.tabs)    # CDP engine: lookups in flight on one browser
+    max_pages_per_driver = args.max_pages_per_browser  # Recycle a browser after this many parts
 
     # ------------------------------
     # Get part numbers
@@ -122,120 +386,372 @@ def main():
     if manual_mode:
         # Manual input for single search
         part_numbers = [input("Enter a part number to search for: ").strip()]
-        header, rows = None, []
+        journal = None
+        workers = 1
+        tabs = 1
+    elif args.queue:
+        # Worker mode: parts come shard by shard from the shared queue, results go back to it.
+        # The queue is the resume mechanism, so no journal (a skipped part would never complete its shard)
+        print(f"[INFO] Worker {args.worker_id}: claiming shards from {args.queue}")
+        shard_queue = ShardQueue(args.queue)
+        shard_worker = ShardWorker(shard_queue, args.worker_id, poll_seconds=args.queue_poll)
+        part_numbers = shard_worker.parts()
+        journal = None
     else:
-        # Load part numbers from input.csv
-        part_numbers, header, rows = read_part_numbers(input_file)
-        print(f"[INFO] Loaded {len(part_numbers)} part numbers from {input_file}")
+        # Stream part numbers from input.csv (never loaded into memory as a whole)
+        print(f"[INFO] Streaming part numbers from {input_file}")
+        journal = None if args.no_journal else ProgressJournal(args.journal, max_attempts=args.max_attempts,
+                                                               fsync=args.fsync)
+        part_numbers = iter_part_numbers(input_file, dedup=not args.no_dedup,
+                                         line_range=args.lines, shard=args.shard)
+
+        # Resume: skip parts the journal already finished (or gave up on).
+        # Delta mode decides by itself what to reuse, so there the journal only records
+        if journal and not args.delta:
+            part_numbers = (p for p in part_numbers if journal.should_process(p))
+
+    metrics = RunMetrics(prometheus_path=args.prometheus, export_every=args.prometheus_every)
+
+    # Memory governor: per-part RSS log, browser recycling and forced GCs over the limits
+    governor = ResourceGovernor(max_browser_mb=args.max_browser_mb, max_python_mb=args.max_python_mb,
+                                log_path=args.memory_log or f"{output_stem}_memory.csv", metrics=metrics)
+
+    # Fuzzy matching: index every input part once (a separate streaming pass over the input)
+    matcher = None
+    if args.fuzzy_match:
+        if manual_mode:
+            indexed_parts = part_numbers
+        elif args.queue:
+            indexed_parts = shard_queue.all_parts()
+        else:
+            indexed_parts = iter_part_numbers(input_file, dedup=not args.no_dedup,
+                                              line_range=args.lines, shard=args.shard)
+        matcher = PartMatcher(PartIndex(indexed_parts, max_distance=args.max_edit_distance),
+                              threshold=args.match_threshold)
+        print(f"[INFO] Fuzzy matching: {len(matcher.index)} input parts indexed")
+
+    # Search API: look product URLs up for a whole batch of upcoming parts per request
+    coveo_template = None
+    if args.coveo_template and os.path.exists(args.coveo_template):
+        coveo_template = CoveoRequestTemplate.load(args.coveo_template)
+    elif args.coveo_endpoint:
+        coveo_template = CoveoRequestTemplate(args.coveo_endpoint)
+    coveo = None
+    if coveo_template:
+        coveo = CoveoClient(coveo_template, url, args.coveo_field, batch_size=args.coveo_batch,
+                            pool_size=max(workers, tabs))
+        part_numbers = coveo.prefetch(part_numbers)
+    coveo_capture = CoveoCapture(url, args.coveo_capture, args.coveo_field) if args.coveo_capture else None
+
+    # Linked documents are downloaded in the background while scraping goes on
+    document_store = DocumentStore(args.fetch_documents) if args.fetch_documents else None
+    document_fetcher = (DocumentFetcher(document_store, workers=args.document_workers, base_url=url,
+                                        rebase_url=args.document_rebase_url) if document_store else None)
+
+    resource_filter = None
+    if args.block_resources:
+        resource_filter = ResourceFilter(block_images=not args.keep_images,
+                                         blocked_patterns=DEFAULT_BLOCKED_PATTERNS + args.block_pattern,
+                                         allowed_patterns=args.allow_pattern)
+    # Blocking runs report their bytes per page and load times by default (sampled: each one is a script call)
+    page_weight_every = args.page_weight_every
+    if page_weight_every is None:
+        page_weight_every = 20 if args.block_resources else 0
+    weight_sampler = PageWeightSampler(page_weight_every)
+    # The Selenium pools launch browsers lazily, so they cost nothing with --engine cdp
+    if args.session_tabs:
+        # Warm browsers with several tabs each; one worker thread per tab
+        pool = TabPool(url, browsers=workers, tabs=args.session_tabs, headless=headless,
+                       max_pages_per_browser=max_pages_per_driver, metrics=metrics, resource_filter=resource_filter,
+                       performance_log=coveo_capture is not None, governor=governor)
+    else:
+        pool = DriverPool(size=workers, headless=headless, max_pages_per_driver=max_pages_per_driver,
+                          metrics=metrics, resource_filter=resource_filter, performance_log=coveo_capture is not None,
+                          governor=governor)
+    if args.adaptive_rate and args.min_interval > 0:
+        rate_limiter = AdaptiveRateLimiter(min_interval=args.min_interval, max_interval=args.max_interval,
+                                           burst=args.burst, target_latency=args.target_latency)
+    else:
+        if args.adaptive_rate:
+            print("[WARN] --adaptive-rate needs --min-interval > 0; using the fixed limiter.")
+        rate_limiter = RateLimiter(min_interval=args.min_interval)
+    # Transient failures go back into the queue after a backoff; permanent ones are final
+    retry_queue = RetryQueue(max_attempts=args.retries, base_delay=args.retry_delay, max_delay=args.retry_max_delay,
+                             transient_errors=TRANSIENT_ERRORS, transient_outcomes=TRANSIENT_OUTCOMES,
+                             permanent_outcomes=PERMANENT_OUTCOMES)
+    http_fetcher = (HttpFetcher(base_url=url, pool_size=max(workers, tabs), metrics=metrics, rate_limiter=rate_limiter,
+                                matcher=matcher)
+                    if args.http_first else None)
+    stage_timeouts = StageTimeouts().update_from_specs(args.stage_timeout)
+    cache = None if args.no_cache else ResolutionCache(args.resolution_cache, ttl_seconds=args.cache_ttl_days * 86400)
+    learned = LearnedUrls(args.learned_urls) if args.direct else None
+    # Without --direct the navigator only jumps to cached product URLs and otherwise types the search
+    navigator = (DirectNavigator(url, learned, cache, try_search_url=args.direct, in_page=args.in_page_extraction,
+                                 matcher=matcher)
+                 if (cache or args.direct or coveo or matcher) else None)
+    wait_recorder = WaitRecorder()
+    harvest = SeriesHarvest(matcher=matcher) if args.batch_series else None
+
+    # Delta mode: only parts older than --max-age-days are looked at again
+    delta = DeltaStore(args.delta_store, max_age_seconds=args.max_age_days * 86400) if args.delta else None
+    diff_report = DiffReport(args.delta_report or f"{output_stem}_changes.csv") if delta else None
+    recheck_fetcher = (http_fetcher or HttpFetcher(base_url=url, pool_size=max(workers, tabs), metrics=metrics,
+                                                   rate_limiter=rate_limiter, matcher=matcher)
+                       if delta else None)
+
+    def note_delta_page(part_or_keyword, page_url, extraction=None, page_hash=None):
+        # The row HTML hash lets the next delta run re-check the part with one GET and no re-parse
+        if extraction is not None and page_hash is None:
+            page_hash = extraction.row_hash(extraction.row_index_for(part_or_keyword, matcher) or 0)
+        delta.note_page(part_or_keyword, page_url, page_hash)
+
+    def resolve_without_browser(part_or_keyword):
+        """
+        Everything that can answer a part without a browser: the delta store,
+        harvested rows, the resolution cache and the HTTP fast path.
+
+        Returns:
+            tuple: ((outcome, row) or None, cache entry or None)
+        """
+        # Delta mode: recently checked parts come straight from the store,
+        # stale ones are re-checked with one GET of their stored product page
+        if delta:
+            entry = delta.take_fresh(part_or_keyword)
+            if entry:
+                age_days = (time.time() - entry["checked_at"]) / 86400
+                print(f"[SKIP] '{part_or_keyword}' checked {age_days:.1f} days ago (delta store). Reusing it.")
+                metrics.count("resolved_by", "delta_fresh")
+                return (entry["outcome"], build_output_row(part_or_keyword, entry["row"])), None
+            entry = delta.stale_entry(part_or_keyword)
+            rechecked = delta.recheck(part_or_keyword, entry, recheck_fetcher) if entry else None
+            if rechecked:
+                status, data = rechecked
+                print(f"[RESULT] Re-checked {entry['page_url']}")
+                metrics.count("resolved_by", "delta_recheck")
+                return (status, build_output_row(part_or_keyword, data)), None
+
+        # Batching mode: the part may already have been found on another part's series page
+        harvested = harvest.take(part_or_keyword) if harvest else None
+        if harvested:
+            data, source_url, row_hash = harvested
+            print(f"[RESULT] Filled from already loaded page {source_url}")
+            metrics.count("resolved_by", "harvest")
+            if delta:
+                note_delta_page(part_or_keyword, source_url, page_hash=row_hash)
+            remember_outcome(navigator, part_or_keyword, OK, data, source_url)
+            return (OK, build_output_row(part_or_keyword, data)), None
+
+        # Known-bad parts are skipped without loading anything
+        cached = navigator.cached(part_or_keyword) if navigator else None
+        if cached and cached["outcome"] in (NAVIGATION_FAILED, MISMATCH):
+            print(f"[SKIP] '{part_or_keyword}' resolved to {cached['outcome']} recently (cache). Skipping...")
+            metrics.count("resolved_by", "cache_skip")
+            return (cached["outcome"], build_output_row(part_or_keyword, None)), cached
+
+        # Search API: the product URL may already be known from a batch lookup
+        api_hit = coveo.lookup(part_or_keyword) if coveo else None
+        if api_hit and not (cached and cached.get("product_url")):
+            cached = {"outcome": OK, "product_url": api_hit.product_url, "page_type": api_hit.part_number,
+                      "stored_at": None}
+
+        # Fuzzy matching: the part may have shown up on an earlier part's results list
+        listed_url = matcher.product_url_for(part_or_keyword) if matcher else None
+        if listed_url and not (cached and cached.get("product_url")):
+            cached = {"outcome": OK, "product_url": listed_url, "page_type": None, "stored_at": None}
+
+        # Fast path: plain GET, only fall back to a browser if the page needs JavaScript
+        if http_fetcher:
+            # Every GET of the fast path (search, result, series page) waits for the rate limiter itself
+            known_url = cached.get("product_url") if cached else None
+            status, data, final_url, extraction = http_fetcher.scrape_part(part_or_keyword, url=known_url,
+                                                                           harvest=harvest)
+            if status != NEEDS_BROWSER:
+                print(f"[RESULT] HTTP fast path: {status}")
+                metrics.count("resolved_by", "http")
+                if delta:
+                    note_delta_page(part_or_keyword, final_url, extraction)
+                remember_outcome(navigator, part_or_keyword, status, data, final_url)
+                return (status, build_output_row(part_or_keyword, data)), cached
+            print("[INFO] Page needs a browser, falling back to the browser engine.")
+        return None, cached
+
+    def scrape_with_pool(part_or_keyword, worker_id):
+        print(f"\n[INFO] Worker {worker_id} starting scrape for: {part_or_keyword}")
+        with metrics.time("part_total"):
+            result, cached = resolve_without_browser(part_or_keyword)
+            if result:
+                governor.record_part(part_or_keyword)
+                return result
+
+            # Borrow a browser from the pool (it is recycled automatically if it crashes)
+            metrics.count("resolved_by", "browser")
+            try:
+                with pool.session() as session, session.active():
+                    waiter = ReadinessWaiter(session.driver, stage_timeouts, wait_recorder, metrics=metrics,
+                                             rate_limiter=rate_limiter, tab=session if session.shared else None)
+                    outcome, data, extraction = scrape_part(session.driver, session.wait, part_or_keyword, url,
+                                                            rate_limiter, waiter, navigator, cached, harvest,
+                                                            in_page=args.in_page_extraction,
+                                                            coveo_capture=coveo_capture, matcher=matcher,
+                                                            weight_sampler=weight_sampler)
+                    if delta:
+                        note_delta_page(part_or_keyword, session.driver.current_url, extraction)
+                    # Sampled before release(), which recycles the browser if it is over the memory limit
+                    session.rss_mb = governor.record_part(part_or_keyword, driver_pid(session.driver), session.slot)
+            except TIMEOUT_ERRORS as e:
+                print(f"[WARN] '{part_or_keyword}' timed out: {e}")
+                return TIMEOUT, build_output_row(part_or_keyword, None)
+            return outcome, build_output_row(part_or_keyword, data)
+
+    async def run_cdp_engine(write_result):
+        # One Chrome, many tabs, all driven from this event loop
+        engine = CdpEngine(url, tabs=tabs, headless=headless, binary=args.chrome_binary,
+                           timeouts=stage_timeouts, rate_limiter=rate_limiter, metrics=metrics,
+                           resource_filter=resource_filter, in_page=args.in_page_extraction, matcher=matcher,
+                           governor=governor, max_pages_per_browser=max_pages_per_driver,
+                           weight_sampler=weight_sampler)
+        await engine.start()
+        loop = asyncio.get_running_loop()
+
+        async def scrape_with_cdp(part_or_keyword):
+            print(f"\n[INFO] CDP starting scrape for: {part_or_keyword}")
+            with metrics.time("part_total"):
+                # The non-browser checks block (SQLite, HTTP) → run them off the event loop
+                result, cached = await loop.run_in_executor(None, resolve_without_browser, part_or_keyword)
+                if result:
+                    governor.record_part(part_or_keyword)
+                    return result
+
+                metrics.count("resolved_by", "browser")
+                product_url = cached.get("product_url") if cached else None
+                try:
+                    outcome, data, page_url, extraction = await engine.scrape(part_or_keyword, product_url)
+                except TIMEOUT_ERRORS as e:
+                    print(f"[WARN] '{part_or_keyword}' timed out: {e}")
+                    return TIMEOUT, build_output_row(part_or_keyword, None)
+                # The browser sample walks its process tree → off the event loop
+                await loop.run_in_executor(None, governor.record_part, part_or_keyword, engine.browser_pid, "cdp")
+            print(f"[RESULT] {part_or_keyword}: {outcome}")
+            remember_outcome(navigator, part_or_keyword, outcome, data, page_url)
+            if delta:
+                note_delta_page(part_or_keyword, page_url, extraction)
+
+            if harvest and extraction:
+                harvest.collect(extraction, page_url)
+                series_url = harvest.series_page_to_load(extraction, page_url)
+                if series_url:
+                    added = harvest.collect(await engine.load(series_url), series_url)
+                    print(f"[INFO] Series page {series_url}: harvested {added} more input parts")
+            return outcome, build_output_row(part_or_keyword, data)
+
+        try:
+            await run_async_workers(part_numbers, scrape_with_cdp, write_result, concurrency=tabs,
+                                    retry_queue=retry_queue)
+        finally:
+            await engine.close()
 
     # ------------------------------
     # Open output CSV for writing
     # ------------------------------
-    with open(output_file, mode='w', newline='', encoding='utf-8') as out_csv:
-        writer = csv.DictWriter(out_csv, fieldnames=FIELDNAMES)
-        writer.writeheader()  # Write column headers
+    writer = BatchedOutputWriter(output_file, FIELDNAMES, flush_every=args.flush_every, fsync=args.fsync,
+                                 jsonl_path=f"{output_stem}.jsonl" if args.jsonl else None,
+                                 parquet_path=f"{output_stem}.parquet" if args.parquet else None)
+
+    failure_log = FailureLog(f"{output_stem}_failures.csv")
+
+    with writer, closing(pool), closing(failure_log):
+
+        def write_result(idx, part_or_keyword, result):
+            if result is None:
+                # The worker raised (e.g. the browser crashed) → keep the part in the output anyway
+                outcome, row_to_write = ERROR, build_output_row(part_or_keyword, None)
+            else:
+                outcome, row_to_write = result
+            writer.write(row_to_write)  # Save row to output CSV (written out in batches)
+            metrics.count("outcome", outcome)
+            attempts = retry_queue.attempts_for(part_or_keyword)
+            if outcome in PERMANENT_OUTCOMES:
+                failure_log.add(part_or_keyword, outcome, PERMANENT, attempts)
+            elif outcome != OK:
+                failure_log.add(part_or_keyword, outcome, TRANSIENT, attempts)
+            if delta:
+                change = delta.record(part_or_keyword, outcome, row_to_write)
+                if change:
+                    diff_report.add(part_or_keyword, *change)
+            if document_fetcher and outcome == OK:
+                document_fetcher.submit_row(row_to_write)
+            metrics.export()  # Live Prometheus file (throttled)
+
+            # Record the attempt so a restarted run can skip or retry this part.
+            # A timeout says nothing about the part, so it does not use up one of its journal attempts
+            if journal and outcome != TIMEOUT:
+                journal.record(part_or_keyword, outcome, row_to_write)
+            if args.queue:
+                shard_worker.record(part_or_keyword, outcome, row_to_write)
 
         # ------------------------------
         # Iterate over all part numbers
         # ------------------------------
-        for idx, part_or_keyword in enumerate(part_numbers):
-            print(f"\n[INFO] Starting scrape for: {part_or_keyword}")
-            driver = create_driver(headless=False)  # Browser visible for debugging
-            wait = WebDriverWait(driver, 10)  # Max wait time for elements
-
-            try:
-                # Load homepage
-                driver.get(url)
-                driver.set_window_size(1920, 1080)
-                time.sleep(3)  # Small pause to allow page load
-
-                # Search for the part number
-                type_into_search(driver, part_or_keyword)
-                time.sleep(3)
-
-                # Detect where we landed after search
-                nav_module = NavigationModule(driver, wait)
-                result_type = nav_module.navigate()
-
-                data = None  # Will hold scraped data
-
-                # ------------------------------
-                # If we landed on a list page
-                # ------------------------------
-                if result_type == "LIST_OF_ITEMS":
-                    click_first_result(driver, wait)
-                    time.sleep(2)
-                    try:
-                        # Locate environmental table row and scrape it
-                        row_element = driver.find_element(By.CSS_SELECTOR, "table.envirnonmental-table tbody tr")
-                        html = row_element.get_attribute("outerHTML")
-                        full_html = driver.page_source
-                        data = scrape_environmental_table(html, full_html)
-                        pprint(data)
-                    except Exception as e:
-                        print("[ERROR] Couldn't locate environmental table row:", e)
-
-                # ------------------------------
-                # If navigation failed
-                # ------------------------------
-                elif result_type == "NAVIGATION_FAILED":
-                    print("[RESULT] No part found or unknown redirect.")
-
-                # ------------------------------
-                # If we landed directly on an item page
-                # ------------------------------
+        try:
+            while True:
+                if args.engine == "cdp":
+                    asyncio.run(run_cdp_engine(write_result))
                 else:
-                    print(f"[RESULT] Landed on direct item page. Detected part: {result_type}")
-                    if result_type.lower() != part_or_keyword.lower():
-                        # Skip if detected part number doesn't match expected
-                        print(f"[SKIP] Detected part '{result_type}' does not match expected '{part_or_keyword}'. Skipping...")
-                        data = None
-                    else:
-                        try:
-                            # Scrape environmental table
-                            row_element = driver.find_element(By.CSS_SELECTOR, "table.envirnonmental-table tbody tr")
-                            html = row_element.get_attribute("outerHTML")
-                            full_html = driver.page_source
-                            data = scrape_environmental_table(html, full_html)
-                            pprint(data)
-                        except Exception as e:
-                            print("[ERROR] Couldn't locate environmental table row:", e)
-                            data = None
-
-                # ------------------------------
-                # Prepare row for output CSV
-                # ------------------------------
-                row_to_write = {key: None for key in FIELDNAMES}  # Default None for all fields
-                row_to_write['part_number'] = part_or_keyword
-
-                if data:
-                    for key in FIELDNAMES:
-                        row_to_write[key] = data.get(key, None)
-
-                writer.writerow(row_to_write)  # Save row to output CSV
-
-                # ------------------------------
-                # Remove processed part from input.csv if enabled
-                # ------------------------------
-                if modify_input and not manual_mode:
-                    print(f"[INFO] Removing processed part '{part_or_keyword}' from input CSV")
-                    write_remaining_parts(input_file, header, rows, part_or_keyword)
-                    # Update local rows list
-                    rows = [r for r in rows if r and r[0].strip() != part_or_keyword]
-
-                time.sleep(5)  # Small delay to avoid hitting server too fast
-
-                # ------------------------------
-                # Manual mode → stop after one
-                # ------------------------------
-                if manual_mode:
-                    print("[INFO] Manual mode: finished single scrape.")
+                    run_workers(part_numbers, scrape_with_pool, write_result, workers=pool.size,
+                                retry_queue=retry_queue)
+
+                # Worker mode: stay around while other workers hold shards, and take over the ones that expire
+                if not args.queue or not shard_worker.wait_for_work():
                     break
+                part_numbers = coveo.prefetch(shard_worker.parts()) if coveo else shard_worker.parts()
+        finally:
+            if journal:
+                journal.close()
+            if args.queue:
+                shard_worker.close()
+                print(f"[INFO] Worker {args.worker_id}: {shard_worker.summary()}")
+                print_status(shard_queue.status())
+                shard_queue.close()
+            if learned:
+                learned.save()
+            if cache:
+                print(f"[INFO] Resolution cache: {cache.summary()}")
+                cache.close()
+            if harvest:
+                print(f"[INFO] Series batching: {harvest.summary()}")
+            if coveo:
+                print(f"[INFO] Search API: {coveo.summary()}")
+            if matcher:
+                print(f"[INFO] Fuzzy matching: {matcher.summary()}")
+            if delta:
+                print(f"[INFO] Delta: {delta.summary()}")
+                print(f"[INFO] {diff_report.lines} changes written to {diff_report.path}")
+                delta.close()
+                diff_report.close()
+            if document_fetcher:
+                print("[INFO] Waiting for document downloads to finish...")
+                document_fetcher.close()
+                document_store.close()
+                print(f"[INFO] Documents: {document_fetcher.summary()}")
+            print(f"[INFO] Retries: {retry_queue.summary()}")
+            print(f"[INFO] Memory: {governor.summary()} → {governor.log_path}")
+            governor.close()
+            if failure_log.counts:
+                print(f"[INFO] Failures: {failure_log.counts} → {failure_log.path}")
+            if isinstance(rate_limiter, AdaptiveRateLimiter):
+                print(f"[INFO] Adaptive rate: {rate_limiter.summary()}")
+            for line in wait_recorder.summary():
+                print(f"[INFO] Wait times – {line}")
+            metrics.write_json(args.metrics_json or f"{output_stem}_metrics.json")
+            metrics.export(force=True)
+            print(f"[INFO] {metrics.parts_done()} parts, {metrics.parts_per_minute():.1f} parts/min")
+            page_bytes = metrics.summary()["values"].get("page_bytes")
+            if page_bytes:
+                print(f"[INFO] Page weight: {page_bytes['sum'] / page_bytes['count'] / 1024:.1f} KB/page "
+                      f"(p95 {page_bytes['p95'] / 1024:.1f} KB) over {page_bytes['count']} browser pages")
 
-            finally:
-                # Always close browser, even if error occurs
-                driver.quit()
-                print("[INFO] Browser closed.")
+        if manual_mode:
+            print("[INFO] Manual mode: finished single scrape.")
 
 # ------------------------------
 # Script entry point
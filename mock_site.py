@@ -0,0 +1,222 @@
+# mock_site.py
+# ------------
+# A tiny local stand-in for littelfuse.com that replays recorded pages from
+# the fixtures/ directory. It lets the scraper (HTTP fast path or a real
+# browser pointed at --base-url) run completely offline.
+#
+# Routes:
+#   /                  → fixtures/home.html
+#   /search?q=<query>  → 302 to /products/<part> if a product fixture exists,
+#                        fixtures/search/<query>.html if a list fixture exists,
+#                        otherwise fixtures/no_results.html
+#   /products/<part>   → fixtures/products/<part>.html (404 if missing)
+#   /series/<series>   → fixtures/series/<series>.html (404 if missing)
+#   /rohs/, /reach/, /ipc/, /assetdocs/… → a generated document per path, with ETag /
+#                        Last-Modified and 304 answers to conditional requests
+#   POST /rest/search/v2 → Coveo-style JSON from fixtures/coveo/index.json, filtered by
+#                          aq=@field==("A","B",...) (exact) or q (part-number prefix)
+
+import argparse
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qs, quote, unquote
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+COVEO_INDEX = os.path.join(FIXTURES_DIR, "coveo", "index.json")
+
+# Document links on the recorded pages (fixtures/products/*.html)
+DOCUMENT_PREFIXES = ("/rohs/", "/reach/", "/ipc/", "/assetdocs/")
+DOCUMENT_LAST_MODIFIED = "Mon, 03 Jun 2024 08:00:00 GMT"
+
+# @field==("A","B") or @field=="A"
+_AQ_EXACT = re.compile(r'@(\w+)\s*==\s*\(?\s*((?:"[^"]*"\s*,?\s*)+)\)?')
+
+
+def _find_fixture(directory, name):
+    """
+    Case-insensitive lookup of <directory>/<name>.html. Returns (path, canonical_name) or (None, None).
+    """
+    folder = os.path.join(FIXTURES_DIR, directory)
+    if not os.path.isdir(folder):
+        return None, None
+    wanted = f"{name}.html".lower()
+    for filename in os.listdir(folder):
+        if filename.lower() == wanted:
+            return os.path.join(folder, filename), filename[:-len(".html")]
+    return None, None
+
+
+class MockSiteHandler(BaseHTTPRequestHandler):
+    # Set by start_mock_site() / the CLI
+    latency = 0.0
+    stats = None
+
+    def log_message(self, format, *args):
+        # Keep the scraper's own output readable
+        pass
+
+    def _send_file(self, path, status=200):
+        with open(path, "rb") as f:
+            body = f.read()
+        self.send_response(status)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+        self._count(len(body))
+
+    def _redirect(self, location):
+        self.send_response(302)
+        self.send_header("Location", location)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+        self._count(0)
+
+    def _not_found(self):
+        body = b"<html><body><h1>404 Not Found</h1></body></html>"
+        self.send_response(404)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+        self._count(len(body))
+
+    def _count(self, nbytes):
+        if self.stats is not None:
+            with self.stats["lock"]:
+                self.stats["requests"] += 1
+                self.stats["bytes"] += nbytes
+
+    def _send_document(self, path):
+        # Deterministic ~64 KB body per path, so ETags stay stable across restarts
+        seed = hashlib.sha256(path.encode("utf-8")).digest()
+        body = b"%PDF-1.4\n% mock document " + path.encode("utf-8") + b"\n" + seed * 2048
+        etag = f'"{hashlib.sha256(body).hexdigest()[:16]}"'
+        if self.headers.get("If-None-Match") == etag or self.headers.get("If-Modified-Since") == DOCUMENT_LAST_MODIFIED:
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.end_headers()
+            return self._count(0)
+        self.send_response(200)
+        self.send_header("Content-Type", "application/pdf")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("ETag", etag)
+        self.send_header("Last-Modified", DOCUMENT_LAST_MODIFIED)
+        self.end_headers()
+        self.wfile.write(body)
+        self._count(len(body))
+
+    def _send_json(self, payload, status=200):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+        self._count(len(body))
+
+    def do_POST(self):
+        if self.latency:
+            time.sleep(self.latency)
+
+        if urlsplit(self.path).path.rstrip("/") != "/rest/search/v2":
+            return self._not_found()
+        length = int(self.headers.get("Content-Length") or 0)
+        try:
+            request = json.loads(self.rfile.read(length) or b"{}")
+        except ValueError:
+            return self._send_json({"message": "Invalid JSON body"}, status=400)
+        with open(COVEO_INDEX, encoding="utf-8") as f:
+            results = json.load(f)["results"]
+
+        match = _AQ_EXACT.search(request.get("aq") or "")
+        if match:
+            field, values = match.group(1), {v.lower() for v in re.findall(r'"([^"]*)"', match.group(2))}
+            results = [r for r in results if str(r.get("raw", {}).get(field, "")).lower() in values]
+        else:
+            query = (request.get("q") or "").strip().lower()
+            results = [r for r in results if r.get("title", "").lower().startswith(query)]
+
+        first = int(request.get("firstResult") or 0)
+        count = int(request.get("numberOfResults") or 10)
+        return self._send_json({"totalCount": len(results), "results": results[first:first + count]})
+
+    def do_GET(self):
+        if self.latency:
+            time.sleep(self.latency)  # Simulated server round-trip
+
+        parts = urlsplit(self.path)
+        path = unquote(parts.path)
+
+        if path in ("", "/"):
+            return self._send_file(os.path.join(FIXTURES_DIR, "home.html"))
+
+        if path.rstrip("/") == "/search":
+            query = parse_qs(parts.query).get("q", [""])[0].strip()
+            product_path, part = _find_fixture("products", query)
+            if product_path:
+                # Exact part number → the real site redirects straight to the product page
+                return self._redirect(f"/products/{quote(part)}")
+            list_path, _ = _find_fixture("search", query)
+            if list_path:
+                return self._send_file(list_path)
+            return self._send_file(os.path.join(FIXTURES_DIR, "no_results.html"))
+
+        if path.startswith("/products/"):
+            product_path, _ = _find_fixture("products", path[len("/products/"):].strip("/"))
+            if product_path:
+                return self._send_file(product_path)
+
+        if path.startswith(DOCUMENT_PREFIXES):
+            return self._send_document(path)
+
+        if path.startswith("/series/"):
+            series_path, _ = _find_fixture("series", path[len("/series/"):].strip("/"))
+            if series_path:
+                return self._send_file(series_path)
+
+        return self._not_found()
+
+
+def start_mock_site(host="127.0.0.1", port=0, latency=0.0):
+    """
+    Starts the mock site on a background thread.
+
+    Args:
+        host (str): Interface to bind.
+        port (int): Port to bind; 0 picks a free one.
+        latency (float): Artificial delay (seconds) added to every response.
+
+    Returns:
+        tuple: (server, base_url). Call server.shutdown() when done.
+               server.stats holds request and byte counters.
+    """
+    stats = {"requests": 0, "bytes": 0, "lock": threading.Lock()}
+    handler = type("BoundMockSiteHandler", (MockSiteHandler,), {"latency": latency, "stats": stats})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    server.stats = stats
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f"http://{host}:{server.server_address[1]}/"
+    return server, base_url
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve recorded Littelfuse pages for offline runs.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--latency", type=float, default=0.0, help="Artificial delay per response (seconds)")
+    args = parser.parse_args()
+
+    server, base_url = start_mock_site(args.host, args.port, args.latency)
+    print(f"[INFO] Mock site serving {FIXTURES_DIR} at {base_url} (Ctrl+C to stop)")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
@@ -0,0 +1,18 @@
+# outcomes.py
+# -----------
+# Per-part outcome codes shared by every scraping path (browser, HTTP fast
+# path, CDP engine), the progress journal and the resolution cache.
+
+OK = "OK"                                # Environmental data scraped
+NAVIGATION_FAILED = "NAVIGATION_FAILED"  # No results / page type unknown
+MISMATCH = "MISMATCH"                    # Landed on a different part's product page
+NO_TABLE = "NO_TABLE"                    # Product page reached but no environmental row found
+TIMEOUT = "TIMEOUT"                      # A page did not become ready in time (says nothing about the part)
+ERROR = "ERROR"                          # The scrape raised (browser crash, lost session, ...)
+
+# Outcomes that finish a part for good; anything else is retried
+FINAL_OUTCOMES = {OK, NAVIGATION_FAILED, MISMATCH}
+
+# Failures by kind: permanent ones are answers from the site, transient ones are worth another attempt
+PERMANENT_OUTCOMES = {NAVIGATION_FAILED, MISMATCH}
+TRANSIENT_OUTCOMES = {NO_TABLE, TIMEOUT, ERROR}
@@ -0,0 +1,139 @@
+# output_writer.py
+# ----------------
+# Batched, crash-safe output for long runs. Rows are buffered and written out
+# every N rows or every few seconds (whichever comes first), flushed to the OS
+# and optionally fsync'ed, so a crash loses at most one small batch.
+# Besides the CSV, the same rows can be written as JSON Lines and/or Parquet
+# (Parquet needs the optional pyarrow package).
+
+import csv
+import json
+import os
+import time
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # Parquet output is optional
+    pa = pq = None
+
+
+class BatchedOutputWriter:
+    def __init__(self, csv_path, fieldnames, flush_every=50, flush_seconds=10.0, fsync=False,
+                 jsonl_path=None, parquet_path=None):
+        """
+        Open the output files and write the CSV header.
+
+        Args:
+            csv_path (str): Output CSV path.
+            fieldnames (list): Column names (FIELDNAMES).
+            flush_every (int): Write out the buffer after this many rows.
+            flush_seconds (float): ...or when the oldest buffered row is this old.
+            fsync (bool): fsync every output file after each batch.
+            jsonl_path (str, optional): Also write every row as one JSON line here.
+            parquet_path (str, optional): Also write the rows to a Parquet file (needs pyarrow).
+        """
+        self.fieldnames = list(fieldnames)
+        self.flush_every = flush_every
+        self.flush_seconds = flush_seconds
+        self.fsync = fsync
+        self.rows_written = 0
+
+        self._buffer = []
+        self._buffer_started = None
+
+        self._csv_file = open(csv_path, mode='w', newline='', encoding='utf-8')
+        self._csv = csv.DictWriter(self._csv_file, fieldnames=self.fieldnames)
+        self._csv.writeheader()
+
+        self._jsonl_file = open(jsonl_path, mode='w', encoding='utf-8') if jsonl_path else None
+
+        self._parquet = None
+        if parquet_path:
+            if pa is None:
+                raise RuntimeError("Parquet output needs pyarrow (pip install pyarrow)")
+            self._parquet_schema = pa.schema([(name, pa.string()) for name in self.fieldnames])
+            self._parquet = pq.ParquetWriter(parquet_path, self._parquet_schema)
+
+    def write(self, row):
+        """
+        Buffers one output row; writes the batch out when it is full or old enough.
+        """
+        if not self._buffer:
+            self._buffer_started = time.monotonic()
+        self._buffer.append(row)
+        if (len(self._buffer) >= self.flush_every
+                or time.monotonic() - self._buffer_started >= self.flush_seconds):
+            self.flush()
+
+    def flush(self):
+        """
+        Writes every buffered row to all outputs and pushes them to disk.
+        """
+        if not self._buffer:
+            return
+        batch, self._buffer = self._buffer, []
+
+        self._csv.writerows(batch)
+        files = [self._csv_file]
+
+        if self._jsonl_file:
+            self._jsonl_file.writelines(json.dumps(row, ensure_ascii=False) + "\n" for row in batch)
+            files.append(self._jsonl_file)
+
+        if self._parquet:
+            columns = {name: [None if row.get(name) is None else str(row[name]) for row in batch]
+                       for name in self.fieldnames}
+            self._parquet.write_table(pa.table(columns, schema=self._parquet_schema))
+
+        for f in files:
+            f.flush()
+            if self.fsync:
+                os.fsync(f.fileno())
+        self.rows_written += len(batch)
+
+    def close(self):
+        self.flush()
+        self._csv_file.close()
+        if self._jsonl_file:
+            self._jsonl_file.close()
+        if self._parquet:
+            self._parquet.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+class FailureLog:
+    def __init__(self, path):
+        """
+        CSV of every part that did not end with OK, kept apart from the output rows.
+
+        Args:
+            path (str): Failure CSV path (overwritten).
+        """
+        self.path = path
+        self.counts = {}
+        self._file = open(path, mode='w', newline='', encoding='utf-8')
+        self._csv = csv.DictWriter(self._file, fieldnames=["part_number", "outcome", "kind", "attempts"])
+        self._csv.writeheader()
+
+    def add(self, part, outcome, kind, attempts=1):
+        """
+        Records one failed part.
+
+        Args:
+            part (str): Part number.
+            outcome (str): Final outcome (NAVIGATION_FAILED, MISMATCH, NO_TABLE, TIMEOUT, ERROR).
+            kind (str): "permanent" (the site's answer) or "transient" (gave up after retries).
+            attempts (int): Attempts made this run.
+        """
+        self._csv.writerow({"part_number": part, "outcome": outcome, "kind": kind, "attempts": attempts})
+        self._file.flush()
+        self.counts[kind] = self.counts.get(kind, 0) + 1
+
+    def close(self):
+        self._file.close()
@@ -0,0 +1,191 @@
+# page_readiness.py
+# -----------------
+# Event-driven waits for the navigation pipeline. Instead of sleeping a fixed
+# number of seconds after every step, we wait with WebDriverWait until the page
+# shows one of the signals the rest of the code keys on:
+#   - homepage:       the mega-menu search input is visible
+#   - search_results: div.no-results-message, #MainSearchTable_info or the
+#                     product "Part Number" cell (the NavigationModule signals)
+#   - product_page:   the product "Part Number" cell or the environmental table
+# Each stage has its own timeout, and every wait records how long it really took.
+
+import threading
+import time
+from dataclasses import dataclass
+
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.common.exceptions import TimeoutException, NoSuchElementException, StaleElementReferenceException
+
+SEARCH_INPUT = (By.CSS_SELECTOR, '[data-testid="mega-menu-search-input"]')
+NO_RESULTS = (By.CSS_SELECTOR, "div.no-results-message")
+LIST_INFO = (By.CSS_SELECTOR, "#MainSearchTable_info")
+PART_NUMBER_CELL = (By.CSS_SELECTOR, 'td[data-value="Part Number"]')
+ENVIRONMENTAL_ROW = (By.CSS_SELECTOR, "table.envirnonmental-table tbody tr")
+
+# Stage name → condition factory
+STAGE_CONDITIONS = {
+    "homepage": lambda: EC.visibility_of_element_located(SEARCH_INPUT),
+    "search_results": lambda: EC.any_of(
+        EC.presence_of_element_located(NO_RESULTS),
+        EC.presence_of_element_located(LIST_INFO),
+        EC.presence_of_element_located(PART_NUMBER_CELL),
+    ),
+    "product_page": lambda: EC.any_of(
+        EC.presence_of_element_located(PART_NUMBER_CELL),
+        EC.presence_of_element_located(ENVIRONMENTAL_ROW),
+    ),
+}
+
+
+@dataclass
+class StageTimeouts:
+    """
+    Maximum seconds to wait for each stage.
+    """
+    homepage: float = 10
+    search_results: float = 15
+    product_page: float = 15
+
+    def update_from_specs(self, specs):
+        """
+        Applies "stage=seconds" strings (e.g. from the command line).
+        """
+        for spec in specs or []:
+            stage, _, seconds = spec.partition("=")
+            stage = stage.strip()
+            if not hasattr(self, stage) or not seconds:
+                raise ValueError(f"Invalid stage timeout '{spec}' (expected one of {list(STAGE_CONDITIONS)}=SECONDS)")
+            setattr(self, stage, float(seconds))
+        return self
+
+
+class WaitRecorder:
+    """
+    Thread-safe collection of how long each stage's wait actually took.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.durations = {}   # stage → list of seconds
+        self.timeouts = {}    # stage → number of waits that hit the timeout
+
+    def record(self, stage, seconds, timed_out):
+        with self._lock:
+            self.durations.setdefault(stage, []).append(seconds)
+            if timed_out:
+                self.timeouts[stage] = self.timeouts.get(stage, 0) + 1
+
+    def summary(self):
+        lines = []
+        with self._lock:
+            for stage, values in self.durations.items():
+                avg = sum(values) / len(values)
+                lines.append(f"{stage}: {len(values)} waits, avg {avg:.2f}s, max {max(values):.2f}s, "
+                             f"{self.timeouts.get(stage, 0)} timeouts")
+        return lines
+
+
+class ReadinessWaiter:
+    def __init__(self, driver, timeouts=None, recorder=None, poll_frequency=0.1, metrics=None, rate_limiter=None,
+                 tab=None):
+        """
+        Initialize the readiness waiter.
+
+        Args:
+            driver: Selenium WebDriver instance.
+            timeouts (StageTimeouts, optional): Per-stage timeouts. Defaults to StageTimeouts().
+            recorder (WaitRecorder, optional): Where to record the measured wait times.
+            poll_frequency (float): Seconds between condition checks.
+            metrics (RunMetrics, optional): Run metrics; waits are recorded as "wait_<stage>" and the
+                                            navigation helpers handed this waiter time their steps into it.
+            rate_limiter (RateLimiter, optional): Told every wait time (timeouts count as errors), so an
+                                                  adaptive limiter can follow the site's health.
+            tab (SessionTab, optional): Warm tab of a shared browser (tab_session.py). The browser is handed
+                                        to the other tabs between polls, so one tab renders while another
+                                        is parsed, and searches start from the page the tab is on.
+        """
+        self.driver = driver
+        self.timeouts = timeouts or StageTimeouts()
+        self.recorder = recorder
+        self.poll_frequency = poll_frequency
+        self.metrics = metrics
+        self.rate_limiter = rate_limiter
+        self.tab = tab
+
+    def wait_for(self, stage, required=False, after=None):
+        """
+        Blocks until the page is ready for the given stage or its timeout expires.
+
+        Args:
+            stage (str): One of "homepage", "search_results", "product_page".
+            required (bool): Raise TimeoutException on timeout instead of returning False. Use it where
+                             nothing else can tell a slow page from a missing part, so the part is
+                             retried instead of being scraped as NAVIGATION_FAILED.
+            after (tuple, optional): (html element, URL) of the page shown before the action that loads
+                                     the awaited one. The stage only counts once that page was replaced
+                                     (element gone stale) or the URL changed, so signals still showing on
+                                     the previous page (e.g. a warm tab's last product page) are ignored.
+
+        Returns:
+            bool: True if the page became ready, False on timeout (only if not required).
+
+        Raises:
+            TimeoutException: If a required stage timed out.
+        """
+        timeout = getattr(self.timeouts, stage)
+        condition = STAGE_CONDITIONS[stage]()
+        if after is not None:
+            old_html, old_url = after
+            condition = EC.all_of(EC.any_of(EC.staleness_of(old_html), EC.url_changes(old_url)), condition)
+        started = time.monotonic()
+        if self.tab is not None:
+            ready = self._poll_shared(condition, timeout)
+        else:
+            try:
+                WebDriverWait(self.driver, timeout, poll_frequency=self.poll_frequency).until(condition)
+                ready = True
+            except TimeoutException:
+                ready = False
+        if not ready:
+            print(f"[WARN] Page not ready for stage '{stage}' after {timeout}s")
+        elapsed = time.monotonic() - started
+        if self.recorder:
+            self.recorder.record(stage, elapsed, timed_out=not ready)
+        if self.metrics:
+            self.metrics.observe(f"wait_{stage}", elapsed)
+            if not ready:
+                self.metrics.count("wait_timeout", stage)
+        if self.rate_limiter:
+            self.rate_limiter.observe(elapsed, error=not ready)
+        if required and not ready:
+            raise TimeoutException(f"Page not ready for stage '{stage}' after {timeout}s")
+        return ready
+
+    def wait_turn(self, rate_limiter):
+        """
+        Waits for the shared rate limiter before a page load. A session tab hands the browser
+        to the other tabs while it waits.
+        """
+        if rate_limiter is None:
+            return
+        if self.tab is not None:
+            with self.tab.paused():
+                rate_limiter.wait()
+        else:
+            rate_limiter.wait()
+
+    def _poll_shared(self, condition, timeout):
+        # Same polling as WebDriverWait, but the browser is released while sleeping
+        deadline = time.monotonic() + timeout
+        while True:
+            try:
+                if condition(self.driver):
+                    return True
+            except (NoSuchElementException, StaleElementReferenceException):
+                pass
+            if time.monotonic() >= deadline:
+                return False
+            with self.tab.paused():
+                time.sleep(self.poll_frequency)
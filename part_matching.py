@@ -0,0 +1,307 @@
+# part_matching.py
+# ----------------
+# Fuzzy part-number matching. The site writes part numbers with and without
+# punctuation (0451.500NRL / 0451500NRL) and with packaging suffixes
+# (.MXP, NRL, KR, ...), so an exact, case-insensitive comparison rejects
+# pages that are really ours and a blind click on the first search result
+# lands on the wrong part.
+#
+# PartIndex is built once over all input parts and answers "which input parts
+# does this page's part number stand for?" with precomputed lookups:
+#   - canonical form (upper case, punctuation removed),
+#   - base form (canonical without a known packaging suffix),
+#   - sorted canonical keys for prefix lookups (bisect),
+#   - a deletion neighbourhood for edit-distance lookups (no pairwise scan).
+#
+# PartMatcher uses it to pick the best row on a results list or a multi-row
+# table, and to fan a list page out: every result row that matches another
+# input part is remembered as that part's product URL.
+
+import bisect
+import re
+import threading
+from collections import defaultdict
+from functools import lru_cache
+from urllib.parse import urljoin
+
+from resolution_cache import normalize_part
+
+# Packaging / reel suffixes, longest first so MXP wins over MX
+PACKAGING_SUFFIXES = sorted(["MXP", "MX", "MRL", "NRL", "DRL", "ERL", "KR", "RL", "TR", "TRL", "CT"],
+                            key=len, reverse=True)
+MIN_BASE_LENGTH = 4  # Never strip a "suffix" that leaves less than this
+
+# Match kinds and their scores
+EXACT = "exact"          # Same part number, ignoring case and whitespace
+CANONICAL = "canonical"  # Only punctuation differs
+PACKAGING = "packaging"  # Same part, different packaging suffix
+EDIT = "edit"            # Within the edit-distance limit (typo, dropped character)
+PREFIX = "prefix"        # One is a prefix of the other
+
+SCORES = {EXACT: 1.0, CANONICAL: 0.95, PACKAGING: 0.85, EDIT: 0.75, PREFIX: 0.5}
+
+_NON_ALNUM = re.compile(r"[^0-9A-Z]")
+
+
+@lru_cache(maxsize=65536)
+def canonical_part(part):
+    """
+    Upper case, punctuation and whitespace removed: "0451.500 nrl" → "0451500NRL".
+    """
+    return _NON_ALNUM.sub("", (part or "").upper())
+
+
+@lru_cache(maxsize=65536)
+def base_part(part):
+    """
+    Canonical form without a known packaging suffix: "0233001.MXP" → "0233001".
+    """
+    canonical = canonical_part(part)
+    for suffix in PACKAGING_SUFFIXES:
+        if canonical.endswith(suffix) and len(canonical) - len(suffix) >= MIN_BASE_LENGTH:
+            return canonical[:-len(suffix)]
+    return canonical
+
+
+def edit_distance(a, b, limit):
+    """
+    Levenshtein distance between a and b, or limit + 1 as soon as it is known to exceed limit.
+    """
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    previous = list(range(len(b) + 1))
+    for i, char_a in enumerate(a, 1):
+        current = [i]
+        for j, char_b in enumerate(b, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (char_a != char_b)))
+        if min(current) > limit:
+            return limit + 1
+        previous = current
+    return previous[-1]
+
+
+def _deletions(word, depth):
+    # Every string reachable from word by deleting up to `depth` characters (including word itself)
+    found = {word}
+    frontier = {word}
+    for _ in range(depth):
+        frontier = {w[:i] + w[i + 1:] for w in frontier for i in range(len(w))}
+        found |= frontier
+    return found
+
+
+def match_score(part, candidate, max_distance=1):
+    """
+    How well a part number found on a page matches a wanted part number.
+
+    Returns:
+        tuple: (score, kind) – score 0.0 and kind None if they do not match at all.
+    """
+    if not part or not candidate:
+        return 0.0, None
+    if normalize_part(part) == normalize_part(candidate):
+        return SCORES[EXACT], EXACT
+    wanted, found = canonical_part(part), canonical_part(candidate)
+    if not wanted or not found:
+        return 0.0, None
+    if wanted == found:
+        return SCORES[CANONICAL], CANONICAL
+    if base_part(part) == base_part(candidate):
+        return SCORES[PACKAGING], PACKAGING
+    if max_distance and edit_distance(wanted, found, max_distance) <= max_distance:
+        return SCORES[EDIT], EDIT
+    if found.startswith(wanted) or wanted.startswith(found):
+        return SCORES[PREFIX], PREFIX
+    return 0.0, None
+
+
+# ------------------------------
+# Index over the input parts
+# ------------------------------
+class PartIndex:
+    def __init__(self, parts=(), max_distance=1):
+        """
+        Build the index.
+
+        Args:
+            parts (iterable): Input part numbers (as written in the input).
+            max_distance (int): Edit distance covered by the deletion neighbourhood (0 disables it).
+        """
+        self.max_distance = max_distance
+        self._by_canonical = defaultdict(set)  # canonical → input parts
+        self._by_base = defaultdict(set)       # base → input parts
+        self._by_deletion = defaultdict(set)   # deletion variant → canonicals
+        self._sorted = []                      # sorted canonicals, for prefix lookups
+        self._dirty = False
+        self._lock = threading.Lock()
+        for part in parts:
+            self.add(part)
+
+    def __len__(self):
+        return sum(len(parts) for parts in self._by_canonical.values())
+
+    def add(self, part):
+        canonical = canonical_part(part)
+        if not canonical:
+            return
+        with self._lock:
+            if canonical not in self._by_canonical:
+                self._dirty = True
+                if self.max_distance:
+                    for variant in _deletions(canonical, self.max_distance):
+                        self._by_deletion[variant].add(canonical)
+            self._by_canonical[canonical].add(part)
+            self._by_base[base_part(part)].add(part)
+
+    def _prefix_candidates(self, canonical):
+        with self._lock:
+            if self._dirty:
+                self._sorted = sorted(self._by_canonical)
+                self._dirty = False
+            keys = self._sorted
+        # Input parts that extend the candidate ...
+        start = bisect.bisect_left(keys, canonical)
+        for key in keys[start:]:
+            if not key.startswith(canonical):
+                break
+            yield key
+        # ... and input parts the candidate extends
+        for length in range(MIN_BASE_LENGTH, len(canonical)):
+            if canonical[:length] in self._by_canonical:
+                yield canonical[:length]
+
+    def lookup(self, candidate, min_score=0.0):
+        """
+        Input parts a part number seen on a page could stand for.
+
+        Args:
+            candidate (str): Part number from a page (list row, table row, detected part).
+            min_score (float): Drop matches scoring below this.
+
+        Returns:
+            list[tuple]: (input part, score, kind), best first.
+        """
+        canonical = canonical_part(candidate)
+        if not canonical:
+            return []
+
+        keys = set()
+        if canonical in self._by_canonical:
+            keys.add(canonical)
+        parts = set(self._by_base.get(base_part(candidate), ()))
+        if self.max_distance and min_score <= SCORES[EDIT]:
+            for variant in _deletions(canonical, self.max_distance):
+                keys |= self._by_deletion.get(variant, set())
+        if min_score <= SCORES[PREFIX]:
+            keys.update(self._prefix_candidates(canonical))
+        for key in keys:
+            parts |= self._by_canonical.get(key, set())
+
+        matches = []
+        for part in parts:
+            score, kind = match_score(part, candidate, self.max_distance)
+            if kind and score >= min_score:
+                matches.append((part, score, kind))
+        matches.sort(key=lambda match: (-match[1], match[0]))
+        return matches
+
+
+# ------------------------------
+# Matching pages against the index
+# ------------------------------
+class PartMatcher:
+    def __init__(self, index, threshold=SCORES[CANONICAL], list_min_score=SCORES[PREFIX]):
+        """
+        Initialize the matcher.
+
+        Args:
+            index (PartIndex): Index over the input parts.
+            threshold (float): Lowest score that counts as "this is the part" (page check, fan-out).
+                               A packaging variant is a different orderable part, so by default only
+                               punctuation differences are accepted.
+            list_min_score (float): Lowest score for choosing a search result over the first one.
+        """
+        self.index = index
+        self.threshold = threshold
+        self.list_min_score = list_min_score
+
+        self._lock = threading.Lock()
+        self._urls = {}  # normalized input part → (score, product URL) seen on a results list
+
+        # Counters for the run summary
+        self.fuzzy_rows = 0
+        self.list_picks = 0
+        self.urls_noted = 0
+        self.urls_served = 0
+
+    def best_index(self, part, candidates, min_score=None):
+        """
+        Scores every candidate part number against the wanted part.
+
+        Returns:
+            int or None: Index of the best candidate scoring at least min_score (default: threshold).
+        """
+        min_score = self.threshold if min_score is None else min_score
+        best, best_score = None, 0.0
+        for index, candidate in enumerate(candidates):
+            score, _ = match_score(part, candidate or "", self.index.max_distance)
+            if score > best_score:
+                best, best_score = index, score
+        return best if best is not None and best_score >= min_score else None
+
+    def row_index(self, part, extraction):
+        """
+        Best environmental row for the part when no row matches exactly, or None.
+        """
+        index = self.best_index(part, [row.part_number for row in extraction.rows])
+        if index is not None:
+            with self._lock:
+                self.fuzzy_rows += 1
+            print(f"[INFO] '{part}' matched row '{extraction.rows[index].part_number}' (fuzzy)")
+        return index
+
+    def result_index(self, part, extraction):
+        """
+        Best search result on a list page for the part, or None (then the first result is used).
+        """
+        index = self.best_index(part, [result.part_number for result in extraction.results], self.list_min_score)
+        if index:
+            with self._lock:
+                self.list_picks += 1
+            print(f"[INFO] Picking search result '{extraction.results[index].part_number}' for '{part}' "
+                  f"instead of the first one")
+        return index
+
+    def note_results(self, extraction, page_url):
+        """
+        Fans a results list out: every row that stands for an input part becomes that part's product URL.
+        """
+        noted = 0
+        for result in extraction.results:
+            if not result.href:
+                continue
+            url = urljoin(page_url, result.href)
+            for part, score, _ in self.index.lookup(result.part_number, self.threshold):
+                key = normalize_part(part)
+                with self._lock:
+                    if key not in self._urls or self._urls[key][0] < score:
+                        self._urls[key] = (score, url)
+                        noted += 1
+        with self._lock:
+            self.urls_noted += noted
+        return noted
+
+    def product_url_for(self, part):
+        """
+        Returns the product URL seen for this part on an earlier results list (and forgets it), or None.
+        """
+        with self._lock:
+            noted = self._urls.pop(normalize_part(part), None)
+            if noted:
+                self.urls_served += 1
+        return noted[1] if noted else None
+
+    def summary(self):
+        return (f"{len(self.index)} input parts indexed, {self.fuzzy_rows} fuzzy row matches, "
+                f"{self.list_picks} better search results picked, {self.urls_served}/{self.urls_noted} "
+                f"product URLs from results lists used")
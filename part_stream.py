@@ -0,0 +1,75 @@
+# part_stream.py
+# --------------
+# Streaming input for very large part lists. Part numbers are read from the
+# first CSV column one row at a time (nothing is held in memory except the
+# dedup set), optionally restricted to a line range or to one hash shard so
+# several runs can split the same file between them.
+
+import csv
+import zlib
+
+from resolution_cache import normalize_part
+
+
+def parse_shard(spec):
+    """
+    Parses "I/N" (0-based shard I of N) into (I, N).
+    """
+    index, _, count = spec.partition("/")
+    index, count = int(index), int(count)
+    if count < 1 or not 0 <= index < count:
+        raise ValueError(f"Invalid shard '{spec}' (expected I/N with 0 <= I < N)")
+    return index, count
+
+
+def parse_line_range(spec):
+    """
+    Parses "START:STOP" (0-based data rows, STOP exclusive, either side optional) into (start, stop).
+    """
+    start, _, stop = spec.partition(":")
+    return (int(start) if start else 0), (int(stop) if stop else None)
+
+
+def shard_of(part, count):
+    """
+    Stable shard number for a part (same on every machine and every run).
+    """
+    return zlib.crc32(normalize_part(part).encode("utf-8")) % count
+
+
+def iter_part_numbers(csv_file, dedup=True, line_range=None, shard=None):
+    """
+    Yields part numbers from the first column of a CSV file (header row skipped).
+
+    Args:
+        csv_file (str): Input CSV path.
+        dedup (bool): Skip part numbers already yielded. The seen-set grows with the
+                      number of distinct parts (one small hash per part).
+        line_range (tuple, optional): (start, stop) data-row range, stop exclusive or None.
+        shard (tuple, optional): (index, count) → only yield parts with shard_of(part, count) == index.
+
+    Yields:
+        str: Part number.
+    """
+    start, stop = line_range or (0, None)
+    seen = set()
+    with open(csv_file, newline='', encoding='utf-8') as f:
+        reader = csv.reader(f)
+        next(reader, None)  # Skip header
+        for line_no, row in enumerate(reader):
+            if line_no < start:
+                continue
+            if stop is not None and line_no >= stop:
+                break
+            if not row or not row[0].strip():
+                continue
+            part = row[0].strip()
+            if shard and shard_of(part, shard[1]) != shard[0]:
+                continue
+            if dedup:
+                # A 64-bit hash instead of the string keeps the set compact
+                key = hash(normalize_part(part))
+                if key in seen:
+                    continue
+                seen.add(key)
+            yield part
@@ -0,0 +1,105 @@
+# progress_journal.py
+# -------------------
+# Append-only progress journal (JSON Lines). Every finished attempt for a part
+# is appended as one line with its outcome and scraped result, so a run that
+# is interrupted can be restarted and will skip everything already done.
+#
+# The whole file is replayed once at start-up into an in-memory dict, which
+# makes "is this part done?" an O(1) lookup. Only the outcome and attempt
+# count are kept in memory; scraped results stay on disk. Nothing is ever
+# rewritten, so the cost per part is one small append instead of rewriting
+# the whole input CSV.
+
+import json
+import os
+import threading
+from datetime import datetime
+
+from outcomes import FINAL_OUTCOMES  # Outcomes that finish a part; anything else is retried on the next run
+
+
+class ProgressJournal:
+    def __init__(self, path="progress.jsonl", max_attempts=3, fsync=False):
+        """
+        Open (or create) a journal and replay its history.
+
+        Args:
+            path (str): JSONL file to append to.
+            max_attempts (int): Give up on a part after this many non-final outcomes.
+            fsync (bool): fsync after every record (slower, survives power loss).
+        """
+        self.path = path
+        self.max_attempts = max_attempts
+        self.fsync = fsync
+        self._lock = threading.Lock()
+
+        # part number → (latest outcome, attempts so far)
+        self.entries = {}
+        self._replay()
+
+        self._file = open(self.path, "a", encoding="utf-8")
+
+    def _replay(self):
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, encoding="utf-8") as f:
+            for line_no, line in enumerate(f, 1):
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    # A crash mid-write can leave a torn last line; ignore it
+                    print(f"[WARN] Skipping unreadable journal line {line_no} in {self.path}")
+                    continue
+                self.entries[record["part"]] = (record["outcome"], record["attempts"])
+        print(f"[INFO] Journal {self.path}: {len(self.entries)} parts on record.")
+
+    # ------------------------------
+    # Lookups
+    # ------------------------------
+    def is_complete(self, part):
+        entry = self.entries.get(part)
+        return entry is not None and entry[0] in FINAL_OUTCOMES
+
+    def attempts(self, part):
+        entry = self.entries.get(part)
+        return entry[1] if entry else 0
+
+    def should_process(self, part):
+        """
+        True if the part is neither finished nor out of retry attempts.
+        """
+        return not self.is_complete(part) and self.attempts(part) < self.max_attempts
+
+    # ------------------------------
+    # Recording
+    # ------------------------------
+    def record(self, part, outcome, result=None):
+        """
+        Appends one attempt for a part.
+
+        Args:
+            part (str): Part number.
+            outcome (str): OK, NAVIGATION_FAILED, MISMATCH (final) or any retryable outcome.
+            result (dict, optional): Output row for the part.
+        """
+        with self._lock:
+            record = {
+                "part": part,
+                "outcome": outcome,
+                "attempts": self.attempts(part) + 1,
+                "result": result,
+                "ts": datetime.now().isoformat(timespec="seconds"),
+            }
+            self._file.write(json.dumps(record, ensure_ascii=False) + "\n")
+            self._file.flush()
+            if self.fsync:
+                os.fsync(self._file.fileno())
+            self.entries[part] = (outcome, record["attempts"])
+
+    def close(self):
+        with self._lock:
+            if not self._file.closed:
+                self._file.close()
@@ -0,0 +1,134 @@
+# resolution_cache.py
+# -------------------
+# Persistent part → product page resolution cache (SQLite, stdlib only).
+# For every part we remember how the last lookup ended: the final product URL
+# and detected part number for a hit, or NAVIGATION_FAILED / MISMATCH for a
+# miss. Entries expire after a TTL, the least recently used entries are evicted
+# once the cache is full, and hit/miss counters are kept for the run summary.
+#
+# Known-good parts can then go straight to their product page, and known-bad
+# parts can be skipped without loading anything.
+
+import sqlite3
+import threading
+import time
+
+
+def normalize_part(part):
+    """
+    Cache key for a part number (case- and whitespace-insensitive).
+    """
+    return "".join(part.split()).upper()
+
+
+class ResolutionCache:
+    def __init__(self, path="resolution_cache.sqlite", ttl_seconds=7 * 24 * 3600, max_entries=200_000):
+        """
+        Open (or create) the resolution cache.
+
+        Args:
+            path (str): SQLite database file.
+            ttl_seconds (float): Entries older than this are treated as missing.
+            max_entries (int): Evict least recently used entries beyond this size.
+        """
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+
+        # One shared connection, serialized by our own lock (workers are threads)
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute("""
+            CREATE TABLE IF NOT EXISTS resolutions (
+                part TEXT PRIMARY KEY,
+                outcome TEXT NOT NULL,
+                product_url TEXT,
+                page_type TEXT,
+                stored_at REAL NOT NULL,
+                last_access REAL NOT NULL
+            )""")
+        self._db.execute("CREATE INDEX IF NOT EXISTS idx_resolutions_last_access ON resolutions(last_access)")
+        self._db.commit()
+        self._size = self._db.execute("SELECT COUNT(*) FROM resolutions").fetchone()[0]
+
+        # Counters for this run
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+        self.evictions = 0
+
+    # ------------------------------
+    # Lookups
+    # ------------------------------
+    def get(self, part):
+        """
+        Returns the cached resolution for a part, or None on a miss / expired entry.
+
+        Returns:
+            dict or None: {"outcome", "product_url", "page_type", "stored_at"}
+        """
+        key = normalize_part(part)
+        now = time.time()
+        with self._lock:
+            row = self._db.execute(
+                "SELECT outcome, product_url, page_type, stored_at FROM resolutions WHERE part = ?", (key,)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            outcome, product_url, page_type, stored_at = row
+            if now - stored_at > self.ttl_seconds:
+                self._db.execute("DELETE FROM resolutions WHERE part = ?", (key,))
+                self._db.commit()
+                self._size -= 1
+                self.expired += 1
+                self.misses += 1
+                return None
+            self._db.execute("UPDATE resolutions SET last_access = ? WHERE part = ?", (now, key))
+            self._db.commit()
+            self.hits += 1
+        return {"outcome": outcome, "product_url": product_url, "page_type": page_type, "stored_at": stored_at}
+
+    # ------------------------------
+    # Updates
+    # ------------------------------
+    def put(self, part, outcome, product_url=None, page_type=None):
+        """
+        Stores (or replaces) the resolution of a part and evicts LRU entries if the cache is full.
+        """
+        key = normalize_part(part)
+        now = time.time()
+        with self._lock:
+            existed = self._db.execute("SELECT 1 FROM resolutions WHERE part = ?", (key,)).fetchone() is not None
+            self._db.execute(
+                "INSERT OR REPLACE INTO resolutions (part, outcome, product_url, page_type, stored_at, last_access) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (key, outcome, product_url, page_type, now, now))
+            if not existed:
+                self._size += 1
+            overflow = self._size - self.max_entries
+            if overflow > 0:
+                self._db.execute(
+                    "DELETE FROM resolutions WHERE part IN "
+                    "(SELECT part FROM resolutions ORDER BY last_access LIMIT ?)", (overflow,))
+                self._size -= overflow
+                self.evictions += overflow
+            self._db.commit()
+
+    def invalidate(self, part):
+        with self._lock:
+            cursor = self._db.execute("DELETE FROM resolutions WHERE part = ?", (normalize_part(part),))
+            self._db.commit()
+            self._size -= cursor.rowcount
+
+    def summary(self):
+        lookups = self.hits + self.misses
+        hit_rate = self.hits / lookups * 100 if lookups else 0.0
+        return (f"{self.hits} hits, {self.misses} misses ({self.expired} expired), "
+                f"{hit_rate:.0f}% hit rate, {self.evictions} evicted, {self._size} entries")
+
+    def close(self):
+        with self._lock:
+            self._db.close()
@@ -0,0 +1,237 @@
+# resource_governor.py
+# --------------------
+# Memory governor for long unattended runs. A long-lived Chrome grows with
+# every page it renders, and a 46k-part run would sooner or later be
+# OOM-killed. The governor:
+#   - samples the resident memory (RSS) of this Python process and of every
+#     browser process tree (chromedriver → Chrome → renderers, or the Chrome
+#     launched by the CDP engine),
+#   - tells the pools when a browser passed the memory limit, so it is
+#     recycled (a shared browser is drained of its tabs first),
+#   - runs a full garbage collection when Python passes its limit,
+#   - logs both numbers per part to <output>_memory.csv, so a leak shows up
+#     as a slope long before it becomes a crash.
+#
+# Uses psutil when it is installed and falls back to /proc (Linux) otherwise.
+
+import csv
+import gc
+import os
+import threading
+import time
+
+try:
+    import psutil
+except ImportError:  # /proc fallback below
+    psutil = None
+
+MEMORY_FIELDNAMES = ["timestamp", "part_number", "python_mb", "browser_mb", "browser"]
+
+_PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+_MB = 1024 * 1024
+
+
+# ------------------------------
+# RSS sampling
+# ------------------------------
+def _proc_rss(pid):
+    # Second field of /proc/<pid>/statm: resident pages
+    try:
+        with open(f"/proc/{pid}/statm") as f:
+            return int(f.read().split()[1]) * _PAGE_SIZE
+    except (OSError, ValueError, IndexError):
+        return 0
+
+
+def _proc_children(pid):
+    # Parent → children map built from /proc/<pid>/stat (field 4 is the parent pid)
+    children = {}
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat") as f:
+                stat = f.read()
+        except OSError:
+            continue
+        # The command name is in parentheses and may contain spaces; the fields after it are fixed
+        fields = stat[stat.rfind(")") + 2:].split()
+        if len(fields) > 1:
+            children.setdefault(int(fields[1]), []).append(int(entry))
+    found, frontier = [], [pid]
+    while frontier:
+        kids = children.get(frontier.pop(), [])
+        found.extend(kids)
+        frontier.extend(kids)
+    return found
+
+
+def process_rss_mb(pid=None):
+    """
+    Resident memory of one process in MB (this process by default); 0 if it is gone.
+    """
+    pid = pid or os.getpid()
+    if psutil:
+        try:
+            return psutil.Process(pid).memory_info().rss / _MB
+        except (psutil.NoSuchProcess, psutil.AccessDenied):
+            return 0.0
+    return _proc_rss(pid) / _MB
+
+
+def process_tree_rss_mb(pid):
+    """
+    Resident memory of a process and all its descendants in MB (e.g. chromedriver and its Chrome).
+    Shared pages are counted once per process, so this overestimates a little – fine for a limit.
+    """
+    if not pid:
+        return 0.0
+    if psutil:
+        try:
+            root = psutil.Process(pid)
+            total = root.memory_info().rss
+            for child in root.children(recursive=True):
+                try:
+                    total += child.memory_info().rss
+                except (psutil.NoSuchProcess, psutil.AccessDenied):
+                    pass
+            return total / _MB
+        except (psutil.NoSuchProcess, psutil.AccessDenied):
+            return 0.0
+    return sum(_proc_rss(p) for p in [pid] + _proc_children(pid)) / _MB
+
+
+def driver_pid(driver):
+    """
+    PID of a Selenium driver's chromedriver process (Chrome runs below it), or None.
+    """
+    service = getattr(driver, "service", None)
+    process = getattr(service, "process", None)
+    return getattr(process, "pid", None)
+
+
+# ------------------------------
+# Governor
+# ------------------------------
+class ResourceGovernor:
+    def __init__(self, max_browser_mb=2048, max_python_mb=0, log_path=None, metrics=None, sample_interval=1.0,
+                 collect_interval=30.0):
+        """
+        Initialize the governor.
+
+        Args:
+            max_browser_mb (float): Recycle a browser whose process tree uses more than this (0 disables it).
+            max_python_mb (float): Run a full garbage collection when this process uses more (0 disables it).
+            log_path (str, optional): CSV with one memory sample per part.
+            metrics (RunMetrics, optional): Samples are also recorded as "rss_python_mb" / "rss_browser_mb".
+            sample_interval (float): Seconds a browser process-tree sample is reused.
+            collect_interval (float): Minimum seconds between forced collections while over max_python_mb.
+        """
+        self.max_browser_mb = max_browser_mb
+        self.max_python_mb = max_python_mb
+        self.metrics = metrics
+        self.log_path = log_path
+        self.sample_interval = sample_interval
+        self.collect_interval = collect_interval
+
+        self._lock = threading.Lock()
+        self._tree_samples = {}  # browser pid → (monotonic time, RSS MB)
+        self._file = None
+        self._csv = None
+        if log_path:
+            self._file = open(log_path, mode="w", newline="", encoding="utf-8")
+            self._csv = csv.DictWriter(self._file, fieldnames=MEMORY_FIELDNAMES)
+            self._csv.writeheader()
+
+        # Counters for the run summary
+        self.samples = 0
+        self.peak_python_mb = 0.0
+        self.peak_browser_mb = 0.0
+        self.browser_recycles = 0
+        self.collections = 0
+        self._last_collect = None
+
+    def browser_mb(self, pid):
+        """
+        RSS of a browser process tree in MB; samples younger than sample_interval are reused
+        (several tabs or the pool and the per-part log ask about the same browser).
+        """
+        now = time.monotonic()
+        with self._lock:
+            cached = self._tree_samples.get(pid)
+        if cached and now - cached[0] < self.sample_interval:
+            return cached[1]
+        rss_mb = process_tree_rss_mb(pid)
+        with self._lock:
+            self._tree_samples[pid] = (now, rss_mb)
+        return rss_mb
+
+    def _collect_due(self):
+        now = time.monotonic()
+        with self._lock:
+            if self._last_collect is not None and now - self._last_collect < self.collect_interval:
+                return False
+            self._last_collect = now
+            self.collections += 1
+        return True
+
+    def browser_over_limit(self, rss_mb):
+        """
+        Returns a recycle reason if a browser sample is over the limit, else None.
+        """
+        if self.max_browser_mb and rss_mb and rss_mb > self.max_browser_mb:
+            with self._lock:
+                self.browser_recycles += 1
+            return f"using {rss_mb:.0f} MB > {self.max_browser_mb:.0f} MB"
+        return None
+
+    def record_part(self, part, browser_pid=None, browser=None):
+        """
+        Samples Python (and the part's browser) after a part, logs the sample and enforces the Python limit.
+
+        Args:
+            part (str): Part number just scraped.
+            browser_pid (int, optional): Root process of the browser that served the part.
+            browser (str, optional): Label of that browser / tab for the log.
+
+        Returns:
+            float: The browser's RSS in MB (0.0 without a browser).
+        """
+        python_mb = process_rss_mb()
+        browser_mb = self.browser_mb(browser_pid) if browser_pid else 0.0
+
+        if self.max_python_mb and python_mb > self.max_python_mb and self._collect_due():
+            # Parse trees and other cyclic garbage; at most once per collect_interval while over the limit
+            gc.collect()
+            python_mb = process_rss_mb()
+            if python_mb > self.max_python_mb:
+                print(f"[WARN] Python process still uses {python_mb:.0f} MB after a full GC "
+                      f"(limit {self.max_python_mb:.0f} MB)")
+
+        if self.metrics:
+            self.metrics.observe_value("rss_python_mb", round(python_mb, 1))
+            if browser_pid:
+                self.metrics.observe_value("rss_browser_mb", round(browser_mb, 1))
+
+        with self._lock:
+            self.samples += 1
+            self.peak_python_mb = max(self.peak_python_mb, python_mb)
+            self.peak_browser_mb = max(self.peak_browser_mb, browser_mb)
+            if self._csv:
+                self._csv.writerow({"timestamp": time.strftime("%Y-%m-%d %H:%M:%S"), "part_number": part,
+                                    "python_mb": round(python_mb, 1),
+                                    "browser_mb": round(browser_mb, 1) if browser_pid else "",
+                                    "browser": browser if browser is not None else ""})
+                self._file.flush()
+        return browser_mb
+
+    def summary(self):
+        return (f"{self.samples} samples, peak Python {self.peak_python_mb:.0f} MB, peak browser "
+                f"{self.peak_browser_mb:.0f} MB, {self.browser_recycles} memory recycles, "
+                f"{self.collections} forced GCs")
+
+    def close(self):
+        with self._lock:
+            if self._file:
+                self._file.close()
+                self._file = None
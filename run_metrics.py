@@ -0,0 +1,225 @@
+# run_metrics.py
+# --------------
+# Timing and counters for a scraping run. Every stage of a lookup (browser
+# launch, driver.get, typed search, page detection, first-result click,
+# page_source transfer, parsing, ...) is timed with
+#
+#     with timed(metrics, "driver_get"):
+#         driver.get(url)
+#
+# and kept as a bounded sample per stage, from which p50/p95/p99 are computed.
+# Outcomes and page kinds are simple counters. The totals are written as a
+# JSON summary at the end of the run and, optionally, as a Prometheus text
+# file that is rewritten every few seconds while the run is going (point a
+# node_exporter textfile collector at it, or just `cat` it).
+
+import json
+import math
+import os
+import random
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+
+QUANTILES = (0.5, 0.95, 0.99)
+
+
+def percentile(sorted_values, q):
+    """
+    Nearest-rank percentile of an already sorted list (None if empty).
+    """
+    if not sorted_values:
+        return None
+    rank = max(1, math.ceil(q * len(sorted_values)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+class StageSamples:
+    """
+    Latency samples of one stage. Keeps at most max_samples values (reservoir
+    sampling), so memory stays flat on long runs while count/sum stay exact.
+    """
+
+    def __init__(self, max_samples=10_000):
+        self.max_samples = max_samples
+        self.values = []
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, seconds):
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+        if len(self.values) < self.max_samples:
+            self.values.append(seconds)
+        else:
+            slot = random.randrange(self.count)
+            if slot < self.max_samples:
+                self.values[slot] = seconds
+
+    def snapshot(self, digits=4):
+        ordered = sorted(self.values)
+        stats = {"count": self.count, "sum": round(self.total, digits), "max": round(self.max, digits)}
+        for q in QUANTILES:
+            value = percentile(ordered, q)
+            stats[f"p{int(q * 100)}"] = None if value is None else round(value, digits)
+        return stats
+
+
+class RunMetrics:
+    def __init__(self, prometheus_path=None, export_every=5.0, max_samples=10_000):
+        """
+        Initialize the metrics collector.
+
+        Args:
+            prometheus_path (str, optional): Prometheus text file rewritten while the run is going.
+            export_every (float): Minimum seconds between two rewrites of the Prometheus file.
+            max_samples (int): Latency samples kept per stage for the percentiles.
+        """
+        self.prometheus_path = prometheus_path
+        self.export_every = export_every
+        self.max_samples = max_samples
+        self.started = time.monotonic()
+        self._lock = threading.Lock()
+        self._stages = {}     # stage → StageSamples
+        self._counters = {}   # (counter name, label) → count
+        self._values = {}     # value name → StageSamples of non-time measurements (e.g. page bytes)
+        self._last_export = 0.0
+
+    # ------------------------------
+    # Recording
+    # ------------------------------
+    def observe(self, stage, seconds):
+        with self._lock:
+            samples = self._stages.get(stage)
+            if samples is None:
+                samples = self._stages[stage] = StageSamples(self.max_samples)
+            samples.add(seconds)
+
+    @contextmanager
+    def time(self, stage):
+        """
+        Times the enclosed block as one sample of `stage` (also when it raises).
+        """
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            self.observe(stage, time.monotonic() - started)
+
+    def observe_value(self, name, value):
+        """
+        Records a non-time measurement (e.g. "page_bytes"); reported with the same percentiles.
+        """
+        with self._lock:
+            samples = self._values.get(name)
+            if samples is None:
+                samples = self._values[name] = StageSamples(self.max_samples)
+            samples.add(value)
+
+    def count(self, name, label, amount=1):
+        """
+        Increments a labelled counter, e.g. count("outcome", "OK") or count("page", "list").
+        """
+        with self._lock:
+            key = (name, label)
+            self._counters[key] = self._counters.get(key, 0) + amount
+
+    # ------------------------------
+    # Reporting
+    # ------------------------------
+    def parts_done(self):
+        with self._lock:
+            return sum(n for (name, _), n in self._counters.items() if name == "outcome")
+
+    def parts_per_minute(self):
+        elapsed = time.monotonic() - self.started
+        return self.parts_done() / elapsed * 60 if elapsed > 0 else 0.0
+
+    def summary(self):
+        """
+        Returns all stage percentiles and counters as a JSON-serialisable dict.
+        """
+        with self._lock:
+            stages = {stage: samples.snapshot() for stage, samples in sorted(self._stages.items())}
+            values = {name: samples.snapshot(digits=1) for name, samples in sorted(self._values.items())}
+            counters = {}
+            for (name, label), n in sorted(self._counters.items()):
+                counters.setdefault(name, {})[label] = n
+        return {
+            "elapsed_seconds": round(time.monotonic() - self.started, 2),
+            "parts": sum(counters.get("outcome", {}).values()),
+            "parts_per_minute": round(self.parts_per_minute(), 2),
+            "stages": stages,
+            "values": values,
+            "counters": counters,
+        }
+
+    def write_json(self, path):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.summary(), f, indent=2)
+        print(f"[INFO] Run metrics written to {path}")
+
+    def prometheus_text(self):
+        summary = self.summary()
+        lines = [
+            "# HELP scraper_stage_seconds Latency of each scraping stage.",
+            "# TYPE scraper_stage_seconds summary",
+        ]
+        for stage, stats in summary["stages"].items():
+            for q in QUANTILES:
+                value = stats[f"p{int(q * 100)}"]
+                if value is not None:
+                    lines.append(f'scraper_stage_seconds{{stage="{stage}",quantile="{q}"}} {value}')
+            lines.append(f'scraper_stage_seconds_sum{{stage="{stage}"}} {stats["sum"]}')
+            lines.append(f'scraper_stage_seconds_count{{stage="{stage}"}} {stats["count"]}')
+        for name, stats in summary["values"].items():
+            lines.append(f"# TYPE scraper_{name} summary")
+            for q in QUANTILES:
+                value = stats[f"p{int(q * 100)}"]
+                if value is not None:
+                    lines.append(f'scraper_{name}{{quantile="{q}"}} {value}')
+            lines.append(f"scraper_{name}_sum {stats['sum']}")
+            lines.append(f"scraper_{name}_count {stats['count']}")
+        for name, labels in summary["counters"].items():
+            lines.append(f"# TYPE scraper_{name}_total counter")
+            for label, n in labels.items():
+                lines.append(f'scraper_{name}_total{{{name}="{label}"}} {n}')
+        lines.append("# TYPE scraper_parts_per_minute gauge")
+        lines.append(f"scraper_parts_per_minute {summary['parts_per_minute']}")
+        return "\n".join(lines) + "\n"
+
+    def export(self, force=False):
+        """
+        Rewrites the Prometheus file (atomically) if it is due, or always with force=True.
+        """
+        if not self.prometheus_path:
+            return
+        now = time.monotonic()
+        if not force and now - self._last_export < self.export_every:
+            return
+        self._last_export = now
+        tmp_path = f"{self.prometheus_path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(self.prometheus_text())
+        os.replace(tmp_path, self.prometheus_path)
+
+
+def page_kind(result_type):
+    """
+    Label for the page a lookup landed on: "list", "navigation_failed" or "direct".
+    Accepts NavigationModule statuses as well as raw extraction page types.
+    """
+    if result_type == "LIST_OF_ITEMS":
+        return "list"
+    if result_type in ("NAVIGATION_FAILED", "NO_RESULTS_AVAILABLE", "UNKNOWN"):
+        return "navigation_failed"
+    return "direct"
+
+
+def timed(metrics, stage):
+    """
+    metrics.time(stage), or a no-op context manager when metrics are off (None).
+    """
+    return metrics.time(stage) if metrics else nullcontext()
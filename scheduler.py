@@ -0,0 +1,523 @@
+# scheduler.py
+# ------------
+# This module runs the per-part scrape function on several worker threads.
+# Work is fed from one shared queue, every worker shares a single politeness
+# rate limit (instead of each sleeping on its own), and results are handed
+# back to the caller strictly in input order so the output CSV stays ordered.
+# Threads are enough here: each worker spends nearly all its time waiting on
+# its own browser, so the GIL is not a bottleneck. run_async_workers() is the
+# same idea for coroutine scrapers (cdp_engine.py): many lookups in flight on
+# one event loop, results still delivered in input order.
+#
+# AdaptiveRateLimiter is a token bucket whose rate follows the site's health
+# (page latency and error rate), never faster than the configured limit.
+# RetryQueue re-runs parts that failed for a transient reason (timeouts,
+# stale elements, browser crashes) after an exponential backoff with jitter;
+# permanent outcomes (no such part, mismatch) are delivered right away.
+
+import asyncio
+import heapq
+import itertools
+import queue
+import random
+import threading
+import time
+from collections import deque
+
+
+# ------------------------------
+# Global politeness rate limit
+# ------------------------------
+class RateLimiter:
+    def __init__(self, min_interval=5.0):
+        """
+        Initialize the rate limiter.
+
+        Args:
+            min_interval (float): Minimum number of seconds between two page loads,
+                                  counted across all workers together.
+        """
+        self.min_interval = min_interval
+        self._next_slot = 0.0
+        self._lock = threading.Lock()
+
+    def wait(self):
+        """
+        Blocks until the caller is allowed to hit the site again.
+        Each caller reserves the next free slot under the lock and then
+        sleeps outside of it, so waiting workers do not block each other.
+        """
+        delay = self._reserve()
+        if delay > 0:
+            time.sleep(delay)
+
+    def _reserve(self):
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot)
+            self._next_slot = slot + self.min_interval
+        return slot - time.monotonic()
+
+    async def wait_async(self):
+        """
+        Same as wait(), but yields to the event loop instead of blocking it.
+        """
+        delay = self._reserve()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    def observe(self, latency, error=False, throttled=False):
+        """
+        Feedback from a finished page load. The fixed-interval limiter ignores it.
+        """
+
+
+class AdaptiveRateLimiter(RateLimiter):
+    def __init__(self, min_interval=5.0, max_interval=60.0, burst=1, target_latency=5.0,
+                 error_threshold=0.2, window=20):
+        """
+        Token-bucket rate limiter that slows down when the site does and speeds up again when it recovers.
+
+        Args:
+            min_interval (float): Fastest allowed pace (seconds per page load); never exceeded. Must be > 0.
+            max_interval (float): Slowest pace it backs off to.
+            burst (int): Page loads that may go out back to back after an idle period.
+            target_latency (float): Smoothed page latency (seconds) above which the site counts as overloaded.
+            error_threshold (float): Error fraction over the last `window` observations that triggers a back-off.
+            window (int): Observations the error rate is computed over.
+        """
+        if min_interval <= 0:
+            raise ValueError("AdaptiveRateLimiter needs min_interval > 0")
+        super().__init__(min_interval)
+        self.max_rate = 1.0 / min_interval
+        self.min_rate = 1.0 / max(max_interval, min_interval)
+        self.rate = self.max_rate  # Page loads per second right now
+        self.burst = max(1, burst)
+        self.target_latency = target_latency
+        self.error_threshold = error_threshold
+
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._recent = deque(maxlen=window)  # True for every error / throttled response
+        self._latency = None                 # Exponentially smoothed latency
+        self._cooldown = max(1, window // 4)  # Observations between two back-offs
+        self._since_change = 0
+
+        # Counters for the run summary
+        self.observations = 0
+        self.errors = 0
+        self.backoffs = 0
+
+    def _refill(self, now):
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def _reserve(self):
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            # Going below zero queues the caller behind the ones already waiting
+            self._tokens -= 1
+            return -self._tokens / self.rate if self._tokens < 0 else 0.0
+
+    def _set_rate(self, rate):
+        # Settle the bucket at the old rate before switching
+        self._refill(time.monotonic())
+        self.rate = min(self.max_rate, max(self.min_rate, rate))
+
+    def observe(self, latency, error=False, throttled=False):
+        """
+        Feedback from a finished page load: halves the rate when the site is slow, failing or
+        throttling us (429/503), and otherwise creeps back up towards the configured maximum.
+
+        Args:
+            latency (float or None): Seconds the page took.
+            error (bool): The load failed or timed out.
+            throttled (bool): The site explicitly asked us to slow down; backs off immediately.
+        """
+        with self._lock:
+            self.observations += 1
+            failed = error or throttled
+            self.errors += failed
+            self._recent.append(failed)
+            if latency is not None:
+                self._latency = latency if self._latency is None else 0.8 * self._latency + 0.2 * latency
+            self._since_change += 1
+
+            error_rate = sum(self._recent) / len(self._recent)
+            overloaded = (throttled
+                          or (len(self._recent) >= self._cooldown and error_rate > self.error_threshold)
+                          or (self._latency is not None and self._latency > self.target_latency))
+            if overloaded:
+                if throttled or self._since_change >= self._cooldown:
+                    self._set_rate(self.rate / 2)
+                    self.backoffs += 1
+                    self._since_change = 0
+                    self._recent.clear()
+            else:
+                self._set_rate(self.rate + self.max_rate / self._recent.maxlen)
+
+    def summary(self):
+        latency = f"{self._latency:.2f}s" if self._latency is not None else "n/a"
+        return (f"{self.rate * 60:.1f}/min now (max {self.max_rate * 60:.1f}/min), {self.backoffs} back-offs, "
+                f"{self.errors}/{self.observations} errors, smoothed latency {latency}")
+
+
+# ------------------------------
+# Retries
+# ------------------------------
+TRANSIENT = "transient"
+PERMANENT = "permanent"
+
+
+def _outcome_of(result):
+    # main.py results are (outcome, row) tuples
+    return result[0] if isinstance(result, tuple) and result else None
+
+
+class RetryQueue:
+    def __init__(self, max_attempts=3, base_delay=2.0, max_delay=60.0, transient_errors=(Exception,),
+                 transient_outcomes=(), permanent_outcomes=(), outcome_of=_outcome_of):
+        """
+        Delayed re-runs of parts that failed for a transient reason.
+
+        Args:
+            max_attempts (int): Attempts per part (1 = no retries).
+            base_delay (float): Backoff before the first retry; doubles with every attempt.
+            max_delay (float): Upper bound of the backoff.
+            transient_errors (tuple): Exception types worth retrying; other exceptions are permanent.
+            transient_outcomes (iterable): Result outcomes worth retrying (e.g. NO_TABLE).
+            permanent_outcomes (iterable): Result outcomes that are final failures (e.g. NAVIGATION_FAILED).
+            outcome_of (callable): Extracts the outcome from a scrape result.
+        """
+        self.max_attempts = max(1, max_attempts)
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.transient_errors = transient_errors
+        self.transient_outcomes = set(transient_outcomes)
+        self.permanent_outcomes = set(permanent_outcomes)
+        self.outcome_of = outcome_of
+
+        self._lock = threading.Lock()
+        self._heap = []  # (due time, sequence, index, part, attempt)
+        self._sequence = itertools.count()
+        self._attempts = {}  # part → attempts it took (for parts that were retried)
+
+        # Counters for the run summary
+        self.retries = 0
+        self.recovered = 0
+        self.gave_up = 0
+        self.permanent = 0
+
+    def classify(self, result, error=None):
+        """
+        Returns TRANSIENT, PERMANENT or None (success) for one attempt.
+        """
+        if error is not None:
+            return TRANSIENT if isinstance(error, self.transient_errors) else PERMANENT
+        outcome = self.outcome_of(result)
+        if outcome in self.transient_outcomes:
+            return TRANSIENT
+        if outcome in self.permanent_outcomes:
+            return PERMANENT
+        return None
+
+    def backoff(self, attempt):
+        """
+        Delay before the given attempt (2, 3, ...): exponential, capped, with "equal jitter"
+        so parts that failed together do not all come back at the same moment.
+        """
+        cap = min(self.max_delay, self.base_delay * 2 ** (attempt - 2))
+        return cap / 2 + random.uniform(0, cap / 2)
+
+    def should_retry(self, part, attempt, result, error=None):
+        """
+        Decides what happens after an attempt and updates the counters.
+
+        Returns:
+            float or None: Backoff in seconds before the next attempt, or None to deliver the result.
+        """
+        kind = self.classify(result, error)
+        with self._lock:
+            if kind == TRANSIENT and attempt < self.max_attempts:
+                self.retries += 1
+                self._attempts[part] = attempt + 1
+                return self.backoff(attempt + 1)
+            if kind is None and attempt > 1:
+                self.recovered += 1
+            elif kind == TRANSIENT:
+                self.gave_up += 1
+            elif kind == PERMANENT:
+                self.permanent += 1
+        return None
+
+    def push(self, index, part, attempt, delay):
+        with self._lock:
+            heapq.heappush(self._heap, (time.monotonic() + delay, next(self._sequence), index, part, attempt))
+
+    def pop_due(self):
+        """
+        Returns the next retry that is due as (index, part, attempt), or None.
+        """
+        with self._lock:
+            if self._heap and self._heap[0][0] <= time.monotonic():
+                _, _, index, part, attempt = heapq.heappop(self._heap)
+                return index, part, attempt
+        return None
+
+    def next_due_in(self):
+        """
+        Seconds until the next retry is due (0 if one is due now), or None if nothing is queued.
+        """
+        with self._lock:
+            return max(0.0, self._heap[0][0] - time.monotonic()) if self._heap else None
+
+    def attempts_for(self, part):
+        """
+        Attempts the part took this run (forgets it).
+        """
+        with self._lock:
+            return self._attempts.pop(part, 1)
+
+    def summary(self):
+        return (f"{self.retries} retries, {self.recovered} parts recovered, {self.gave_up} gave up after "
+                f"{self.max_attempts} attempts, {self.permanent} permanent failures")
+
+
+# ------------------------------
+# Per-worker counters
+# ------------------------------
+class WorkerStats:
+    """
+    Progress and throughput counters for a single worker.
+
+    Attributes:
+        worker_id (int): Worker number.
+        done (int): Parts finished (successfully or not).
+        failed (int): Parts where the scrape function raised.
+        busy_seconds (float): Time spent inside the scrape function.
+    """
+
+    def __init__(self, worker_id):
+        self.worker_id = worker_id
+        self.done = 0
+        self.failed = 0
+        self.busy_seconds = 0.0
+        self.started = time.monotonic()
+
+    def parts_per_minute(self):
+        elapsed = time.monotonic() - self.started
+        return self.done / elapsed * 60 if elapsed > 0 else 0.0
+
+    def summary(self):
+        return (f"worker {self.worker_id}: {self.done} done, {self.failed} failed, "
+                f"{self.parts_per_minute():.1f} parts/min")
+
+
+# ------------------------------
+# Worker pool
+# ------------------------------
+_STOP = object()  # Sentinel telling a worker to exit
+
+
+def run_workers(part_numbers, scrape_fn, on_result, workers=1, progress_every=25, retry_queue=None):
+    """
+    Scrapes all parts on a pool of worker threads and delivers results in input order.
+
+    Args:
+        part_numbers (iterable): Part numbers to process.
+        scrape_fn (callable): scrape_fn(part_number, worker_id) -> dict row. Exceptions are
+                              caught, counted as failures and reported as a None row.
+        on_result (callable): on_result(index, part_number, row), always called from the
+                              calling thread and in input order.
+        workers (int): Number of worker threads.
+        progress_every (int): Print a progress line after this many finished parts.
+        retry_queue (RetryQueue, optional): Transient failures are re-run after a backoff
+                                            (by whichever worker is free) instead of delivered.
+
+    Returns:
+        list[WorkerStats]: Counters for every worker.
+    """
+    work = queue.Queue(maxsize=workers * 2)   # Bounded so a huge input is not queued all at once
+    results = queue.Queue()
+    stats = [WorkerStats(i) for i in range(workers)]
+
+    def next_item():
+        # Due retries first, then new work; never sleep past the next retry's due time
+        if retry_queue is None:
+            return work.get()
+        while True:
+            item = retry_queue.pop_due()
+            if item is not None:
+                return item
+            wait = retry_queue.next_due_in()
+            try:
+                return work.get(timeout=min(wait, 0.5) if wait is not None else 0.5)
+            except queue.Empty:
+                continue
+
+    def worker_loop(worker_stats):
+        while True:
+            item = next_item()
+            if item is _STOP:
+                return
+            index, part, attempt = item
+            started = time.monotonic()
+            error = None
+            try:
+                row = scrape_fn(part, worker_stats.worker_id)
+            except Exception as e:
+                error, row = e, None
+            worker_stats.busy_seconds += time.monotonic() - started
+
+            delay = retry_queue.should_retry(part, attempt, row, error) if retry_queue else None
+            if delay is not None:
+                reason = f"{type(error).__name__}: {error}" if error else _outcome_of(row)
+                print(f"[RETRY] '{part}' failed ({reason}); attempt {attempt + 1} in {delay:.1f}s")
+                retry_queue.push(index, part, attempt + 1, delay)
+                continue
+            if error is not None:
+                print(f"[ERROR] Worker {worker_stats.worker_id} failed on '{part}': {error}")
+                worker_stats.failed += 1
+            worker_stats.done += 1
+            results.put((index, part, row))
+
+    threads = [threading.Thread(target=worker_loop, args=(s,), daemon=True) for s in stats]
+    for t in threads:
+        t.start()
+
+    # Results that finished early wait here until every earlier index is written
+    pending = {}
+    next_index = 0
+    submitted = 0
+    run_started = time.monotonic()
+
+    def drain(block):
+        nonlocal next_index
+        try:
+            while True:
+                index, part, row = results.get(block=block, timeout=0.5 if block else None)
+                pending[index] = (part, row)
+                block = False  # Only block for the first result, then drain whatever is ready
+        except queue.Empty:
+            pass
+        while next_index in pending:
+            part, row = pending.pop(next_index)
+            on_result(next_index, part, row)
+            next_index += 1
+            if next_index % progress_every == 0:
+                elapsed = time.monotonic() - run_started
+                rate = next_index / elapsed * 60 if elapsed > 0 else 0.0
+                print(f"[PROGRESS] {next_index} parts written, {rate:.1f} parts/min overall")
+                for s in stats:
+                    print(f"[PROGRESS]   {s.summary()}")
+
+    # Feed the queue while writing out whatever has finished in the meantime
+    for index, part in enumerate(part_numbers):
+        while True:
+            try:
+                work.put((index, part, 1), timeout=0.5)
+                break
+            except queue.Full:
+                drain(block=False)
+        submitted += 1
+        drain(block=False)
+
+    # Retries are re-run by the workers, so they may only stop once every result is in
+    while next_index < submitted:
+        drain(block=True)
+    for _ in threads:
+        work.put(_STOP)
+    for t in threads:
+        t.join()
+
+    for s in stats:
+        print(f"[INFO] {s.summary()}")
+    return stats
+
+
+# ------------------------------
+# Coroutine workers
+# ------------------------------
+async def run_async_workers(part_numbers, scrape_coro, on_result, concurrency=8, progress_every=25,
+                            retry_queue=None):
+    """
+    Async counterpart of run_workers(): keeps up to `concurrency` scrape coroutines
+    in flight on the running event loop and delivers results in input order.
+
+    Args:
+        part_numbers (iterable): Part numbers to process.
+        scrape_coro (callable): async scrape_coro(part_number) -> row. Exceptions are caught,
+                                counted as failures and reported as a None row.
+        on_result (callable): on_result(index, part_number, row), called in input order.
+        concurrency (int): Maximum number of parts in flight.
+        progress_every (int): Print a progress line after this many finished parts.
+        retry_queue (RetryQueue, optional): Transient failures are re-run after a backoff instead of delivered;
+                                            a part sleeping until its retry does not count against concurrency.
+
+    Returns:
+        WorkerStats: Counters for the whole loop (worker id 0).
+    """
+    stats = WorkerStats(0)
+    pending = {}
+    next_index = 0
+    in_flight = set()
+    sleeping = 0  # Tasks in flight that are only waiting for their retry backoff
+
+    async def run_one(index, part, attempt=1, delay=0.0):
+        nonlocal sleeping
+        if delay:
+            sleeping += 1
+            try:
+                await asyncio.sleep(delay)
+            finally:
+                sleeping -= 1
+        started = time.monotonic()
+        error = None
+        try:
+            row = await scrape_coro(part)
+        except Exception as e:
+            error, row = e, None
+        stats.busy_seconds += time.monotonic() - started
+
+        retry_delay = retry_queue.should_retry(part, attempt, row, error) if retry_queue else None
+        if retry_delay is not None:
+            reason = f"{type(error).__name__}: {error}" if error else _outcome_of(row)
+            print(f"[RETRY] '{part}' failed ({reason}); attempt {attempt + 1} in {retry_delay:.1f}s")
+            return index, part, None, (attempt + 1, retry_delay)
+        if error is not None:
+            print(f"[ERROR] Async scrape failed on '{part}': {error}")
+            stats.failed += 1
+        stats.done += 1
+        return index, part, row, None
+
+    def collect(done):
+        nonlocal next_index
+        for task in done:
+            index, part, row, retry = task.result()
+            if retry:
+                in_flight.add(asyncio.create_task(run_one(index, part, *retry)))
+                continue
+            pending[index] = (part, row)
+        while next_index in pending:
+            part, row = pending.pop(next_index)
+            on_result(next_index, part, row)
+            next_index += 1
+            if next_index % progress_every == 0:
+                print(f"[PROGRESS] {next_index} parts written, {stats.parts_per_minute():.1f} parts/min overall")
+
+    async def wait_some():
+        done, _ = await asyncio.wait(in_flight, return_when=asyncio.FIRST_COMPLETED)
+        in_flight.difference_update(done)
+        collect(done)
+
+    for index, part in enumerate(part_numbers):
+        while len(in_flight) - sleeping >= concurrency:
+            await wait_some()
+        in_flight.add(asyncio.create_task(run_one(index, part)))
+
+    while in_flight:
+        await wait_some()
+
+    print(f"[INFO] {stats.summary()}")
+    return stats
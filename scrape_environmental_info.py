@@ -86,5 +86,10 @@ def scrape_environmental_table(html: str, full_html: str = "") -> dict:
         if datasheet_link and datasheet_link.get("href"):
             result["datasheet_link"] = datasheet_link["href"]
 
+    # Free the parse trees right away (BeautifulSoup trees are reference cycles the GC only finds later)
+    soup.decompose()
+    if full_soup:
+        full_soup.decompose()
+
     # Return the compiled dictionary of results
     return result
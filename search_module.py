@@ -13,8 +13,17 @@ from selenium.webdriver.common.keys import Keys              # For sending keybo
 from selenium.webdriver.common.action_chains import ActionChains  # For complex mouse/keyboard actions
 from selenium.webdriver.support.ui import WebDriverWait      # For waiting until conditions are met
 from selenium.webdriver.support import expected_conditions as EC  # Predefined wait conditions
+from selenium.common.exceptions import TimeoutException      # Raised when a wait expires
 
-def type_into_search(driver, text, timeout=10):
+from run_metrics import timed  # Per-stage timing (no-op without metrics)
+
+SEARCH_INPUT_SELECTOR = '[data-testid="mega-menu-search-input"]'
+
+# Accept buttons of the cookie consent banner (OneTrust on the live site, a plain button on the mock site)
+CONSENT_ACCEPT_SELECTORS = ["#onetrust-accept-btn-handler", '[data-testid="consent-accept"]']
+
+
+def type_into_search(driver, text, timeout=10, keystroke_delay=0.05, results_wait=None):
     """
     Click into the Littelfuse search input, clear any existing text,
     type the given search text, submit it, and then click away from the
@@ -24,13 +33,16 @@ def type_into_search(driver, text, timeout=10):
         driver (WebDriver): Selenium WebDriver instance controlling the browser.
         text (str): The search term to type into the search input field.
         timeout (int, optional): Maximum time to wait for the search input to appear. Default is 10 seconds.
+        keystroke_delay (float, optional): Pause between keystrokes. 0 sends the whole text at once.
+        results_wait (callable, optional): Called after submitting to wait for the results page
+                                           (e.g. ReadinessWaiter.wait_for). Defaults to a fixed 3s sleep.
 
     Behavior:
         1. Waits for the search input to be visible.
         2. Clicks into it and clears any pre-existing text.
-        3. Types the provided search text character-by-character.
+        3. Types the provided search text (character-by-character if keystroke_delay > 0).
         4. Submits the search with ENTER.
-        5. Waits briefly for results to load.
+        5. Waits for results to load.
         6. Clicks away to a random position on the page to hide search suggestions.
     """
     try:
@@ -38,7 +50,7 @@ def type_into_search(driver, text, timeout=10):
         search_input = WebDriverWait(driver, timeout).until(
             EC.visibility_of_element_located((
                 By.CSS_SELECTOR,  # CSS selector used here to target element by attribute
-                '[data-testid="mega-menu-search-input"]'
+                SEARCH_INPUT_SELECTOR
             ))
         )
 
@@ -51,18 +63,29 @@ def type_into_search(driver, text, timeout=10):
         search_input.send_keys(Keys.BACKSPACE)     # Delete selection
 
         # --- Step 4: Type search text ---
-        for char in text:
-            search_input.send_keys(char)
-            time.sleep(0.05)  # Slight delay between keystrokes for realism
+        if keystroke_delay:
+            for char in text:
+                search_input.send_keys(char)
+                time.sleep(keystroke_delay)  # Slight delay between keystrokes for realism
+        else:
+            search_input.send_keys(text)
 
         # --- Step 5: Submit search ---
         search_input.send_keys(Keys.ENTER)
         print(f"[INFO] Typed and submitted: '{text}'")
 
         # --- Step 6: Wait for results ---
-        # Currently using a fixed sleep; could be replaced with explicit wait for specific element
-        time.sleep(3)
+        if results_wait:
+            results_wait()
+        else:
+            time.sleep(3)
+
+    except Exception as e:
+        # Let the caller decide: timeouts / stale elements are retried, anything else fails the part
+        print(f"[ERROR] Failed in search interaction: {e}")
+        raise
 
+    try:
         # --- Step 7: Click away to dismiss dropdown ---
         actions = ActionChains(driver)
 
@@ -77,5 +100,65 @@ def type_into_search(driver, text, timeout=10):
         print(f"[INFO] Clicked away at offset ({x_offset}, {y_offset})")
 
     except Exception as e:
-        # Catch any error during the search process
-        print(f"[ERROR] Failed in search interaction: {e}")
+        # Purely cosmetic; the results are already there
+        print(f"[WARN] Could not click away from the search box: {e}")
+
+
+def search_from_homepage(driver, url, text, waiter):
+    """
+    Loads the homepage and runs a typed search for the given text, waiting for
+    page signals instead of fixed sleeps.
+
+    Args:
+        driver (WebDriver): Selenium WebDriver instance controlling the browser.
+        url (str): Site homepage.
+        text (str): The search term.
+        waiter (ReadinessWaiter): Page-readiness waiter bound to the driver. If it belongs to a warm
+                                  session tab, the search starts from the page the tab is already on
+                                  (every page has the mega-menu search box) instead of the homepage.
+
+    Raises:
+        TimeoutException: If the results page shows none of its signals in time (worth a retry).
+    """
+    if waiter.tab is not None and search_box_ready(driver):
+        if waiter.metrics:
+            waiter.metrics.count("homepage", "skipped")
+    else:
+        # Load homepage and wait until the search box is usable
+        with timed(waiter.metrics, "driver_get"):
+            driver.get(url)
+        driver.set_window_size(1920, 1080)
+        waiter.wait_for("homepage")
+
+    # Search for the part number and wait for one of the result-page signals. A warm tab starts from the
+    # previous part's page, which already shows them, so only the page the search loads counts
+    current_page = (driver.find_element(By.TAG_NAME, "html"), driver.current_url)
+    with timed(waiter.metrics, "type_into_search"):
+        type_into_search(driver, text, keystroke_delay=0,
+                         results_wait=lambda: waiter.wait_for("search_results", required=True, after=current_page))
+
+
+def search_box_ready(driver):
+    """
+    True if the current page shows the mega-menu search input (no waiting).
+    """
+    boxes = driver.find_elements(By.CSS_SELECTOR, SEARCH_INPUT_SELECTOR)
+    return bool(boxes) and boxes[0].is_displayed()
+
+
+def dismiss_consent(driver, timeout=3):
+    """
+    Accepts the cookie consent banner if one shows up within the timeout. The choice is stored
+    in a cookie, so this is needed once per browser profile, not once per tab or page.
+
+    Returns:
+        bool: True if a banner was accepted.
+    """
+    try:
+        button = WebDriverWait(driver, timeout).until(EC.any_of(
+            *(EC.element_to_be_clickable((By.CSS_SELECTOR, selector)) for selector in CONSENT_ACCEPT_SELECTORS)))
+        button.click()
+        print("[INFO] Accepted the cookie consent banner")
+        return True
+    except TimeoutException:
+        return False
@@ -0,0 +1,128 @@
+# series_batcher.py
+# -----------------
+# Series-level deduplication. Many input parts belong to the same series, and
+# a series page (or any page with a multi-row environmental table) lists the
+# environmental data of every part in it. In batching mode we:
+#   1. parse every row of every page we load, not just the first one,
+#   2. follow each product page's "View Series" link once per series,
+#   3. keep the rows of parts that are still waiting in the input,
+# so when such a part comes up it is filled in without loading anything.
+
+import threading
+from collections import OrderedDict
+from urllib.parse import urljoin
+
+from resolution_cache import normalize_part
+
+
+class SeriesHarvest:
+    def __init__(self, pending_parts=None, max_rows=50_000, matcher=None):
+        """
+        Initialize the harvest.
+
+        Args:
+            pending_parts (iterable, optional): Part numbers still to be processed. If given,
+                                                only rows for these parts are kept. With a
+                                                streamed input pass None: every row is kept.
+            max_rows (int): Upper bound on kept rows; the oldest are dropped first.
+            matcher (PartMatcher, optional): Also keep each row for the input parts it matches
+                                             fuzzily (punctuation, packaging suffix).
+        """
+        self._lock = threading.Lock()
+        self._pending = {normalize_part(p) for p in pending_parts} if pending_parts is not None else None
+        self._taken = set()
+        self._rows = OrderedDict()   # normalized part → (data dict, source URL, row HTML hash)
+        self._fuzzy = set()          # keys in _rows filled from another part's row (fuzzy match)
+        self.max_rows = max_rows
+        self.matcher = matcher
+        self._visited_series = set()
+
+        # Counters for the run summary
+        self.series_pages_loaded = 0
+        self.parts_harvested = 0
+        self.parts_served = 0
+
+    # ------------------------------
+    # Collecting rows
+    # ------------------------------
+    def collect(self, extraction, source_url):
+        """
+        Stores every environmental row on a parsed page that belongs to a pending part.
+
+        Args:
+            extraction (PageExtraction): Parsed page.
+            source_url (str): URL the page was loaded from (remembered as the part's landing page).
+
+        Returns:
+            int: Number of newly harvested parts.
+        """
+        # Index lookups happen outside the lock; they only read the (already built) index
+        row_keys = []
+        for index, row in enumerate(extraction.rows):
+            exact = normalize_part(row.part_number or "")
+            row_keys.append((index, exact, True))
+            if self.matcher and row.part_number:
+                row_keys += [(index, normalize_part(part), False) for part, _, _ in
+                             self.matcher.index.lookup(row.part_number, self.matcher.threshold)
+                             if normalize_part(part) != exact]
+
+        added = 0
+        with self._lock:
+            for index, key, exact in row_keys:
+                if not key or key in self._taken:
+                    continue
+                if self._pending is not None and key not in self._pending:
+                    continue
+                if key in self._rows:
+                    # The part's own row always wins over a fuzzy match; first come otherwise
+                    if not exact or key not in self._fuzzy:
+                        continue
+                else:
+                    added += 1
+                self._rows[key] = (extraction.to_dict(index), source_url, extraction.row_hash(index))
+                if exact:
+                    self._fuzzy.discard(key)
+                else:
+                    self._fuzzy.add(key)
+            while len(self._rows) > self.max_rows:
+                self._fuzzy.discard(self._rows.popitem(last=False)[0])
+            self.parts_harvested += added
+        return added
+
+    def series_page_to_load(self, extraction, page_url):
+        """
+        Returns the absolute series page URL linked from this page if it was not
+        loaded yet (and marks it as loaded), otherwise None.
+        """
+        if not extraction.series_link:
+            return None
+        series_url = urljoin(page_url, extraction.series_link)
+        with self._lock:
+            if series_url in self._visited_series:
+                return None
+            self._visited_series.add(series_url)
+            self.series_pages_loaded += 1
+        return series_url
+
+    # ------------------------------
+    # Serving rows
+    # ------------------------------
+    def take(self, part):
+        """
+        Returns (data, source_url, row_hash) for a harvested part and forgets it, or None.
+        The part is also no longer considered pending.
+        """
+        key = normalize_part(part)
+        with self._lock:
+            self._taken.add(key)
+            if self._pending is not None:
+                self._pending.discard(key)
+            harvested = self._rows.pop(key, None)
+            self._fuzzy.discard(key)
+            if harvested:
+                self.parts_served += 1
+        return harvested
+
+    def summary(self):
+        return (f"{self.series_pages_loaded} series pages loaded, {self.parts_harvested} parts harvested, "
+                f"{self.parts_served} served without a page load")
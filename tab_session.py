@@ -0,0 +1,347 @@
+# tab_session.py
+# --------------
+# Warm multi-tab browser sessions for the Selenium engine.
+#
+# The plain driver pool gives every worker its own browser and every part
+# starts with a homepage load. In session mode each browser is warmed up once
+# (homepage loaded, cookie consent accepted, cookies and cache in place) and
+# then serves several tabs, one worker thread per tab:
+#   - every part searches from the page its tab is already on (the site header
+#     has the search box on every page), so the homepage is loaded once per tab,
+#   - Selenium talks to one window at a time, so a tab takes the browser lock
+#     and switches to its window while it issues commands, and hands the
+#     browser to the other tabs while it waits for its page to render,
+#   - a tab that hangs or errors is closed and replaced by a fresh one; the
+#     browser, its cookies and the other tabs carry on. Only a browser that
+#     died as a whole is relaunched.
+#   - a browser that served --max-pages-per-browser parts or grew past the
+#     memory limit is drained: its tabs finish their parts, new parts go to a
+#     freshly launched browser, and the old one quits when its last tab is back.
+#
+# TabPool has the same acquire/release/session/close interface as DriverPool.
+
+import queue
+import threading
+from contextlib import contextmanager
+
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.common.exceptions import WebDriverException, TimeoutException
+
+from driver_pool import create_driver
+from page_readiness import SEARCH_INPUT
+from run_metrics import timed
+from search_module import dismiss_consent
+
+
+class SessionBrowser:
+    """
+    One warm browser shared by several tabs.
+
+    Attributes:
+        driver: Selenium WebDriver instance.
+        slot (int): Browser number, handy for log lines.
+        lock (threading.Lock): Held by the tab currently talking to the browser.
+        current (str): Window handle Selenium is switched to.
+        alive (bool): False once the browser process is found dead (or was quit after a drain).
+        pages_served (int): Parts served by all tabs of this browser.
+        in_use (int): Tabs of this browser currently acquired by a worker.
+        retiring (str): Why the browser is being drained, or None.
+    """
+
+    def __init__(self, driver, slot):
+        self.driver = driver
+        self.slot = slot
+        self.lock = threading.Lock()
+        self.current = driver.current_window_handle
+        self.alive = True
+        self.pages_served = 0
+        self.in_use = 0
+        self.retiring = None
+
+
+class SessionTab:
+    """
+    One tab of a SessionBrowser, used by one worker at a time.
+    Has the same attributes as PooledDriver (driver, wait, slot, pages_served).
+    """
+
+    shared = True  # Needs active() around its commands and a ReadinessWaiter with tab=self
+
+    def __init__(self, browser, handle, index, wait_timeout):
+        self.browser = browser
+        self.driver = browser.driver
+        self.handle = handle
+        self.index = index
+        self.slot = f"{browser.slot}.{index}"
+        self.wait = WebDriverWait(self.driver, wait_timeout)
+        self.pages_served = 0
+        self.rss_mb = 0.0  # Latest memory sample of the whole browser (ResourceGovernor)
+
+    def _switch(self):
+        if self.browser.current != self.handle:
+            self.driver.switch_to.window(self.handle)
+            self.browser.current = self.handle
+
+    @contextmanager
+    def active(self):
+        """
+        Takes the browser and switches it to this tab for the duration of the block.
+        """
+        with self.browser.lock:
+            self._switch()
+            yield self
+
+    @contextmanager
+    def paused(self):
+        """
+        Inside active(): lets the other tabs use the browser while this one only waits.
+        """
+        self.browser.lock.release()
+        try:
+            yield
+        finally:
+            self.browser.lock.acquire()
+            self._switch()
+
+
+class TabPool:
+    def __init__(self, url, browsers=1, tabs=4, headless=True, max_pages_per_browser=200, wait_timeout=10,
+                 metrics=None, resource_filter=None, performance_log=False, governor=None):
+        """
+        Initialize the tab pool (browsers are launched and warmed up lazily).
+
+        Args:
+            url (str): Site homepage, loaded once per tab to warm it up.
+            browsers (int): Number of browsers.
+            tabs (int): Tabs per browser; run one worker thread per tab.
+            headless (bool): Launch the browsers in headless mode.
+            max_pages_per_browser (int): Drain and relaunch a browser after all its tabs together served
+                                         this many parts (0 disables it).
+            wait_timeout (int): Timeout (seconds) for the WebDriverWait attached to each tab.
+            metrics (RunMetrics, optional): Records browser launch and warm-up times.
+            resource_filter (ResourceFilter, optional): Applied to every browser the pool launches.
+            performance_log (bool): Launch browsers with the performance (network) log enabled.
+            governor (ResourceGovernor, optional): Drain and relaunch a browser when its latest memory
+                                                   sample is over the limit.
+        """
+        self.url = url
+        self.size = browsers * tabs
+        self.tabs_per_browser = tabs
+        self.headless = headless
+        self.max_pages_per_browser = max_pages_per_browser
+        self.wait_timeout = wait_timeout
+        self.metrics = metrics
+        self.resource_filter = resource_filter
+        self.performance_log = performance_log
+        self.governor = governor
+
+        self._browsers = [None] * browsers
+        self._browser_locks = [threading.Lock() for _ in range(browsers)]
+        self._lock = threading.Lock()  # Guards the in_use / retiring bookkeeping of every browser
+        self._draining = set()         # Retired browsers that still have tabs in use
+
+        # Every tab starts empty (None) and is opened on first acquire
+        self._idle = queue.Queue()
+        for index in range(tabs):
+            for slot in range(browsers):
+                self._idle.put((slot, index, None))
+
+        self._closed = False
+        self.launched = 0
+        self.relaunched = 0
+        self.tabs_opened = 0
+        self.tabs_reset = 0
+        self.browsers_recycled = 0
+
+    # ------------------------------
+    # Browser and tab lifecycle
+    # ------------------------------
+    def _browser(self, slot):
+        # Launch (or relaunch) the slot's browser and warm it up; tabs of a dead browser all end up here
+        with self._browser_locks[slot]:
+            browser = self._browsers[slot]
+            if browser is not None and browser.alive and not browser.retiring:
+                return browser, False
+            if browser is not None:
+                if not browser.retiring:
+                    self._quit(browser)  # A retiring browser is quit by release() once drained
+                self.relaunched += 1
+            with timed(self.metrics, "driver_create"):
+                driver = create_driver(headless=self.headless, resource_filter=self.resource_filter,
+                                       performance_log=self.performance_log)
+            browser = SessionBrowser(driver, slot)
+            with browser.lock:
+                self._warm_up(browser)
+            self._browsers[slot] = browser
+            self.launched += 1
+            print(f"[INFO] Session browser {slot}: launched and warmed up.")
+            return browser, True
+
+    def _warm_up(self, browser):
+        # Homepage once, consent banner once: the cookies then cover every tab of this browser
+        with timed(self.metrics, "session_warmup"):
+            browser.driver.get(self.url)
+            browser.driver.set_window_size(1920, 1080)
+            dismiss_consent(browser.driver)
+            self._wait_for_search_box(browser.driver)
+
+    def _wait_for_search_box(self, driver):
+        try:
+            WebDriverWait(driver, self.wait_timeout).until(EC.visibility_of_element_located(SEARCH_INPUT))
+        except TimeoutException:
+            print("[WARN] Search box not visible after warm-up; parts on this tab start from the homepage.")
+
+    def _open_tab(self, slot, index):
+        browser, fresh = self._browser(slot)
+        with browser.lock:
+            if fresh and index == 0:
+                # The launch window is already warm
+                handle = browser.driver.current_window_handle
+            else:
+                with timed(self.metrics, "session_warmup"):
+                    browser.driver.switch_to.new_window("tab")
+                    browser.current = browser.driver.current_window_handle
+                    browser.driver.get(self.url)
+                    self._wait_for_search_box(browser.driver)
+                handle = browser.current
+        self.tabs_opened += 1
+        return SessionTab(browser, handle, index, self.wait_timeout)
+
+    def _close_tab(self, tab):
+        browser = tab.browser
+        with browser.lock:
+            try:
+                if len(browser.driver.window_handles) > 1:
+                    tab._switch()
+                    browser.driver.close()
+                    browser.current = None
+                else:
+                    # Never close the last window (that quits the browser): just leave the page
+                    tab._switch()
+                    browser.driver.get("about:blank")
+            except WebDriverException as e:
+                print(f"[WARN] Session tab {tab.slot}: error while closing: {e}")
+
+    def _is_alive(self, browser):
+        """
+        Cheap liveness probe of the whole browser (not of one tab).
+        """
+        try:
+            with browser.lock:
+                browser.driver.window_handles
+            return True
+        except WebDriverException:
+            return False
+
+    def _quit(self, browser):
+        try:
+            browser.driver.quit()
+        except Exception as e:
+            print(f"[WARN] Session browser {browser.slot}: error while closing browser: {e}")
+
+    def acquire(self, timeout=None):
+        """
+        Takes a tab out of the pool, opening a new one (and launching its browser) if needed.
+
+        Args:
+            timeout (float, optional): Seconds to wait for a free tab. None waits forever.
+
+        Returns:
+            SessionTab: A warm tab.
+        """
+        if self._closed:
+            raise RuntimeError("TabPool is closed")
+
+        slot, index, tab = self._idle.get(timeout=timeout)
+        try:
+            while True:
+                if tab is None:
+                    tab = self._open_tab(slot, index)
+                with self._lock:
+                    if tab.browser.alive and not tab.browser.retiring:
+                        tab.browser.in_use += 1
+                        return tab
+                # Its browser died or is being drained → a new tab on the slot's current browser
+                tab = None
+        except Exception:
+            # Give the empty tab back so the pool does not shrink on a failed launch
+            self._idle.put((slot, index, None))
+            raise
+
+    def release(self, tab, healthy=True):
+        """
+        Returns a tab to the pool.
+
+        Args:
+            tab (SessionTab): The tab previously returned by acquire().
+            healthy (bool): False if the caller hit a crash or a hang; the tab is then replaced,
+                            and the browser relaunched only if it died as a whole.
+        """
+        browser = tab.browser
+        tab.pages_served += 1
+        too_big = (self.governor.browser_over_limit(tab.rss_mb)
+                   if self.governor and healthy and not browser.retiring else None)
+        with self._lock:
+            browser.pages_served += 1
+            browser.in_use -= 1
+            worn_out = self.max_pages_per_browser and browser.pages_served >= self.max_pages_per_browser
+            if not self._closed and browser.alive and not browser.retiring and (worn_out or too_big):
+                browser.retiring = too_big or f"served {browser.pages_served} pages"
+                self._draining.add(browser)
+                print(f"[INFO] Session browser {browser.slot}: draining for a relaunch ({browser.retiring}).")
+            drained = browser.retiring and browser.in_use == 0 and browser in self._draining
+            if drained:
+                self._draining.discard(browser)
+                browser.alive = False
+
+        if self._closed:
+            self._idle.put((browser.slot, tab.index, tab))
+        elif browser.retiring:
+            if drained:
+                # Last tab of the retired browser is back: the slot already runs (or launches) a new one
+                print(f"[INFO] Session browser {browser.slot}: drained, quitting it.")
+                self._quit(browser)
+                self.browsers_recycled += 1
+            self._idle.put((browser.slot, tab.index, None))
+        elif not healthy:
+            if not self._is_alive(browser):
+                print(f"[WARN] Session browser {browser.slot}: browser died, relaunching on next use.")
+                browser.alive = False
+            else:
+                print(f"[INFO] Session tab {tab.slot}: replacing tab (wedged).")
+                self._close_tab(tab)
+                self.tabs_reset += 1
+            self._idle.put((browser.slot, tab.index, None))
+        else:
+            self._idle.put((browser.slot, tab.index, tab))
+
+    @contextmanager
+    def session(self, timeout=None):
+        """
+        Context manager wrapper around acquire()/release().
+        Any WebDriverException raised inside the block marks the tab as wedged.
+        """
+        tab = self.acquire(timeout=timeout)
+        healthy = True
+        try:
+            yield tab
+        except WebDriverException:
+            healthy = False
+            raise
+        finally:
+            self.release(tab, healthy=healthy)
+
+    def close(self):
+        """
+        Quits every browser. Call once at the end of the run.
+        """
+        self._closed = True
+        with self._lock:
+            browsers = [b for b in self._browsers if b is not None] + list(self._draining - set(self._browsers))
+            self._draining.clear()
+        for browser in browsers:
+            self._quit(browser)
+        print(f"[INFO] Tab pool closed ({self.launched} browsers launched, {self.relaunched} relaunched, "
+              f"{self.browsers_recycled} drained and recycled, {self.tabs_opened} tabs opened, "
+              f"{self.tabs_reset} reset).")
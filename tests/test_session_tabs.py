@@ -0,0 +1,56 @@
+# tests/test_session_tabs.py
+# --------------------------
+# End-to-end check of warm session tabs against mock_site.py: a tab searches
+# from the page the previous part left it on, so the results wait must not
+# take that page's signals for the new search. Needs Chrome and chromedriver;
+# skipped when no browser can be launched.
+#
+# Usage:
+#   python -m pytest -q tests/
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from main import scrape_part                     # noqa: E402
+from mock_site import start_mock_site            # noqa: E402
+from outcomes import OK                          # noqa: E402
+from page_readiness import ReadinessWaiter       # noqa: E402
+from tab_session import TabPool                  # noqa: E402
+
+
+@pytest.fixture(scope="module")
+def site():
+    server, base_url = start_mock_site()
+    yield base_url
+    server.shutdown()
+
+
+@pytest.fixture(scope="module")
+def pool(site):
+    pool = TabPool(site, browsers=1, tabs=1)
+    try:
+        pool.release(pool.acquire(timeout=60))
+    except Exception as e:
+        pool.close()
+        pytest.skip(f"No browser available: {e}")
+    yield pool
+    pool.close()
+
+
+def scrape_on_tab(pool, site, part):
+    with pool.session() as tab, tab.active():
+        waiter = ReadinessWaiter(tab.driver, tab=tab)
+        outcome, data, _ = scrape_part(tab.driver, tab.wait, part, site, waiter=waiter)
+    return outcome, data
+
+
+def test_consecutive_parts_on_one_tab(pool, site):
+    # The second search starts on the first part's product page, which already has a "Part Number" cell
+    for part in ("0451.500NRL", "0233001.MXP"):
+        outcome, data = scrape_on_tab(pool, site, part)
+        assert outcome == OK, f"{part}: {outcome}"
+        assert data["part_number"].lower() == part.lower()
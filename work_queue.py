@@ -0,0 +1,459 @@
+# work_queue.py
+# -------------
+# Distributed runs: a shared work queue of leased shards in one SQLite file.
+# The coordinator splits the input into shards of N parts; any number of
+# `main.py --queue` workers, on this machine or on others that mount the same
+# storage, claim a shard, keep its lease alive while they work on it and
+# hand back the results. A worker that dies stops renewing, its lease
+# expires and the next worker that asks for work gets the shard instead.
+# Results are stored per shard and exported in input order at the end.
+#
+# The file uses SQLite's rollback journal (not WAL: WAL needs shared memory,
+# which network filesystems do not provide) and short IMMEDIATE transactions,
+# so claims are atomic across processes and hosts.
+#
+# Usage:
+#   python work_queue.py create shards.sqlite --input input.csv --shard-size 50
+#   python main.py --queue shards.sqlite --http-first       # on every node, as many as you like
+#   python work_queue.py status shards.sqlite --watch 10
+#   python work_queue.py export shards.sqlite output.csv
+
+import argparse
+import csv
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+from part_stream import iter_part_numbers
+
+PENDING = "pending"
+LEASED = "leased"
+DONE = "done"
+FAILED = "failed"   # Claimed max_attempts times without ever being completed
+
+
+def default_worker_id():
+    return f"{socket.gethostname()}-{os.getpid()}"
+
+
+class ShardQueue:
+    def __init__(self, path, busy_timeout=60):
+        """
+        Open (or create) a shard queue.
+
+        Args:
+            path (str): SQLite file, on storage every worker can reach.
+            busy_timeout (float): Seconds to wait for another process's transaction to finish.
+        """
+        self.path = path
+        self._lock = threading.Lock()
+        self._settings = {}
+
+        # Autocommit mode; every write is an explicit short transaction
+        self._db = sqlite3.connect(path, timeout=busy_timeout, isolation_level=None, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=DELETE")
+        self._db.execute("""
+            CREATE TABLE IF NOT EXISTS shards (
+                id INTEGER PRIMARY KEY,
+                parts_json TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                status TEXT NOT NULL,
+                owner TEXT,
+                lease_until REAL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                finished_at REAL
+            )""")
+        self._db.execute("CREATE INDEX IF NOT EXISTS idx_shards_status ON shards(status, id)")
+        self._db.execute("""
+            CREATE TABLE IF NOT EXISTS results (
+                shard_id INTEGER NOT NULL,
+                seq INTEGER NOT NULL,
+                part TEXT NOT NULL,
+                outcome TEXT NOT NULL,
+                row_json TEXT,
+                PRIMARY KEY (shard_id, seq)
+            )""")
+        self._db.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+
+    def _transaction(self):
+        # BEGIN IMMEDIATE takes the write lock up front, so two workers never claim the same shard
+        self._db.execute("BEGIN IMMEDIATE")
+
+    def meta(self, key, default=None):
+        with self._lock:
+            row = self._db.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return json.loads(row[0]) if row else default
+
+    def _setting(self, key, default):
+        # Settings are written once by create(); read them once per process
+        if key not in self._settings:
+            self._settings[key] = self.meta(key, default)
+        return self._settings[key]
+
+    @property
+    def lease_seconds(self):
+        return self._setting("lease_seconds", 300)
+
+    @property
+    def max_attempts(self):
+        return self._setting("max_attempts", 3)
+
+    # ------------------------------
+    # Coordinator
+    # ------------------------------
+    def create(self, part_numbers, shard_size=50, lease_seconds=300, max_attempts=3):
+        """
+        Splits a part stream into pending shards.
+
+        Returns:
+            tuple: (shards created, parts queued)
+        """
+        with self._lock:
+            if self._db.execute("SELECT COUNT(*) FROM shards").fetchone()[0]:
+                raise RuntimeError(f"{self.path} already holds shards; use a new queue file")
+            self._transaction()
+            try:
+                for key, value in (("lease_seconds", lease_seconds), ("max_attempts", max_attempts),
+                                   ("shard_size", shard_size), ("created_at", time.time())):
+                    self._db.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, json.dumps(value)))
+                shards = parts = 0
+                batch = []
+                for part in part_numbers:
+                    batch.append(part)
+                    if len(batch) >= shard_size:
+                        self._insert_shard(batch)
+                        shards, parts = shards + 1, parts + len(batch)
+                        batch = []
+                if batch:
+                    self._insert_shard(batch)
+                    shards, parts = shards + 1, parts + len(batch)
+                self._db.execute("COMMIT")
+            except Exception:
+                self._db.execute("ROLLBACK")
+                raise
+        return shards, parts
+
+    def _insert_shard(self, parts):
+        self._db.execute("INSERT INTO shards (parts_json, size, status) VALUES (?, ?, ?)",
+                         (json.dumps(parts, ensure_ascii=False), len(parts), PENDING))
+
+    def status(self):
+        """
+        Returns:
+            dict: Shard counts per status, parts done, and the live leases {owner: seconds left}.
+        """
+        now = time.time()
+        with self._lock:
+            counts = dict(self._db.execute("SELECT status, COUNT(*) FROM shards GROUP BY status").fetchall())
+            parts_total = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM shards").fetchone()[0]
+            parts_done = self._db.execute("SELECT COUNT(*) FROM results").fetchone()[0]
+            leases = self._db.execute("SELECT owner, lease_until FROM shards WHERE status = ?", (LEASED,)).fetchall()
+        return {
+            "shards": {s: counts.get(s, 0) for s in (PENDING, LEASED, DONE, FAILED)},
+            "parts_total": parts_total,
+            "parts_done": parts_done,
+            "leases": {owner: round(until - now, 1) for owner, until in leases},
+        }
+
+    def all_parts(self):
+        """
+        Yields every queued part, in input order (e.g. to build a fuzzy-match index on a worker).
+        """
+        with self._lock:
+            rows = self._db.execute("SELECT parts_json FROM shards ORDER BY id").fetchall()
+        for (parts_json,) in rows:
+            yield from json.loads(parts_json)
+
+    def pending(self):
+        """
+        Returns:
+            tuple: (claimable shards – pending or with an expired lease, unfinished shards – pending or leased)
+        """
+        with self._lock:
+            return self._db.execute(
+                "SELECT COALESCE(SUM(status = ? OR lease_until < ?), 0), COUNT(*) FROM shards WHERE status IN (?, ?)",
+                (PENDING, time.time(), PENDING, LEASED)).fetchone()
+
+    def export(self, output_path):
+        """
+        Writes every returned result row to a CSV, in input order.
+
+        Returns:
+            int: Rows written.
+        """
+        written = 0
+        with self._lock:
+            cursor = self._db.execute("SELECT part, outcome, row_json FROM results ORDER BY shard_id, seq")
+            with open(output_path, "w", newline="", encoding="utf-8") as f:
+                writer = None
+                for part, outcome, row_json in cursor:
+                    row = json.loads(row_json) if row_json else {"part_number": part}
+                    if writer is None:
+                        writer = csv.DictWriter(f, fieldnames=list(row), extrasaction="ignore")
+                        writer.writeheader()
+                    writer.writerow(row)
+                    written += 1
+        return written
+
+    # ------------------------------
+    # Workers
+    # ------------------------------
+    def claim(self, worker_id):
+        """
+        Leases the oldest pending shard, or one whose lease has expired.
+
+        Returns:
+            tuple or None: (shard id, list of parts, reassigned) – reassigned is True if the shard
+                           was taken over from a worker whose lease expired. None if nothing is claimable.
+        """
+        lease_seconds, max_attempts = self.lease_seconds, self.max_attempts
+        with self._lock:
+            self._transaction()
+            try:
+                while True:
+                    now = time.time()
+                    row = self._db.execute(
+                        "SELECT id, parts_json, status, attempts FROM shards "
+                        "WHERE status = ? OR (status = ? AND lease_until < ?) ORDER BY id LIMIT 1",
+                        (PENDING, LEASED, now)).fetchone()
+                    if row is None:
+                        self._db.execute("COMMIT")
+                        return None
+                    shard_id, parts_json, status, attempts = row
+                    if attempts >= max_attempts:
+                        # Every worker that took it so far died on it: park it instead of killing the next one
+                        self._db.execute("UPDATE shards SET status = ?, owner = NULL, lease_until = NULL WHERE id = ?",
+                                         (FAILED, shard_id))
+                        print(f"[WARN] Shard {shard_id} failed {attempts} times; giving up on it.")
+                        continue
+                    self._db.execute(
+                        "UPDATE shards SET status = ?, owner = ?, lease_until = ?, attempts = attempts + 1 WHERE id = ?",
+                        (LEASED, worker_id, now + lease_seconds, shard_id))
+                    self._db.execute("COMMIT")
+                    return shard_id, json.loads(parts_json), status == LEASED
+            except Exception:
+                self._db.execute("ROLLBACK")
+                raise
+
+    def renew(self, shard_id, worker_id):
+        """
+        Extends the lease of a shard we hold.
+
+        Returns:
+            bool: False if the lease was lost (expired and taken over by another worker).
+        """
+        lease_seconds = self.lease_seconds
+        with self._lock:
+            cursor = self._db.execute(
+                "UPDATE shards SET lease_until = ? WHERE id = ? AND owner = ? AND status = ?",
+                (time.time() + lease_seconds, shard_id, worker_id, LEASED))
+        return cursor.rowcount == 1
+
+    def complete(self, shard_id, worker_id, results):
+        """
+        Stores a shard's results and marks it done – only if we still hold it.
+
+        Args:
+            shard_id (int): Shard id from claim().
+            worker_id (str): Our worker id.
+            results (list): (part, outcome, row dict) per part, in shard order.
+
+        Returns:
+            bool: False if the shard was taken over meanwhile (the results are dropped).
+        """
+        with self._lock:
+            self._transaction()
+            try:
+                row = self._db.execute("SELECT status, owner FROM shards WHERE id = ?", (shard_id,)).fetchone()
+                if row != (LEASED, worker_id):
+                    self._db.execute("ROLLBACK")
+                    return False
+                self._db.executemany(
+                    "INSERT OR REPLACE INTO results (shard_id, seq, part, outcome, row_json) VALUES (?, ?, ?, ?, ?)",
+                    [(shard_id, seq, part, outcome, json.dumps(row, ensure_ascii=False))
+                     for seq, (part, outcome, row) in enumerate(results)])
+                self._db.execute("UPDATE shards SET status = ?, lease_until = NULL, finished_at = ? WHERE id = ?",
+                                 (DONE, time.time(), shard_id))
+                self._db.execute("COMMIT")
+                return True
+            except Exception:
+                self._db.execute("ROLLBACK")
+                raise
+
+    def release(self, shard_id, worker_id):
+        """
+        Gives an unfinished shard back right away (clean shutdown), without counting it as an attempt.
+        """
+        with self._lock:
+            self._db.execute(
+                "UPDATE shards SET status = ?, owner = NULL, lease_until = NULL, attempts = attempts - 1 "
+                "WHERE id = ? AND owner = ? AND status = ?", (PENDING, shard_id, worker_id, LEASED))
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+
+class ShardWorker:
+    def __init__(self, shard_queue, worker_id=None, poll_seconds=5.0):
+        """
+        Feeds main.py from a shard queue and hands the results back shard by shard.
+
+        Args:
+            shard_queue (ShardQueue): The shared queue.
+            worker_id (str, optional): Unique name of this worker (default: host-pid).
+            poll_seconds (float): Wait between claims while other workers still hold leases.
+        """
+        self.queue = shard_queue
+        self.worker_id = worker_id or default_worker_id()
+        self.poll_seconds = poll_seconds
+
+        self._lock = threading.Lock()
+        self._open = OrderedDict()  # shard id → {"parts": [...], "results": [...]} in claim order
+        self._stop = threading.Event()
+        self._heartbeat = None
+
+        # Counters for the run summary
+        self.shards_done = 0
+        self.shards_lost = 0
+        self.shards_reassigned = 0
+
+    def parts(self):
+        """
+        Yields the parts of every shard this worker can claim; ends as soon as nothing is claimable.
+        """
+        self._start_heartbeat()
+        while not self._stop.is_set():
+            claimed = self.queue.claim(self.worker_id)
+            if claimed is None:
+                return
+            shard_id, parts, reassigned = claimed
+            if reassigned:
+                self.shards_reassigned += 1
+                print(f"[INFO] Worker {self.worker_id}: took over shard {shard_id} (lease expired)")
+            else:
+                print(f"[INFO] Worker {self.worker_id}: claimed shard {shard_id} ({len(parts)} parts)")
+            with self._lock:
+                self._open[shard_id] = {"parts": parts, "results": []}
+            yield from parts
+
+    def wait_for_work(self):
+        """
+        Called once a round of parts() is written out: waits while other workers still hold shards,
+        in case one of them dies and its lease expires.
+
+        Returns:
+            bool: True if a shard became claimable (run parts() again), False once every shard is finished.
+        """
+        while not self._stop.is_set():
+            claimable, unfinished = self.queue.pending()
+            if claimable:
+                return True
+            if not unfinished:
+                return False
+            self._stop.wait(self.poll_seconds)
+        return False
+
+    def record(self, part, outcome, row):
+        """
+        Takes one result (called in input order) and completes its shard once it is full.
+        """
+        with self._lock:
+            shard_id, shard = next((sid, s) for sid, s in self._open.items()
+                                   if len(s["results"]) < len(s["parts"]))
+            shard["results"].append((part, outcome, row))
+            if len(shard["results"]) < len(shard["parts"]):
+                return
+            del self._open[shard_id]
+        if self.queue.complete(shard_id, self.worker_id, shard["results"]):
+            self.shards_done += 1
+            print(f"[INFO] Worker {self.worker_id}: shard {shard_id} done")
+        else:
+            self.shards_lost += 1
+            print(f"[WARN] Worker {self.worker_id}: lost the lease on shard {shard_id}; results dropped")
+
+    def _start_heartbeat(self):
+        if self._heartbeat is None:
+            self._heartbeat = threading.Thread(target=self._renew_loop, daemon=True)
+            self._heartbeat.start()
+
+    def _renew_loop(self):
+        interval = max(1.0, self.queue.lease_seconds / 3)
+        while not self._stop.wait(interval):
+            with self._lock:
+                shard_ids = list(self._open)
+            for shard_id in shard_ids:
+                if not self.queue.renew(shard_id, self.worker_id):
+                    print(f"[WARN] Worker {self.worker_id}: lease on shard {shard_id} expired")
+
+    def close(self):
+        """
+        Stops renewing and gives unfinished shards back to the queue.
+        """
+        self._stop.set()
+        with self._lock:
+            unfinished = list(self._open)
+            self._open.clear()
+        for shard_id in unfinished:
+            self.queue.release(shard_id, self.worker_id)
+            print(f"[INFO] Worker {self.worker_id}: released unfinished shard {shard_id}")
+
+    def summary(self):
+        return (f"{self.shards_done} shards done, {self.shards_reassigned} taken over from expired leases, "
+                f"{self.shards_lost} lost")
+
+
+def print_status(status):
+    shards = status["shards"]
+    print(f"[INFO] Shards: {shards[DONE]} done, {shards[LEASED]} leased, {shards[PENDING]} pending, "
+          f"{shards[FAILED]} failed | parts: {status['parts_done']}/{status['parts_total']}")
+    for owner, seconds_left in sorted(status["leases"].items()):
+        state = f"{seconds_left:.0f}s left" if seconds_left >= 0 else "EXPIRED"
+        print(f"[INFO]   lease held by {owner}: {state}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Shared shard queue for distributed runs of main.py.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    create = commands.add_parser("create", help="Split an input CSV into leased shards")
+    create.add_argument("queue", help="SQLite queue file (on storage every worker can reach)")
+    create.add_argument("--input", default="input.csv", help="Input CSV with part numbers in the first column")
+    create.add_argument("--shard-size", type=int, default=50, help="Parts per shard. Default: 50")
+    create.add_argument("--lease-seconds", type=float, default=300,
+                        help="A shard goes back to the queue if its worker does not renew within this. Default: 300")
+    create.add_argument("--max-attempts", type=int, default=3,
+                        help="Park a shard as failed after this many expired leases. Default: 3")
+    create.add_argument("--no-dedup", action="store_true", help="Keep duplicate part numbers from the input")
+
+    status_cmd = commands.add_parser("status", help="Show shard and lease status")
+    status_cmd.add_argument("queue")
+    status_cmd.add_argument("--watch", type=float, metavar="SECONDS", help="Repeat until every shard is finished")
+
+    export_cmd = commands.add_parser("export", help="Write all returned results to a CSV in input order")
+    export_cmd.add_argument("queue")
+    export_cmd.add_argument("output")
+
+    args = parser.parse_args()
+    shard_queue = ShardQueue(args.queue)
+    try:
+        if args.command == "create":
+            shards, parts = shard_queue.create(iter_part_numbers(args.input, dedup=not args.no_dedup),
+                                               shard_size=args.shard_size, lease_seconds=args.lease_seconds,
+                                               max_attempts=args.max_attempts)
+            print(f"[INFO] Queued {parts} parts in {shards} shards → {args.queue}")
+        elif args.command == "status":
+            while True:
+                status = shard_queue.status()
+                print_status(status)
+                if not args.watch or not (status["shards"][PENDING] or status["shards"][LEASED]):
+                    break
+                time.sleep(args.watch)
+        else:
+            print(f"[INFO] Exported {shard_queue.export(args.output)} rows → {args.output}")
+    finally:
+        shard_queue.close()